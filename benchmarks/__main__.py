@@ -0,0 +1,141 @@
+"""Нагрузочный прогон и микробенчмарки: python -m benchmarks [--db-url ...]
+
+По умолчанию база - SQLite во временном файле, приложение вызывается в процессе через ASGI.
+Кеш и брокер задач берутся из настроек (CACHE_BACKEND, TASK_BROKER).
+"""
+import argparse
+import asyncio
+import json
+import logging
+import sys
+import tempfile
+from pathlib import Path
+
+import httpx
+from sqlalchemy import event, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from benchmarks.baseline import (
+    BASELINE_PATH,
+    build_baseline,
+    describe_environment,
+    find_regressions,
+    load_baseline,
+    save_baseline,
+)
+from benchmarks.load import build_app, build_scenarios, run_scenario
+from benchmarks.micro import run_micro_benchmarks
+from benchmarks.seed import SeedVolumes, seed_database
+from src.core.logs import configure_logging
+from src.core.query_stats import install_query_stats
+from src.core.rate_limit import InMemoryRateLimitBackend, LoginRateLimiter, set_login_rate_limiter
+from src.utils.hashing import password_hasher
+
+
+def _sqlite_wal(dbapi_connection, connection_record):
+    # Читатели не ждут писателя, параллельные коммиты ждут друг друга по timeout
+    cursor = dbapi_connection.cursor()
+    cursor.execute("PRAGMA journal_mode=WAL")
+    cursor.close()
+
+
+def create_engine(db_url: str, tmp_dir: str):
+    url = make_url(db_url)
+    if url.get_backend_name() == "sqlite" and url.database in (None, "", ":memory:"):
+        # Не общая in-memory база на одном соединении: на нем параллельные коммиты
+        # падают с "SQL statements in progress". Файл дает каждому запросу свое соединение
+        url = url.set(database=str(Path(tmp_dir) / "benchmarks.db"))
+        engine = create_async_engine(url, pool_size=20, max_overflow=10, connect_args={"timeout": 30})
+        event.listen(engine.sync_engine, "connect", _sqlite_wal)
+    else:
+        engine = create_async_engine(db_url, pool_size=20, max_overflow=10)
+    install_query_stats(engine.sync_engine)
+    return engine
+
+
+async def run(args) -> int:
+    with tempfile.TemporaryDirectory(prefix="benchmarks-") as tmp_dir:
+        return await _run(args, create_engine(args.db_url, tmp_dir))
+
+
+async def _run(args, engine) -> int:
+    environment = describe_environment(engine.dialect.name)
+    volumes = SeedVolumes().scaled(args.scale)
+    logging.info("Заполняем базу: %s", volumes.model_dump())
+    data = await seed_database(engine, volumes, reset=args.reset)
+
+    app = build_app(async_sessionmaker(bind=engine, expire_on_commit=False))
+    # Все запросы идут с одного адреса: лимиты входа поднимаем, сама проверка остается в замере
+    set_login_rate_limiter(LoginRateLimiter(InMemoryRateLimitBackend(), ip_limit=10**9, email_limit=10**9))
+    scenarios = [
+        scenario
+        for scenario in build_scenarios(data)
+        if (not args.only or scenario.name in args.only)
+        and not (scenario.postgresql_only and engine.dialect.name != "postgresql")
+    ]
+    results = []
+    # Исключения приложения превращаются в 500 и считаются ошибками сценария
+    transport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        for scenario in scenarios:
+            result = await run_scenario(client, scenario, args.concurrency, args.requests)
+            logging.info(
+                "%s: p50=%.2fмс p95=%.2fмс p99=%.2fмс %.1f rps, ошибок %d",
+                result.name, result.p50_ms, result.p95_ms, result.p99_ms, result.throughput_rps, result.errors,
+                extra={"benchmark": result.model_dump()},
+            )
+            results.append(result)
+    await engine.dispose()
+    password_hasher.shutdown()
+
+    micro = [] if args.skip_micro else run_micro_benchmarks(args.scale)
+    for result in micro:
+        logging.info("%s: %.1f нс/оп", result.name, result.ns_per_op, extra={"benchmark": result.model_dump()})
+
+    report = {
+        "environment": environment,
+        "scenarios": [result.model_dump() for result in results],
+        "micro": [result.model_dump() for result in micro],
+    }
+    if args.output:
+        Path(args.output).write_text(json.dumps(report, indent=2, ensure_ascii=False), encoding="utf-8")
+
+    if args.update_baseline:
+        save_baseline(build_baseline(results, micro, environment), args.baseline)
+        logging.info("Эталон обновлен: %s", args.baseline)
+        return 0
+
+    baseline = load_baseline(args.baseline)
+    if baseline is None:
+        logging.warning("Эталон %s не найден, сравнение пропущено", args.baseline)
+        return 0
+    if baseline.get("environment") != environment:
+        logging.warning(
+            "Окружение отличается от эталонного, сравнение может быть неточным",
+            extra={"baseline": baseline.get("environment"), "current": environment},
+        )
+    regressions = find_regressions(results, micro, baseline, args.tolerance, args.latency_tolerance)
+    for regression in regressions:
+        logging.error("Регрессия: %s", regression)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Нагрузочный прогон горячих путей API и микробенчмарки")
+    parser.add_argument("--db-url", default="sqlite+aiosqlite://", help="SQLite (по умолчанию во временном файле) или PostgreSQL")
+    parser.add_argument("--reset", action="store_true", help="Пересоздать схему перед заполнением")
+    parser.add_argument("--scale", type=float, default=1.0, help="Множитель объемов данных и числа повторов")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=500, help="Запросов на сценарий")
+    parser.add_argument("--only", nargs="*", help="Запустить только эти сценарии")
+    parser.add_argument("--skip-micro", action="store_true")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH)
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Допустимое ухудшение, доля")
+    parser.add_argument("--latency-tolerance", type=float, default=0.5, help="Допуск для p95, доля")
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--output", help="Куда сохранить полный отчет в JSON")
+    args = parser.parse_args()
+
+    configure_logging()
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    sys.exit(asyncio.run(run(args)))
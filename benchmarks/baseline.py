@@ -0,0 +1,71 @@
+import json
+import os
+import platform
+from pathlib import Path
+
+from benchmarks.load import ScenarioResult
+from benchmarks.micro import MicroResult
+
+BASELINE_PATH = Path(__file__).with_name("baseline.json")
+
+
+def describe_environment(dialect: str) -> dict:
+    # Цифры сравнимы только на похожем окружении - сохраняем его рядом с эталоном
+    return {
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "database": dialect,
+    }
+
+
+def build_baseline(scenarios: list[ScenarioResult], micro: list[MicroResult], environment: dict) -> dict:
+    return {
+        "environment": environment,
+        "scenarios": {
+            result.name: {"p95_ms": result.p95_ms, "throughput_rps": result.throughput_rps}
+            for result in scenarios
+        },
+        "micro": {result.name: {"ns_per_op": result.ns_per_op} for result in micro},
+    }
+
+
+def load_baseline(path: Path = BASELINE_PATH) -> dict | None:
+    if not path.exists():
+        return None
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+def save_baseline(baseline: dict, path: Path = BASELINE_PATH):
+    path.write_text(json.dumps(baseline, indent=2, ensure_ascii=False) + "\n", encoding="utf-8")
+
+
+def find_regressions(
+    scenarios: list[ScenarioResult],
+    micro: list[MicroResult],
+    baseline: dict,
+    tolerance: float = 0.25,
+    latency_tolerance: float = 0.5,
+) -> list[str]:
+    """Сравнивает прогон с эталоном. Метрики, которых нет в эталоне, не проверяются.
+
+    Хвост задержек шумит сильнее пропускной способности, поэтому допуск для p95 отдельный.
+    """
+    regressions = []
+    for result in scenarios:
+        if result.errors:
+            regressions.append(f"{result.name}: {result.errors} ошибок из {result.requests}")
+        expected = baseline.get("scenarios", {}).get(result.name)
+        if expected is None:
+            continue
+        if result.p95_ms > expected["p95_ms"] * (1 + latency_tolerance):
+            regressions.append(f"{result.name}: p95 {result.p95_ms} мс, эталон {expected['p95_ms']} мс")
+        if result.throughput_rps < expected["throughput_rps"] * (1 - tolerance):
+            regressions.append(
+                f"{result.name}: {result.throughput_rps} rps, эталон {expected['throughput_rps']} rps"
+            )
+    for result in micro:
+        expected = baseline.get("micro", {}).get(result.name)
+        if expected is not None and result.ns_per_op > expected["ns_per_op"] * (1 + tolerance):
+            regressions.append(f"{result.name}: {result.ns_per_op} нс/оп, эталон {expected['ns_per_op']} нс/оп")
+    return regressions
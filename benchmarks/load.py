@@ -0,0 +1,148 @@
+import asyncio
+import math
+import random
+import time
+from typing import Awaitable, Callable
+
+import httpx
+from fastapi import FastAPI
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.seed import SeedData
+from src.api.auth import router as auth_router
+from src.api.books import router as books_router
+from src.api.dependencies import get_db
+from src.core.db_manager import DBManager
+from src.core.instrumentation import InstrumentationMiddleware
+from src.core.responses import FastJSONResponse
+from src.services.auth import AuthService
+
+RequestFactory = Callable[[httpx.AsyncClient, int], Awaitable[httpx.Response]]
+
+
+class ScenarioResult(BaseModel):
+    name: str
+    concurrency: int
+    requests: int
+    errors: int
+    elapsed_seconds: float
+    p50_ms: float
+    p95_ms: float
+    p99_ms: float
+    throughput_rps: float
+
+
+class Scenario:
+    def __init__(self, name: str, request: RequestFactory, postgresql_only: bool = False):
+        self.name = name
+        self.request = request
+        self.postgresql_only = postgresql_only
+
+
+def percentile(sorted_values: list[float], q: float) -> float:
+    # Nearest-rank: значение, которое не превышают q процентов замеров
+    if not sorted_values:
+        return 0.0
+    rank = max(math.ceil(q / 100 * len(sorted_values)), 1)
+    return sorted_values[rank - 1]
+
+
+def build_app(session_maker: async_sessionmaker) -> FastAPI:
+    async def override_get_db():
+        async with DBManager(session_factory=session_maker) as db:
+            yield db
+
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.add_middleware(InstrumentationMiddleware)
+    app.include_router(auth_router)
+    app.include_router(books_router)
+    app.dependency_overrides[get_db] = override_get_db
+    return app
+
+
+def build_scenarios(data: SeedData, token_count: int = 100) -> list[Scenario]:
+    rnd = random.Random(0)
+    # Токены выпускаем заранее: /auth/me меряем без логина на каждый запрос
+    tokens = [
+        AuthService().create_access_token({"user_id": user_id})
+        for user_id in rnd.sample(data.user_ids, min(token_count, len(data.user_ids)))
+    ]
+    last_page_start = max(len(data.book_ids) - 50, 0)
+
+    async def login(client: httpx.AsyncClient, i: int):
+        email = data.emails[i % len(data.emails)]
+        return await client.post("/auth/login", json={"email": email, "password": data.password})
+
+    async def me(client: httpx.AsyncClient, i: int):
+        # Cookie в заголовке, а не в cookie jar клиента: логин в соседнем сценарии его перезаписывает
+        return await client.get("/auth/me", headers={"Cookie": f"access_token={tokens[i % len(tokens)]}"})
+
+    async def books_list(client: httpx.AsyncClient, i: int):
+        return await client.get("/books", params={"after_id": rnd.randint(0, last_page_start), "limit": 50})
+
+    async def books_list_with_relations(client: httpx.AsyncClient, i: int):
+        return await client.get(
+            "/books",
+            params={
+                "after_id": rnd.randint(0, last_page_start),
+                "limit": 50,
+                "include": ["uploader", "authors", "reviews_count", "fans_count"],
+            },
+        )
+
+    async def books_search(client: httpx.AsyncClient, i: int):
+        return await client.get("/books/search", params={"q": data.search_terms[i % len(data.search_terms)]})
+
+    return [
+        Scenario("auth_login", login),
+        Scenario("auth_me", me),
+        Scenario("books_list", books_list),
+        Scenario("books_list_include", books_list_with_relations),
+        Scenario("books_search", books_search, postgresql_only=True),
+    ]
+
+
+async def run_scenario(
+    client: httpx.AsyncClient,
+    scenario: Scenario,
+    concurrency: int,
+    requests: int,
+    warmup: int = 10,
+) -> ScenarioResult:
+    """Гоняет requests запросов, держа в полете ровно concurrency штук."""
+    for i in range(warmup):
+        await scenario.request(client, i)
+
+    latencies: list[float] = []
+    errors = 0
+    numbers = iter(range(requests))
+
+    async def worker():
+        nonlocal errors
+        for i in numbers:
+            started = time.perf_counter()
+            try:
+                response = await scenario.request(client, i)
+                failed = response.status_code >= 400
+            except httpx.HTTPError:
+                failed = True
+            latencies.append(time.perf_counter() - started)
+            errors += failed
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return ScenarioResult(
+        name=scenario.name,
+        concurrency=concurrency,
+        requests=requests,
+        errors=errors,
+        elapsed_seconds=round(elapsed, 3),
+        p50_ms=round(percentile(latencies, 50) * 1000, 3),
+        p95_ms=round(percentile(latencies, 95) * 1000, 3),
+        p99_ms=round(percentile(latencies, 99) * 1000, 3),
+        throughput_rps=round(requests / elapsed, 1) if elapsed else 0.0,
+    )
@@ -0,0 +1,119 @@
+import time
+from datetime import date
+from typing import Callable
+
+from fastapi.encoders import jsonable_encoder
+from pydantic import BaseModel
+from starlette.responses import JSONResponse
+
+from src.models.books import BookModel
+from src.models.users import RoleEnum, UserModel
+from src.core.responses import FastJSONResponse
+from src.repositories.mappers.mappers import BookDataMapper, UserDataMapper
+from src.schemas.books import Book, BookAuthor
+from src.schemas.pagination import KeysetPage
+from src.schemas.users import UserPublic
+from src.services.auth import AuthService
+
+
+class MicroResult(BaseModel):
+    name: str
+    number: int
+    ns_per_op: float
+
+
+def measure(name: str, func: Callable[[], object], number: int, repeat: int = 5) -> MicroResult:
+    # Лучший из повторов: шум (GC, соседние процессы) только замедляет
+    func()
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        elapsed = time.perf_counter_ns() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return MicroResult(name=name, number=number, ns_per_op=round(best / number, 1))
+
+
+def _users(count: int) -> list[UserModel]:
+    return [
+        UserModel(
+            id=i,
+            first_name="John",
+            last_name="Doe",
+            nickname=f"user{i}",
+            birth_day=date(1990, 1, 1),
+            email=f"user{i}@example.com",
+            hashed_password="hash",
+            role=RoleEnum.user,
+        )
+        for i in range(count)
+    ]
+
+
+def _book_page(count: int) -> KeysetPage[Book]:
+    authors = [BookAuthor(id=1, full_name="Автор")]
+    return KeysetPage[Book](
+        items=[
+            Book(
+                id=i,
+                title=f"Книга {i}",
+                description="Описание книги " * 10,
+                file_path=f"/books/{i}.pdf",
+                author_id=1,
+                uploader=UserPublic(id=1, nickname="user1"),
+                authors=authors,
+                fans_count=i,
+            )
+            for i in range(count)
+        ],
+        next_after_id=count,
+    )
+
+
+def _encode_benchmarks(number: int) -> list[MicroResult]:
+    # Ответ со страницей книг: как его собирает FastAPI по умолчанию и через FastJSONRoute
+    results = []
+    for count in (50, 500):
+        page = _book_page(count)
+        repeat_number = max(number * 10 // count, 1)
+        results += [
+            measure(
+                f"encode_books_{count}_jsonable_encoder",
+                lambda: JSONResponse(jsonable_encoder(page)),
+                repeat_number,
+            ),
+            measure(f"encode_books_{count}_fast_json", lambda: FastJSONResponse(page), repeat_number),
+        ]
+    return results
+
+
+def run_micro_benchmarks(scale: float = 1.0) -> list[MicroResult]:
+    number = max(int(1_000 * scale), 10)
+    users = _users(100)
+    user = users[0]
+    book = BookModel(id=1, title="Книга", description="Описание", file_path="/books/1.pdf", author_id=1)
+
+    service = AuthService()
+    token = service.create_access_token({"user_id": 1})
+    # Путь запроса с уже проверенным токеном: claims из кеша процесса
+    service.claims_cache.put(token, service.decode_token(token))
+
+    return [
+        measure("mapper_user_validated", lambda: UserDataMapper.map_to_domain_entity(user), number),
+        measure(
+            "mapper_user_trusted",
+            lambda: UserDataMapper.map_to_domain_entity(user, trusted=True),
+            number,
+        ),
+        measure("mapper_book_validated", lambda: BookDataMapper.map_to_domain_entity(book), number),
+        measure(
+            "mapper_users_map_many_100_trusted",
+            lambda: UserDataMapper.map_many(users, trusted=True),
+            max(number // 10, 1),
+        ),
+        # Декодирование без кеша claims: именно его кеш и экономит
+        measure("jwt_decode", lambda: service.decode_token(token), number),
+        measure("jwt_claims_cached", lambda: service.claims_cache.get(token), number),
+        *_encode_benchmarks(number),
+    ]
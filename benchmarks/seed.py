@@ -0,0 +1,171 @@
+import random
+from collections import Counter
+from datetime import date
+
+from pydantic import BaseModel
+from sqlalchemy import func, insert, select, text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker
+
+import benchmarks.sqlite_compat  # noqa: F401
+from src.core.db import Base
+from src.core.db_manager import DBManager
+from src.models.reviews import MAX_RATING, MIN_RATING
+from src.models.users import BookAuthorModel, UserModel, book_authors_books, favorite_books
+from src.utils.hashing import password_hasher
+
+SEED_PASSWORD = "benchmark-password"
+
+# Слова для названий: поиск по ним должен что-то находить
+WORDS = [
+    "война", "мир", "море", "город", "ночь", "звезда", "сад", "дорога", "тайна", "история",
+    "остров", "река", "зима", "лето", "дом", "сердце", "время", "путь", "огонь", "ветер",
+    "книга", "память", "песня", "небо", "лес", "камень", "свет", "тень", "письмо", "мастер",
+]
+FIRST_NAMES = ["Анна", "Борис", "Вера", "Глеб", "Дарья", "Егор", "Жанна", "Иван", "Кира", "Лев"]
+LAST_NAMES = ["Иванов", "Смирнов", "Кузнецов", "Попов", "Соколов", "Лебедев", "Козлов", "Новиков"]
+
+
+class SeedVolumes(BaseModel):
+    users: int = 1_000
+    authors: int = 300
+    books: int = 5_000
+    reviews_per_book: int = 4
+    favourites_per_user: int = 10
+
+    def scaled(self, factor: float) -> "SeedVolumes":
+        return SeedVolumes(**{name: max(int(value * factor), 1) for name, value in self})
+
+
+class SeedData(BaseModel):
+    volumes: SeedVolumes
+    user_ids: list[int]
+    emails: list[str]
+    password: str
+    book_ids: list[int]
+    search_terms: list[str]
+
+
+async def _insert(session, table, rows: list[dict], chunk_size: int = 1_000):
+    for start in range(0, len(rows), chunk_size):
+        await session.execute(insert(table), rows[start:start + chunk_size])
+
+
+async def seed_database(
+    engine: AsyncEngine,
+    volumes: SeedVolumes = SeedVolumes(),
+    reset: bool = False,
+    seed: int = 42,
+) -> SeedData:
+    """Заполняет пустую базу детерминированными данными объемом volumes.
+
+    Вставка идет пачками в одной транзакции, без хеширования на каждого пользователя:
+    у всех один пароль, хеш считается один раз.
+    """
+    rnd = random.Random(seed)
+    hashed_password = await password_hasher.hash(SEED_PASSWORD)
+
+    async with engine.begin() as conn:
+        if reset:
+            await conn.run_sync(Base.metadata.drop_all)
+        await conn.run_sync(Base.metadata.create_all)
+        if await conn.scalar(select(func.count()).select_from(UserModel)):
+            raise RuntimeError("База уже заполнена, для пересоздания схемы укажите reset=True")
+
+    user_ids = list(range(1, volumes.users + 1))
+    users = [
+        {
+            "id": user_id,
+            "first_name": rnd.choice(FIRST_NAMES),
+            "last_name": rnd.choice(LAST_NAMES),
+            "nickname": f"reader{user_id}",
+            "birth_day": date(1960 + user_id % 45, user_id % 12 + 1, user_id % 28 + 1),
+            "email": f"reader{user_id}@example.com",
+            "hashed_password": hashed_password,
+        }
+        for user_id in user_ids
+    ]
+    authors = [
+        {"id": author_id, "full_name": f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {author_id}"}
+        for author_id in range(1, volumes.authors + 1)
+    ]
+    book_ids = list(range(1, volumes.books + 1))
+    books = [
+        {
+            "id": book_id,
+            "title": " ".join(rnd.sample(WORDS, 3)).capitalize(),
+            "description": " ".join(rnd.choices(WORDS, k=30)),
+            "file_path": f"/books/{book_id}.pdf",
+            "author_id": rnd.choice(user_ids),
+        }
+        for book_id in book_ids
+    ]
+    book_authors = [
+        {"book_id": book_id, "author_id": author_id}
+        for book_id in book_ids
+        for author_id in rnd.sample(range(1, volumes.authors + 1), min(2, volumes.authors))
+    ]
+
+    reviews = []
+    ratings: dict[int, Counter] = {}
+    for book_id in book_ids:
+        reviewers = rnd.sample(user_ids, min(volumes.reviews_per_book, len(user_ids)))
+        for user_id in reviewers:
+            rating = rnd.randint(MIN_RATING, MAX_RATING)
+            reviews.append(
+                {"user_id": user_id, "book_id": book_id, "text": " ".join(rnd.choices(WORDS, k=12)),
+                 "rating": rating}
+            )
+            ratings.setdefault(book_id, Counter())[rating] += 1
+    book_ratings = [
+        {
+            "book_id": book_id,
+            "reviews_count": sum(counter.values()),
+            "rating_sum": sum(value * count for value, count in counter.items()),
+            **{f"rating_{value}": counter[value] for value in range(MIN_RATING, MAX_RATING + 1)},
+        }
+        for book_id, counter in ratings.items()
+    ]
+    favourites = [
+        {"user_id": user_id, "book_id": book_id}
+        for user_id in user_ids
+        for book_id in rnd.sample(book_ids, min(volumes.favourites_per_user, len(book_ids)))
+    ]
+
+    # Таблицы с репозиториями пишутся через единицу работы DBManager: каждая
+    # накопленная пачка уходит одним executemany. Связи без репозиториев - через Core
+    async with DBManager(session_factory=async_sessionmaker(bind=engine, expire_on_commit=False)) as db:
+        await _insert(db.session, BookAuthorModel.__table__, authors)
+        for user in users:
+            db.queue_insert(db.users, user)
+        for book in books:
+            db.queue_insert(db.books, book)
+        await db.flush()
+
+        await _insert(db.session, book_authors_books, book_authors)
+        for review in reviews:
+            db.queue_insert(db.reviews, review)
+        for book_rating in book_ratings:
+            db.queue_insert(db.ratings, book_rating)
+        await db.flush()
+        await _insert(db.session, favorite_books, favourites)
+
+        if engine.dialect.name == "postgresql":
+            # id заданы явно - сдвигаем последовательности, чтобы обычные вставки не конфликтовали
+            for table in ("users", "book_authors", "books", "reviews"):
+                await db.session.execute(
+                    text(f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), (SELECT max(id) FROM {table}))")
+                )
+        await db.commit()
+
+    if engine.dialect.name == "postgresql":
+        async with engine.begin() as conn:
+            await conn.execute(text("ANALYZE"))
+
+    return SeedData(
+        volumes=volumes,
+        user_ids=user_ids,
+        emails=[user["email"] for user in users],
+        password=SEED_PASSWORD,
+        book_ids=book_ids,
+        search_terms=rnd.sample(WORDS, 10),
+    )
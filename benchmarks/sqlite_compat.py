@@ -0,0 +1,13 @@
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.ext.compiler import compiles
+from sqlalchemy.schema import CreateColumn
+
+
+# Импортируется тестами и бенчмарками: там PostgreSQL заменяет SQLite в памяти
+@compiles(CreateColumn, "sqlite")
+def _sqlite_create_column(element, compiler, **kw):
+    # Полнотекстовый вектор в SQLite - просто текст
+    column = element.element
+    if isinstance(column.type, TSVECTOR):
+        return f"{column.name} TEXT"
+    return compiler.visit_create_column(element, **kw)
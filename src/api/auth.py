@@ -1,13 +1,36 @@
-from fastapi import APIRouter, Response, HTTPException, Depends, Request
+import math
+
+from fastapi import APIRouter, Response, HTTPException, Depends, Request, Query
 
 from src.api.dependencies import DBDep
+from src.core.config import settings
+from src.core.http_cache import CachePolicy, cache_response
+from src.core.responses import FastJSONRoute
 from src.exceptions import NicknameIsEmptyException, EmailIsAlreadyRegisteredException, RegisterErrorException, \
-    LoginErrorException
+    LoginErrorException, PasswordHasherBusyException, ObjectNotFoundException, \
+    TooManyLoginAttemptsException, InvalidCursorException, InvalidRefreshTokenException, RefreshTokenReuseException
 from src.schemas.users import UserRequestAddRegister, UserLogin
 from src.services.auth import AuthService
+from src.services.favorites import FavoritesService
+from src.services.feed import FeedService
 from src.utils.auth_utils import UserIdDep
 
-router = APIRouter(prefix="/auth", tags=["Аутентификация и авторизация"])
+router = APIRouter(prefix="/auth", tags=["Аутентификация и авторизация"], route_class=FastJSONRoute)
+
+REFRESH_COOKIE = "refresh_token"
+
+
+def set_refresh_cookie(response: Response, refresh_token: str):
+    # Только в httponly cookie: в теле ответа токен на 30 дней был бы доступен любому XSS.
+    # Нужен только ручкам /auth - на остальные запросы не отправляется
+    response.set_cookie(
+        REFRESH_COOKIE,
+        refresh_token,
+        max_age=settings.REFRESH_TOKEN_EXPIRE_DAYS * 24 * 60 * 60,
+        path="/auth",
+        httponly=True,
+        samesite="strict",
+    )
 
 
 @router.post(
@@ -24,6 +47,9 @@ async def register_user(data: UserRequestAddRegister, db: DBDep):
         raise HTTPException(status_code=409, detail="Email уже используется")
     except RegisterErrorException:
         raise HTTPException(status_code=400, detail="Ошибка регистрации")
+    except PasswordHasherBusyException:
+        raise HTTPException(status_code=503, detail="Сервис перегружен, попробуйте позже",
+                            headers={"Retry-After": "1"})
     return user
 
 @router.post(
@@ -31,13 +57,42 @@ async def register_user(data: UserRequestAddRegister, db: DBDep):
     summary='Аутентификация',
     description='Аутентификация пользователя',
 )
-async def login_user(data: UserLogin, response: Response, db: DBDep):
+async def login_user(data: UserLogin, request: Request, response: Response, db: DBDep):
+    # За прокси адрес клиента берется из X-Forwarded-For (uvicorn --proxy-headers)
+    client_ip = request.client.host if request.client else None
     try:
-        access_token = await AuthService(db).login_and_get_access_token(data=data)
+        result = await AuthService(db).login_and_get_access_token(data=data, client_ip=client_ip)
     except LoginErrorException:
         raise HTTPException(status_code=401, detail="Неверный email или пароль")
-    response.set_cookie("access_token", access_token)
-    return {"access_token": access_token}
+    except TooManyLoginAttemptsException as e:
+        raise HTTPException(status_code=429, detail="Слишком много попыток входа, попробуйте позже",
+                            headers={"Retry-After": str(max(math.ceil(e.retry_after), 1))})
+    except PasswordHasherBusyException:
+        raise HTTPException(status_code=503, detail="Сервис перегружен, попробуйте позже",
+                            headers={"Retry-After": "1"})
+    response.set_cookie("access_token", result["access_token"])
+    set_refresh_cookie(response, result["refresh_token"])
+    return {'access_token': result["access_token"]}
+
+
+@router.post(
+    "/refresh",
+    summary='Обновить токен доступа',
+    description='Новая пара токенов по refresh-токену из cookie, без пароля',
+)
+async def refresh_access_token(request: Request, response: Response, db: DBDep):
+    refresh_token = request.cookies.get(REFRESH_COOKIE)
+    if not refresh_token:
+        raise HTTPException(status_code=401, detail="Не авторизован")
+    try:
+        result = await AuthService(db).refresh_access_token(refresh_token)
+    except RefreshTokenReuseException:
+        raise HTTPException(status_code=401, detail="Токен уже использован, войдите заново")
+    except InvalidRefreshTokenException:
+        raise HTTPException(status_code=401, detail="Неверный или истекший refresh-токен")
+    response.set_cookie("access_token", result["access_token"])
+    set_refresh_cookie(response, result["refresh_token"])
+    return {'access_token': result["access_token"]}
 
 
 @router.get(
@@ -45,6 +100,7 @@ async def login_user(data: UserLogin, response: Response, db: DBDep):
     summary='👨‍💻 Мой профиль',
     description='Получить мой профиль',
 )
+@cache_response(CachePolicy(("users",), cache_control="private, no-cache", private=True))
 async def get_me(user_id: UserIdDep, db: DBDep):
     user = await AuthService(db).get_one_or_none_user(user_id)
     return user
@@ -53,21 +109,82 @@ async def get_me(user_id: UserIdDep, db: DBDep):
     '/me/favourites',
     summary='Избранные книги'
 )
-async def get_favourite_books(user_id: UserIdDep, db: DBDep):
-    return AuthService(db).get_favourite_books(user_id)
+async def get_favourite_books(
+    user_id: UserIdDep,
+    db: DBDep,
+    after_id: int | None = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+):
+    return await AuthService(db).get_favourite_books(user_id, after_id=after_id, limit=limit)
+
+
+@router.get(
+    '/me/favourites/contains',
+    summary='Проверить, есть ли книги в избранном',
+    description='Проверка сразу для страницы книг: {book_id: true/false}',
+)
+async def check_favourite_books(
+    user_id: UserIdDep,
+    db: DBDep,
+    book_ids: list[int] = Query(..., max_length=500),
+):
+    return await FavoritesService(db).contains(user_id, book_ids)
+
+
+@router.put(
+    '/me/favourites/{book_id}',
+    summary='Добавить книгу в избранное',
+)
+async def add_favourite_book(book_id: int, user_id: UserIdDep, db: DBDep):
+    try:
+        added = await FavoritesService(db).add_book(user_id, book_id)
+    except ObjectNotFoundException:
+        raise HTTPException(status_code=404, detail="Книга не найдена")
+    return {"added": added}
+
+
+@router.delete(
+    '/me/favourites/{book_id}',
+    summary='Убрать книгу из избранного',
+)
+async def remove_favourite_book(book_id: int, user_id: UserIdDep, db: DBDep):
+    removed = await FavoritesService(db).remove_book(user_id, book_id)
+    return {"removed": removed}
+
+
+@router.get(
+    '/me/feed',
+    summary='Лента отзывов',
+    description='Новые отзывы на книги из избранного, от новых к старым',
+)
+async def get_feed(
+    user_id: UserIdDep,
+    db: DBDep,
+    cursor: str | None = Query(None),
+    limit: int = Query(20, ge=1, le=100),
+):
+    try:
+        return await FeedService(db).get_feed(user_id, cursor=cursor, limit=limit)
+    except InvalidCursorException:
+        raise HTTPException(status_code=400, detail="Неверный курсор")
 
 ###############################
 async def get_current_user(request: Request):
     access_token = request.cookies.get("access_token")
     if not access_token:
         raise HTTPException(status_code=401, detail="Не авторизован")
-    return AuthService().decode_token(access_token)
+    return await AuthService().get_token_claims(access_token)
 ###############################
 
 @router.post(
     "/logout",
     summary='Выйти из системы',
 )
-async def logout(response: Response, current_user=Depends(get_current_user)):
+async def logout(request: Request, response: Response, db: DBDep, current_user=Depends(get_current_user)):
+    await AuthService().revoke_token(request.cookies.get("access_token"))
+    refresh_token = request.cookies.get(REFRESH_COOKIE)
+    if refresh_token:
+        await AuthService(db).revoke_refresh_token(refresh_token)
     response.delete_cookie("access_token")
+    response.delete_cookie(REFRESH_COOKIE, path="/auth")
     return {"status": "Вы вышли из системы"}
\ No newline at end of file
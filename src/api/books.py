@@ -1,9 +1,183 @@
-from fastapi import APIRouter
+from pathlib import PurePosixPath
 
+from fastapi import APIRouter, HTTPException, Query, Request
+
+from src.core.config import settings
+
+from src.api.dependencies import DBDep
+from src.core.http_cache import CachePolicy, cache_response
+from src.core.responses import FastJSONRoute
+from src.exceptions import (
+    BookAlreadyExistsException,
+    FileTooLargeException,
+    InvalidCursorException,
+    ObjectNotFoundException,
+    StoredFileNotFoundException,
+)
+from src.schemas.books import BookInclude, BookRequestAdd
+from src.schemas.reviews import ReviewRequestAdd
+from src.services.books import BooksService
 from src.utils.auth_utils import UserIdDep
+from src.utils.downloads import file_response
+from src.utils.streaming import StreamFormat, stream_models
+
+router = APIRouter(prefix="/books", tags=["Библиотека"], route_class=FastJSONRoute)
+
+
+def book_namespaces(path_params: dict, query: dict[str, list[str]]) -> tuple[str, ...]:
+    # Ответ зависит только от тех таблиц, которые попали в include
+    include = set(query.get("include", []))
+    namespaces = ["books"]
+    if include & {"uploader", "fans"}:
+        namespaces.append("users")
+    if "authors" in include:
+        namespaces.append("book_authors")
+    if include & {"reviews", "reviews_count"}:
+        namespaces.append("reviews")
+    if include & {"fans", "fans_count"}:
+        namespaces.append("favorite_books")
+    return tuple(namespaces)
+
+
+CATALOGUE_PAGE = CachePolicy(book_namespaces, cache_control="public, max-age=30", shared=True)
+BOOK_DETAILS = CachePolicy(book_namespaces, cache_control="public, max-age=60", shared=True)
+RATINGS_PAGE = CachePolicy(("books", "reviews"), cache_control="public, max-age=60", shared=True)
+
+
+@router.get(
+    "",
+    summary="Список книг",
+    description="Постраничный список книг, курсор - id последней полученной книги",
+)
+@cache_response(CATALOGUE_PAGE)
+async def get_books(
+    db: DBDep,
+    after_id: int | None = Query(None, ge=0),
+    limit: int = Query(50, ge=1, le=500),
+    include: list[BookInclude] = Query([], description="Связи и счетчики, которые нужно вернуть"),
+):
+    return await BooksService(db).get_books(after_id=after_id, limit=limit, include=include)
+
+
+@router.get(
+    "/stream",
+    summary="Выгрузка книг потоком",
+    description="Все книги в формате NDJSON или JSON-массива без загрузки в память",
+)
+async def stream_books(
+    db: DBDep,
+    after_id: int | None = Query(None, ge=0),
+    fmt: StreamFormat = Query("ndjson", alias="format"),
+    include: list[BookInclude] = Query([]),
+):
+    return stream_models(BooksService(db).stream_books(after_id=after_id, include=include), fmt)
+
+
+@router.get(
+    "/search",
+    summary="Поиск книг",
+    description="Полнотекстовый поиск по названию и описанию и нечеткий поиск по автору",
+)
+async def search_books(
+    db: DBDep,
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(20, ge=1, le=100),
+    cursor: str | None = Query(None),
+):
+    try:
+        return await BooksService(db).search_books(q, limit=limit, cursor=cursor)
+    except InvalidCursorException:
+        raise HTTPException(status_code=400, detail="Неверный курсор")
+
+
+@router.get(
+    "/top-rated",
+    summary="Книги с лучшим рейтингом",
+)
+@cache_response(RATINGS_PAGE)
+async def get_top_rated_books(
+    db: DBDep,
+    limit: int = Query(20, ge=1, le=100),
+    min_reviews: int = Query(1, ge=1),
+):
+    return await BooksService(db).get_top_rated(limit=limit, min_reviews=min_reviews)
+
+
+@router.get(
+    "/most-reviewed",
+    summary="Книги с наибольшим числом отзывов",
+)
+@cache_response(RATINGS_PAGE)
+async def get_most_reviewed_books(db: DBDep, limit: int = Query(20, ge=1, le=100)):
+    return await BooksService(db).get_most_reviewed(limit=limit)
+
+
+@router.get("/{book_id}", summary="Книга")
+@cache_response(BOOK_DETAILS)
+async def get_book(
+    db: DBDep,
+    book_id: int,
+    include: list[BookInclude] = Query([], description="Связи и счетчики, которые нужно вернуть"),
+):
+    try:
+        return await BooksService(db).get_book(book_id, include=include)
+    except ObjectNotFoundException:
+        raise HTTPException(status_code=404, detail="Книга не найдена")
+
+
+@router.api_route(
+    "/{book_id}/file",
+    methods=["GET", "HEAD"],
+    summary="Скачать файл книги",
+    description="Поддерживает Range (докачка) и If-None-Match",
+)
+async def download_book_file(db: DBDep, book_id: int, request: Request):
+    service = BooksService(db)
+    try:
+        book, stored = await service.get_book_file(book_id)
+    except ObjectNotFoundException:
+        raise HTTPException(status_code=404, detail="Книга не найдена")
+    except StoredFileNotFoundException:
+        raise HTTPException(status_code=404, detail="Файл книги не найден")
+    filename = book.title + PurePosixPath(stored.key).suffix
+    return file_response(request, service.get_file_storage(), stored, filename=filename)
+
+
+@router.post(
+    "/files",
+    summary="Загрузить файл книги",
+    description="Тело запроса - содержимое файла, принимается потоком. Возвращает ключ для POST /books",
+)
+async def upload_book_file(user_id: UserIdDep, request: Request):
+    content_length = request.headers.get("content-length")
+    if content_length:
+        try:
+            declared_size = int(content_length)
+        except ValueError:
+            declared_size = -1
+        if declared_size < 0:
+            raise HTTPException(status_code=400, detail="Неверный заголовок Content-Length")
+        if declared_size > settings.STORAGE_MAX_UPLOAD_BYTES:
+            raise HTTPException(status_code=413, detail="Файл слишком большой")
+    try:
+        return await BooksService().upload_file(request.stream(), request.headers.get("content-type"))
+    except FileTooLargeException:
+        raise HTTPException(status_code=413, detail="Файл слишком большой")
+
+
+@router.post("", summary="Добавить книгу")
+async def create_book(user_id: UserIdDep, db: DBDep, data: BookRequestAdd):
+    try:
+        return await BooksService(db).create_book(user_id, data)
+    except StoredFileNotFoundException:
+        raise HTTPException(status_code=400, detail="Файл не загружен")
+    except BookAlreadyExistsException:
+        raise HTTPException(status_code=409, detail="Эта книга уже загружена")
 
-router = APIRouter(prefix="/books", tags=["Библиотека"])
 
-@router.post()
-async def create_book(user: UserIdDep, data):
-    pass
\ No newline at end of file
+@router.post("/{book_id}/reviews", summary="Оставить отзыв")
+async def add_review(book_id: int, user_id: UserIdDep, db: DBDep, data: ReviewRequestAdd):
+    try:
+        return await BooksService(db).add_review(user_id, book_id, data)
+    except ObjectNotFoundException:
+        raise HTTPException(status_code=404, detail="Книга не найдена")
@@ -2,12 +2,13 @@ from typing import Annotated
 
 from fastapi import Depends
 
-from src.core.db import async_session_maker
+from src.core.db import get_replica_set, get_session_maker
 from src.core.db_manager import DBManager
 
 
 async def get_db():
-    async with DBManager(session_factory=async_session_maker) as db:
+    # Реплики только для API: задачи и скрипты работают с primary
+    async with DBManager(session_factory=get_session_maker(), replicas=get_replica_set()) as db:
         yield db
 
 
@@ -0,0 +1,24 @@
+from fastapi import APIRouter, Response
+
+from src.core.lifecycle import lifecycle
+from src.core.responses import FastJSONRoute
+
+router = APIRouter(prefix="/health", tags=["Служебное"], route_class=FastJSONRoute)
+
+
+@router.get("/live", summary="Процесс жив", include_in_schema=False)
+async def live():
+    return {"status": "ok"}
+
+
+@router.get(
+    "/ready",
+    summary="Готовность принимать трафик",
+    description="503 до окончания прогрева и с начала остановки",
+    include_in_schema=False,
+)
+async def ready(response: Response):
+    if not lifecycle.accepting:
+        response.status_code = 503
+        return {"status": "draining" if lifecycle.draining else "warming_up"}
+    return {"status": "ready"}
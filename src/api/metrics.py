@@ -0,0 +1,12 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from src.core.metrics import PROMETHEUS_CONTENT_TYPE, render_prometheus
+from src.core.responses import FastJSONRoute
+
+router = APIRouter(tags=["Служебное"], route_class=FastJSONRoute)
+
+
+@router.get("/metrics", summary="Метрики в формате Prometheus", include_in_schema=False)
+async def metrics():
+    return PlainTextResponse(render_prometheus(), media_type=PROMETHEUS_CONTENT_TYPE)
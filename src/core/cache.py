@@ -0,0 +1,271 @@
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Protocol
+
+from pydantic import TypeAdapter
+
+from src.core.config import settings
+from src.core.metrics import registry
+
+cache_requests_total = registry.counter(
+    "repository_cache_requests_total",
+    "Обращения к кешу репозиториев",
+    labelnames=("tier", "result"),
+)
+cache_loads_total = registry.counter(
+    "repository_cache_loads_total",
+    "Загрузки из БД при промахе кеша",
+    labelnames=("namespace",),
+)
+cache_errors_total = registry.counter(
+    "repository_cache_backend_errors_total",
+    "Ошибки обращения к Redis",
+)
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> bytes | None: ...
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None: ...
+
+    async def incr(self, key: str) -> int: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemoryCacheBackend:
+    def __init__(self):
+        self._data: dict[str, tuple[float | None, bytes]] = {}
+
+    async def get(self, key: str) -> bytes | None:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at <= time.monotonic():
+            del self._data[key]
+            return None
+        return value
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+
+    async def incr(self, key: str) -> int:
+        value = int(await self.get(key) or 0) + 1
+        self._data[key] = (None, str(value).encode())
+        return value
+
+    async def close(self) -> None:
+        self._data.clear()
+
+
+class RedisCacheBackend:
+    def __init__(self, url: str):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url)
+
+    async def get(self, key: str) -> bytes | None:
+        return await self.client.get(key)
+
+    async def set(self, key: str, value: bytes, ttl: int) -> None:
+        await self.client.set(key, value, ex=ttl)
+
+    async def incr(self, key: str) -> int:
+        return await self.client.incr(key)
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class LocalTTLCache:
+    def __init__(self, maxsize: int = 10_000, ttl: float = 5.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str, default=None):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if expires_at <= time.monotonic():
+                del self._entries[key]
+                return default
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float | None = None):
+        expires_at = time.monotonic() + min(self.ttl, ttl if ttl is not None else self.ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+_MISSING = object()
+
+
+class _LoaderCancelled(Exception):
+    """Загрузчик ключа отменен: ждущие повторяют загрузку сами."""
+
+
+class RepositoryCache:
+    """Двухуровневый read-through кеш: локальный L1 в процессе и общий L2 (Redis).
+
+    Ключи содержат версию формата и поколение каждого пространства имен,
+    поэтому инвалидация - это инкремент поколения, без поиска ключей.
+    """
+
+    def __init__(
+        self,
+        backend: CacheBackend,
+        key_version: int = 1,
+        l1_maxsize: int = 10_000,
+        l1_ttl: float = 5.0,
+        prefix: str = "repo",
+    ):
+        self.backend = backend
+        self.prefix = f"{prefix}:v{key_version}"
+        self.l1 = LocalTTLCache(maxsize=l1_maxsize, ttl=l1_ttl)
+        self._generations = LocalTTLCache(maxsize=1_000, ttl=l1_ttl)
+        self._in_flight: dict[str, asyncio.Future] = {}
+
+    def _generation_key(self, namespace: str) -> str:
+        return f"{self.prefix}:gen:{namespace}"
+
+    async def _generation(self, namespace: str) -> int:
+        generation = self._generations.get(namespace)
+        if generation is None:
+            try:
+                generation = int(await self.backend.get(self._generation_key(namespace)) or 0)
+            except Exception:
+                cache_errors_total.inc()
+                logging.exception("Не удалось получить поколение кеша %s", namespace)
+                generation = 0
+            self._generations.set(namespace, generation)
+        return generation
+
+    async def make_key(self, namespaces: tuple[str, ...], *parts) -> str:
+        generations = [f"{ns}@{await self._generation(ns)}" for ns in namespaces]
+        return ":".join([self.prefix, *generations, *map(str, parts)])
+
+    async def get_or_load(
+        self,
+        namespaces: tuple[str, ...],
+        key_parts: tuple,
+        loader: Callable[[], Awaitable[Any]],
+        adapter: TypeAdapter,
+        ttl: int,
+    ):
+        key = await self.make_key(namespaces, *key_parts)
+
+        # L1 хранит готовые объекты, поэтому их не стоит изменять на месте
+        value = self.l1.get(key, _MISSING)
+        if value is not _MISSING:
+            cache_requests_total.labels(tier="l1", result="hit").inc()
+            return value
+        cache_requests_total.labels(tier="l1", result="miss").inc()
+
+        # Один загрузчик на ключ: остальные ждут его результата
+        while (in_flight := self._in_flight.get(key)) is not None:
+            try:
+                return await asyncio.shield(in_flight)
+            except _LoaderCancelled:
+                # Запрос загрузчика отменен (клиент ушел), а наш жив - загружаем сами
+                continue
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = future
+        try:
+            value = await self._load(key, namespaces[0], loader, adapter, ttl)
+        except asyncio.CancelledError:
+            # Не future.cancel(): иначе ждущие получили бы CancelledError в живых запросах
+            future.set_exception(_LoaderCancelled())
+            future.exception()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Исключение уже получит вызывающий, ждущих может не быть
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            return value
+        finally:
+            del self._in_flight[key]
+
+    async def _load(self, key, namespace, loader, adapter: TypeAdapter, ttl: int):
+        try:
+            raw = await self.backend.get(key)
+        except Exception:
+            cache_errors_total.inc()
+            logging.exception("Ошибка чтения из кеша, ключ %s", key)
+            raw = None
+
+        if raw is not None:
+            cache_requests_total.labels(tier="l2", result="hit").inc()
+            value = adapter.validate_json(raw)
+            self.l1.set(key, value, ttl)
+            return value
+        cache_requests_total.labels(tier="l2", result="miss").inc()
+
+        cache_loads_total.labels(namespace=namespace).inc()
+        value = await loader()
+        try:
+            await self.backend.set(key, adapter.dump_json(value), ttl)
+        except Exception:
+            cache_errors_total.inc()
+            logging.exception("Ошибка записи в кеш, ключ %s", key)
+        self.l1.set(key, value, ttl)
+        return value
+
+    async def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            try:
+                generation = await self.backend.incr(self._generation_key(namespace))
+            except Exception:
+                cache_errors_total.inc()
+                logging.exception("Не удалось инвалидировать кеш %s", namespace)
+                continue
+            # Ключи L1 со старым поколением больше не запрашиваются и уходят по TTL и LRU
+            self._generations.set(namespace, generation)
+
+    async def close(self):
+        await self.backend.close()
+
+
+_repository_cache: RepositoryCache | None = None
+
+
+def build_cache_backend() -> CacheBackend:
+    if settings.CACHE_BACKEND == "redis":
+        return RedisCacheBackend(settings.redis_url)
+    return InMemoryCacheBackend()
+
+
+def get_repository_cache() -> RepositoryCache:
+    global _repository_cache
+    if _repository_cache is None:
+        _repository_cache = RepositoryCache(
+            backend=build_cache_backend(),
+            key_version=settings.CACHE_KEY_VERSION,
+            l1_maxsize=settings.CACHE_L1_MAXSIZE,
+            l1_ttl=settings.CACHE_L1_TTL_SECONDS,
+        )
+    return _repository_cache
+
+
+def set_repository_cache(cache: RepositoryCache | None):
+    global _repository_cache
+    _repository_cache = cache
@@ -12,9 +12,33 @@ class Settings(BaseSettings):
     DB_PASS: str
     DB_NAME: str
 
+    # None - значение берется из профиля текущего MODE, см. src/core/db.py
+    DB_ECHO: bool | None = None
+    DB_POOL_SIZE: int | None = None
+    DB_MAX_OVERFLOW: int | None = None
+    DB_POOL_TIMEOUT: float | None = None
+    DB_POOL_RECYCLE: int | None = None
+    DB_POOL_PRE_PING: bool | None = None
+    DB_STATEMENT_TIMEOUT_MS: int | None = None
+    DB_PREPARED_STATEMENT_CACHE_SIZE: int | None = None
+    DB_CHATTY_REQUEST_THRESHOLD: int = 20
+
+    # Реплики для чтения (полные URL, JSON-список). Пусто - все идет на primary
+    DB_REPLICA_URLS: list[str] = []
+    DB_REPLICA_MAX_LAG_SECONDS: float = 10.0
+    DB_REPLICA_RETRY_SECONDS: float = 30.0
+    DB_REPLICA_HEALTH_INTERVAL_SECONDS: float = 5.0
+    # Сколько клиент читает с primary после своей записи
+    DB_READ_YOUR_WRITES_SECONDS: float = 5.0
+
     REDIS_HOST: str
     REDIS_PORT: int
 
+    CACHE_BACKEND: Literal["redis", "memory"] = "redis"
+    CACHE_KEY_VERSION: int = 1
+    CACHE_L1_MAXSIZE: int = 10_000
+    CACHE_L1_TTL_SECONDS: float = 5.0
+
     @property
     def redis_url(self) -> str:
         return f"redis://{self.REDIS_HOST}:{self.REDIS_PORT}"
@@ -23,9 +47,66 @@ class Settings(BaseSettings):
     def db_url(self) -> str:
         return f"postgresql+asyncpg://{self.DB_USER}:{self.DB_PASS}@{self.DB_HOST}:{self.DB_PORT}/{self.DB_NAME}"
 
+    STORAGE_BACKEND: Literal["local", "s3"] = "local"
+    STORAGE_LOCAL_ROOT: str = "storage"
+    STORAGE_S3_BUCKET: str = "books"
+    STORAGE_S3_ENDPOINT_URL: str | None = None
+    STORAGE_CHUNK_SIZE: int = 1024 * 1024
+    STORAGE_MAX_UPLOAD_BYTES: int = 200 * 1024 * 1024
+
+    TASK_BROKER: Literal["redis", "memory"] = "redis"
+    TASK_IDEMPOTENCY_TTL_SECONDS: int = 86_400
+    TASK_VISIBILITY_TIMEOUT_SECONDS: float = 300.0
+    # Очередь -> сколько задач из нее выполняется одновременно
+    TASK_QUEUE_CONCURRENCY: dict[str, int] = {"default": 4, "files": 2, "maintenance": 1, "feed": 2}
+    TASK_LOCAL_CONCURRENCY: int = 2
+
+    # Лента отзывов по избранным книгам, см. src/services/feed.py
+    FEED_BACKEND: Literal["redis", "memory"] = "redis"
+    # Длина ленты: более старые записи вытесняются
+    FEED_MAX_LENGTH: int = 500
+    FEED_TTL_SECONDS: int = 30 * 86_400
+    # У книг с большим числом фанатов отзывы не рассылаются, а подмешиваются при чтении
+    FEED_FANOUT_MAX_FANS: int = 10_000
+    FEED_FANOUT_CHUNK_SIZE: int = 1_000
+    FEED_HOT_BOOKS_LIMIT: int = 1_000
+
+    # Ответы больше этого размера в общий кеш ответов не попадают
+    HTTP_CACHE_MAX_BODY_BYTES: int = 1024 * 1024
+
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    SLOW_REQUEST_SECONDS: float = 1.0
+    # Доля медленных запросов, для которых пишется разбивка по SQL
+    SLOW_REQUEST_LOG_SAMPLE_RATE: float = 1.0
+
     JWT_SECRET_KEY: SecretStr
     JWT_ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
+    # Refresh-токен одноразовый: /auth/refresh выдает новую пару без argon2 и запроса пользователя
+    REFRESH_TOKEN_EXPIRE_DAYS: int = 30
+    TOKEN_CACHE_MAXSIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: int = 300
+
+    # Лимиты на вход проверяются до БД и argon2; счетчики общие для воркеров через Redis
+    RATE_LIMIT_BACKEND: Literal["redis", "memory"] = "redis"
+    LOGIN_RATE_LIMIT_PER_IP: int = 20
+    LOGIN_RATE_LIMIT_PER_EMAIL: int = 5
+    LOGIN_RATE_LIMIT_WINDOW_SECONDS: float = 60.0
+    LOGIN_EMAIL_FREE_FAILURES: int = 3
+    LOGIN_IP_FREE_FAILURES: int = 10
+    LOGIN_FAILURE_DELAY_SECONDS: float = 1.0
+    LOGIN_FAILURE_MAX_DELAY_SECONDS: float = 300.0
+    LOGIN_FAILURE_WINDOW_SECONDS: int = 900
+
+    # Прогрев при старте и остановка API, см. src/core/lifecycle.py
+    WARMUP_DB_CONNECTIONS: int = 5
+    WARMUP_RETRY_SECONDS: float = 2.0
+    SHUTDOWN_DRAIN_TIMEOUT_SECONDS: float = 10.0
+
+    PASSWORD_HASHER_EXECUTOR: Literal["thread", "process"] = "thread"
+    PASSWORD_HASHER_WORKERS: int = 4
+    PASSWORD_HASHER_MAX_QUEUE: int = 32
 
     model_config = SettingsConfigDict(env_file=".env")
 
@@ -0,0 +1,121 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Hashable, Iterable, Mapping, TypeVar
+
+from src.core.metrics import registry
+
+dataloader_batch_size = registry.histogram(
+    "dataloader_batch_size",
+    "Ключей в одном пакетном запросе загрузчика",
+    labelnames=("loader",),
+    buckets=(1, 2, 5, 10, 25, 50, 100, 250, 500, 1000),
+)
+
+LOADERS_INFO_KEY = "dataloaders"
+LOADERS_LOCK_INFO_KEY = "dataloaders_lock"
+
+K = TypeVar("K", bound=Hashable)
+V = TypeVar("V")
+
+
+class DataLoader(Generic[K, V]):
+    """Собирает load(key), вызванные в одном такте цикла событий, в один вызов
+    batch_load и запоминает результаты до clear().
+
+    batch_load получает список ключей и возвращает {key: value}; отсутствующие
+    ключи дают None. Ошибки не запоминаются: следующий load повторит запрос.
+    """
+
+    def __init__(
+        self,
+        batch_load: Callable[[list[K]], Awaitable[Mapping[K, V]]],
+        name: str = "default",
+        max_batch_size: int = 1000,
+        lock: asyncio.Lock | None = None,
+    ):
+        self.batch_load = batch_load
+        self.name = name
+        self.max_batch_size = max_batch_size
+        # Общий на сессию: AsyncSession не выполняет запросы параллельно
+        self.lock = lock or asyncio.Lock()
+        self._memo: dict[K, asyncio.Future] = {}
+        self._queue: list[tuple[K, asyncio.Future]] = []
+        self._batches: set[asyncio.Task] = set()
+
+    def _future(self, key: K) -> asyncio.Future:
+        future = self._memo.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = self._memo[key] = loop.create_future()
+            if not self._queue:
+                # Остальные задачи такта успеют добавить свои ключи до отправки
+                loop.call_soon(self._dispatch)
+            self._queue.append((key, future))
+        return future
+
+    async def load(self, key: K) -> V | None:
+        # shield: отмена одного ожидающего не должна отменять общий результат
+        return await asyncio.shield(self._future(key))
+
+    async def load_many(self, keys: Iterable[K]) -> list[V | None]:
+        return list(await asyncio.gather(*(asyncio.shield(self._future(key)) for key in keys)))
+
+    def prime(self, key: K, value: V):
+        if key not in self._memo:
+            future = self._memo[key] = asyncio.get_running_loop().create_future()
+            future.set_result(value)
+
+    def clear(self, key: K | None = None):
+        if key is None:
+            self._memo.clear()
+        else:
+            self._memo.pop(key, None)
+
+    def _dispatch(self):
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self.max_batch_size):
+            task = asyncio.ensure_future(self._run_batch(queue[start : start + self.max_batch_size]))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, batch: list[tuple[K, asyncio.Future]]):
+        dataloader_batch_size.labels(loader=self.name).observe(len(batch))
+        try:
+            async with self.lock:
+                values = await self.batch_load([key for key, _ in batch])
+        except BaseException as e:
+            for key, future in batch:
+                if self._memo.get(key) is future:
+                    del self._memo[key]
+                if not future.done():
+                    if isinstance(e, asyncio.CancelledError):
+                        future.cancel()
+                    else:
+                        future.set_exception(e)
+                        # Ошибку получат ожидающие, если они еще есть
+                        future.exception()
+            if not isinstance(e, Exception):
+                raise
+            return
+        for key, future in batch:
+            if not future.done():
+                future.set_result(values.get(key))
+
+
+def get_loader(session, name: str, batch_load: Callable, max_batch_size: int = 1000) -> DataLoader:
+    """Загрузчик живет в session.info: один на сессию (запрос) и пространство имен."""
+    loaders = session.info.setdefault(LOADERS_INFO_KEY, {})
+    loader = loaders.get(name)
+    if loader is None:
+        lock = session.info.setdefault(LOADERS_LOCK_INFO_KEY, asyncio.Lock())
+        loader = loaders[name] = DataLoader(batch_load, name=name, max_batch_size=max_batch_size, lock=lock)
+    return loader
+
+
+def clear_loaders(session, namespaces: Iterable[str]):
+    loaders = session.info.get(LOADERS_INFO_KEY)
+    if not loaders:
+        return
+    for namespace in namespaces:
+        loader = loaders.get(namespace)
+        if loader is not None:
+            loader.clear()
@@ -1,24 +1,282 @@
-from sqlalchemy import NullPool
-from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+import threading
+import time
+from typing import Any, Literal
+
+from sqlalchemy import NullPool, AsyncAdaptedQueuePool
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
 from src.core.config import settings
+from src.core.db_routing import ReplicaSet, RoutingSession
+from src.core.metrics import registry
+from src.core.query_stats import install_query_stats
 from sqlalchemy.orm import DeclarativeBase
 
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+pool_checkout_wait_seconds = registry.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Ожидание свободного соединения в пуле",
+    labelnames=("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 5.0, 30.0),
+)
+pool_checkout_timeouts_total = registry.counter(
+    "db_pool_checkout_timeouts_total",
+    "Не дождались соединения за pool_timeout",
+    labelnames=("engine",),
+)
+pool_size_gauge = registry.gauge("db_pool_size", "Размер пула", labelnames=("engine",))
+pool_checked_out_gauge = registry.gauge(
+    "db_pool_checked_out", "Соединения, выданные из пула", labelnames=("engine",)
+)
+pool_overflow_gauge = registry.gauge(
+    "db_pool_overflow", "Соединения сверх pool_size", labelnames=("engine",)
+)
+
+# Профили движка по режиму запуска. Любое значение можно переопределить через DB_* в .env
+ENGINE_PROFILES: dict[str, dict] = {
+    "TEST": {
+        "echo": False,
+        "pool_size": None,
+        "statement_timeout_ms": 5_000,
+        "prepared_statement_cache_size": 100,
+    },
+    "LOCAL": {
+        "echo": True,
+        "pool_size": 5,
+        "max_overflow": 5,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 30_000,
+        "prepared_statement_cache_size": 100,
+    },
+    "DEV": {
+        "echo": False,
+        "pool_size": 10,
+        "max_overflow": 10,
+        "pool_timeout": 10,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 15_000,
+        "prepared_statement_cache_size": 250,
+    },
+    "PROD": {
+        "echo": False,
+        "pool_size": 20,
+        "max_overflow": 10,
+        "pool_timeout": 5,
+        "pool_recycle": 1800,
+        "pool_pre_ping": True,
+        "statement_timeout_ms": 5_000,
+        "prepared_statement_cache_size": 500,
+    },
+}
+
+
+def get_engine_profile(mode: str = settings.MODE) -> dict:
+    profile = dict(ENGINE_PROFILES[mode])
+    overrides = {
+        "echo": settings.DB_ECHO,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT,
+        "pool_recycle": settings.DB_POOL_RECYCLE,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "statement_timeout_ms": settings.DB_STATEMENT_TIMEOUT_MS,
+        "prepared_statement_cache_size": settings.DB_PREPARED_STATEMENT_CACHE_SIZE,
+    }
+    profile.update({key: value for key, value in overrides.items() if value is not None})
+    return profile
+
+
+class InstrumentedAsyncQueuePool(AsyncAdaptedQueuePool):
+    @property
+    def engine_name(self) -> str:
+        # pool_logging_name переживает recreate() пула при engine.dispose()
+        return self._orig_logging_name or "primary"
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            pool_checkout_timeouts_total.labels(engine=self.engine_name).inc()
+            raise
+        finally:
+            pool_checkout_wait_seconds.labels(engine=self.engine_name).observe(
+                time.perf_counter() - started
+            )
+
+
+def build_engine_kwargs(profile: dict, engine_name: str = "primary") -> dict:
+    connect_args = {
+        "prepared_statement_cache_size": profile["prepared_statement_cache_size"],
+        "server_settings": {"statement_timeout": str(profile["statement_timeout_ms"])},
+    }
+    kwargs = {"echo": profile["echo"], "connect_args": connect_args}
+
+    if profile.get("pool_size") is None:
+        # Без пула: каждое соединение закрывается при возврате (тесты, скрипты)
+        kwargs["poolclass"] = NullPool
+        return kwargs
+
+    kwargs["poolclass"] = InstrumentedAsyncQueuePool
+    kwargs["pool_logging_name"] = engine_name
+    for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle", "pool_pre_ping"):
+        if key in profile:
+            kwargs[key] = profile[key]
+    return kwargs
+
+
+def instrument_pool(async_engine: AsyncEngine, engine_name: str = "primary"):
+    if not isinstance(async_engine.sync_engine.pool, InstrumentedAsyncQueuePool):
+        return
+    # Пул читается при каждом сборе метрик: dispose() подменяет его новым
+    pool_size_gauge.labels(engine=engine_name).set_function(
+        lambda: async_engine.sync_engine.pool.size()
+    )
+    pool_checked_out_gauge.labels(engine=engine_name).set_function(
+        lambda: async_engine.sync_engine.pool.checkedout()
+    )
+    pool_overflow_gauge.labels(engine=engine_name).set_function(
+        lambda: max(async_engine.sync_engine.pool.overflow(), 0)
+    )
+
+
+def create_engine_from_settings(url: str = settings.db_url, engine_name: str = "primary") -> AsyncEngine:
+    async_engine = create_async_engine(url, **build_engine_kwargs(get_engine_profile(), engine_name))
+    instrument_pool(async_engine, engine_name)
+    install_query_stats(async_engine.sync_engine)
+    return async_engine
+
+
+def get_pool_status(async_engine: AsyncEngine) -> dict:
+    pool = async_engine.sync_engine.pool
+    if not isinstance(pool, InstrumentedAsyncQueuePool):
+        return {"pool": type(pool).__name__}
+    return {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "overflow": max(pool.overflow(), 0),
+        "checked_in": pool.checkedin(),
+    }
+
+
+DatabaseRole = Literal["api", "worker"]
+
+_engines: dict[str, Any] = {}
+_engines_lock = threading.RLock()
+
+
+def _get_or_create(name: str, factory):
+    instance = _engines.get(name)
+    if instance is None:
+        with _engines_lock:
+            instance = _engines.get(name)
+            if instance is None:
+                instance = factory()
+                _engines[name] = instance
+    return instance
+
+
+def get_engine() -> AsyncEngine:
+    return _get_or_create("engine", create_engine_from_settings)
+
+
+def get_session_maker() -> async_sessionmaker:
+    # RoutingSession отправляет чтения на реплику, если DBManager ее назначил сессии
+    return _get_or_create(
+        "async_session_maker",
+        lambda: async_sessionmaker(
+            bind=get_engine(), sync_session_class=RoutingSession, expire_on_commit=False
+        ),
+    )
+
+
+def get_replica_set() -> ReplicaSet | None:
+    if not settings.DB_REPLICA_URLS:
+        return None
+    return _get_or_create(
+        "replica_set",
+        lambda: ReplicaSet(
+            {
+                f"replica{i}": create_engine_from_settings(url, engine_name=f"replica{i}")
+                for i, url in enumerate(settings.DB_REPLICA_URLS, start=1)
+            },
+            max_lag_seconds=settings.DB_REPLICA_MAX_LAG_SECONDS,
+            retry_seconds=settings.DB_REPLICA_RETRY_SECONDS,
+        ),
+    )
+
+
+def get_null_pool_session_maker() -> async_sessionmaker:
+    def factory():
+        null_pool_engine = create_async_engine(settings.db_url, poolclass=NullPool)
+        install_query_stats(null_pool_engine.sync_engine)
+        return async_sessionmaker(bind=null_pool_engine, expire_on_commit=False)
+
+    return _get_or_create("async_session_maker_null_pool", factory)
+
+
+# Синхронный движок нужен только фоновым воркерам (Celery), API его не создает
+def get_sync_engine():
+    from sqlalchemy import create_engine
+
+    return _get_or_create(
+        "sync_engine",
+        lambda: create_engine(settings.db_url.replace("asyncpg", "psycopg2"), pool_pre_ping=True),
+    )
+
+
+def get_sync_session_maker():
+    from sqlalchemy.orm import sessionmaker
+
+    return _get_or_create(
+        "sync_session_maker",
+        lambda: sessionmaker(autocommit=False, autoflush=False, bind=get_sync_engine()),
+    )
+
+
+def init_db(role: DatabaseRole = "api"):
+    # Вызывается из lifespan/старта воркера, чтобы не создавать движки на первом запросе
+    get_session_maker()
+    if role == "api":
+        get_replica_set()
+    if role == "worker":
+        get_sync_session_maker()
+
+
+async def dispose_db():
+    with _engines_lock:
+        engines = dict(_engines)
+        _engines.clear()
+    for name, instance in engines.items():
+        if name == "engine":
+            await instance.dispose()
+        elif name == "async_session_maker_null_pool":
+            await instance.kw["bind"].dispose()
+        elif name == "sync_engine":
+            instance.dispose()
+        elif name == "replica_set":
+            for replica in instance.replicas:
+                await replica.engine.dispose()
 
-# Создаем синхронный движок для Celery
-sync_engine = create_engine(settings.db_url.replace("asyncpg", "psycopg2"))
-SyncSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=sync_engine)
 
-db_params = {}
-if settings.MODE == "TEST":
-    db_params = {"poolclass": NullPool}
+_LAZY_ATTRIBUTES = {
+    "engine": get_engine,
+    "async_session_maker": get_session_maker,
+    "async_session_maker_null_pool": get_null_pool_session_maker,
+    "sync_engine": get_sync_engine,
+    "SyncSessionLocal": get_sync_session_maker,
+}
 
-engine = create_async_engine(settings.db_url, echo=True, **db_params)
 
-async_session_maker = async_sessionmaker(bind=engine, expire_on_commit=False)
-async_session_maker_null_pool = async_sessionmaker(bind=engine, expire_on_commit=False)
+def __getattr__(name: str):
+    # Старые имена модуля остаются доступны, но объекты создаются при первом обращении
+    factory = _LAZY_ATTRIBUTES.get(name)
+    if factory is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    return factory()
 
 
 class Base(DeclarativeBase):
-    pass
\ No newline at end of file
+    pass
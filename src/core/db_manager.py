@@ -1,27 +1,113 @@
+import logging
+
+from pydantic import BaseModel
+
+from src.core.config import settings
+from src.core.db_routing import REPLICA_INFO_KEY, WROTE_INFO_KEY, ReplicaSet, current_read_consistency
+from src.core.lifecycle import lifecycle
+from src.core.query_stats import QueryStats, current_query_stats, observe_request_stats
+from src.core.unit_of_work import UnitOfWork
 from src.repositories.books import BooksRepository
+from src.repositories.favorites import FavoritesRepository
+from src.repositories.mixins import flush_pending_invalidations
+from src.repositories.refresh_tokens import RefreshTokensRepository
+from src.repositories.reviews import ReviewsRepository
 from src.repositories.users import UsersRepository
 
 
 class DBManager:
-    def __init__(self, session_factory):
+    def __init__(self, session_factory, replicas: ReplicaSet | None = None):
         self.session_factory = session_factory
+        self.replicas = replicas
         self.session = None
+        self.uow: UnitOfWork | None = None
+        self.stats = QueryStats()
+        self._stats_token = None
 
     async def __aenter__(self):
         self.session = self.session_factory()
+        lifecycle.session_started()
+        self._route_reads()
+        self.uow = UnitOfWork(self.session)
+        self.stats = QueryStats(parent=current_query_stats.get())
+        self._stats_token = current_query_stats.set(self.stats)
 
         self.users = UsersRepository(self.session)
         self.books = BooksRepository(self.session)
+        self.reviews = ReviewsRepository(self.session)
+        self.ratings = self.reviews.ratings
+        self.favorites = FavoritesRepository(self.session)
+        self.refresh_tokens = RefreshTokensRepository(self.session)
 
         return self
 
+    def _route_reads(self):
+        if self.replicas is None:
+            return
+        consistency = current_read_consistency.get()
+        if consistency is not None and consistency.prefer_primary:
+            # Клиент недавно писал - реплика могла еще не догнать
+            return
+        replica = self.replicas.pick()
+        if replica is not None:
+            self.session.sync_session.info[REPLICA_INFO_KEY] = replica
+
     async def __aexit__(self, *args):
+        if self.uow is not None:
+            self.uow.discard()
         if self.session is not None:
-            await self.session.rollback()
-            await self.session.close()
+            try:
+                await self.session.rollback()
+                # Поколения, поднятые до отката, поднимаем еще раз: пока транзакция
+                # была открыта, другой запрос мог закешировать данные под новым поколением
+                await flush_pending_invalidations(self.session)
+                await self.session.close()
+            finally:
+                lifecycle.session_finished()
+        self._finish_stats()
+
+    def _finish_stats(self):
+        if self._stats_token is not None:
+            try:
+                current_query_stats.reset(self._stats_token)
+            except ValueError:
+                # Выход из зависимости мог произойти в другом контексте
+                current_query_stats.set(None)
+            self._stats_token = None
+
+        observe_request_stats(self.stats)
+        if self.stats.round_trips >= settings.DB_CHATTY_REQUEST_THRESHOLD:
+            logging.warning(
+                "Много обращений к БД за запрос: %d", self.stats.round_trips, extra={"db": self.stats.as_dict()}
+            )
+
+    def queue_insert(self, repository, data: BaseModel | dict):
+        self._require_session()
+        self.uow.register_insert(repository, data)
+
+    def queue_update(self, repository, data: BaseModel | dict, id: int):
+        self._require_session()
+        self.uow.register_update(repository, data, id)
+
+    async def flush(self):
+        self._require_session()
+        await self.uow.flush()
+
+    def savepoint(self):
+        self._require_session()
+        return self.uow.savepoint()
 
     async def commit(self):
-        if self.session is not None:
-            await self.session.commit()
-        else:
-            raise RuntimeError("Session is not initialized")
\ No newline at end of file
+        self._require_session()
+        await self.uow.flush()
+        # Флаг не сбрасывается: после коммита сессия по-прежнему читает с primary
+        wrote = self.session.sync_session.info.get(WROTE_INFO_KEY, False)
+        await self.session.commit()
+        await flush_pending_invalidations(self.session)
+        consistency = current_read_consistency.get()
+        if wrote and self.replicas is not None and consistency is not None:
+            consistency.wrote = True
+
+    def _require_session(self):
+        if self.session is None:
+            raise RuntimeError("Session is not initialized")
@@ -0,0 +1,206 @@
+import asyncio
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from http.cookies import SimpleCookie
+
+from sqlalchemy import CompoundSelect, Select, event, text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import Session
+
+from src.core.metrics import registry
+
+db_routed_statements_total = registry.counter(
+    "db_routed_statements_total", "Выражения по типу движка", labelnames=("target",)
+)
+db_replica_healthy = registry.gauge("db_replica_healthy", "Реплика доступна для чтения", labelnames=("replica",))
+db_replica_lag_seconds = registry.gauge("db_replica_lag_seconds", "Отставание реплики", labelnames=("replica",))
+
+REPLICA_INFO_KEY = "replica"
+WROTE_INFO_KEY = "wrote"
+PRIMARY_COOKIE = "db_primary_until"
+
+# Отставание реплики: 0, если это не реплика или все полученное уже применено
+_PG_LAG_QUERY = text(
+    "SELECT CASE WHEN NOT pg_is_in_recovery() OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() "
+    "THEN 0 ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+
+class Replica:
+    def __init__(self, name: str, engine: AsyncEngine):
+        self.name = name
+        self.engine = engine
+        self.unhealthy_until = 0.0
+        db_replica_healthy.labels(replica=name).set(1)
+
+    @property
+    def healthy(self) -> bool:
+        return self.unhealthy_until <= time.monotonic()
+
+
+class ReplicaSet:
+    """Реплики для чтения с пассивной (ошибки соединения) и активной (пинг, отставание)
+    проверкой здоровья. Больная реплика выводится из ротации на retry_seconds."""
+
+    def __init__(self, engines: dict[str, AsyncEngine], max_lag_seconds: float = 10.0, retry_seconds: float = 30.0):
+        self.replicas = [Replica(name, engine) for name, engine in engines.items()]
+        self.max_lag_seconds = max_lag_seconds
+        self.retry_seconds = retry_seconds
+        self._rotation = itertools.cycle(self.replicas) if self.replicas else None
+        for replica in self.replicas:
+            self._watch_errors(replica)
+
+    def _watch_errors(self, replica: Replica):
+        @event.listens_for(replica.engine.sync_engine, "handle_error")
+        def on_error(context):
+            if context.is_disconnect or isinstance(context.original_exception, (OSError, ConnectionError)):
+                self.mark_unhealthy(replica, repr(context.original_exception))
+
+    def mark_unhealthy(self, replica: Replica, reason: str):
+        if replica.healthy:
+            logging.warning("Реплика %s выведена из ротации: %s", replica.name, reason)
+        replica.unhealthy_until = time.monotonic() + self.retry_seconds
+        db_replica_healthy.labels(replica=replica.name).set(0)
+
+    def mark_healthy(self, replica: Replica):
+        if not replica.healthy:
+            logging.info("Реплика %s возвращена в ротацию", replica.name)
+        replica.unhealthy_until = 0.0
+        db_replica_healthy.labels(replica=replica.name).set(1)
+
+    def pick(self) -> Replica | None:
+        # Round-robin по здоровым; нет здоровых - читаем с primary
+        for _ in range(len(self.replicas)):
+            replica = next(self._rotation)
+            if replica.healthy:
+                return replica
+        return None
+
+    async def check(self, replica: Replica):
+        try:
+            async with replica.engine.connect() as conn:
+                if conn.dialect.name == "postgresql":
+                    lag = float(await conn.scalar(_PG_LAG_QUERY) or 0)
+                else:
+                    await conn.execute(text("SELECT 1"))
+                    lag = 0.0
+        except Exception as e:
+            self.mark_unhealthy(replica, repr(e))
+            return
+        db_replica_lag_seconds.labels(replica=replica.name).set(lag)
+        if lag > self.max_lag_seconds:
+            self.mark_unhealthy(replica, f"отставание {lag:.1f}с")
+        else:
+            self.mark_healthy(replica)
+
+    async def check_all(self):
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def run_health_checks(self, interval: float):
+        while True:
+            await self.check_all()
+            await asyncio.sleep(interval)
+
+
+# Чтения, результат которых уходит в общий кеш под текущим поколением:
+# отстающая реплика записала бы туда старые данные на весь TTL
+force_primary_reads: ContextVar[bool] = ContextVar("force_primary_reads", default=False)
+
+
+@contextmanager
+def read_from_primary():
+    token = force_primary_reads.set(True)
+    try:
+        yield
+    finally:
+        force_primary_reads.reset(token)
+
+
+def _is_read(clause) -> bool:
+    return isinstance(clause, (Select, CompoundSelect)) and clause._for_update_arg is None
+
+
+class RoutingSession(Session):
+    """Чтения - на реплику из session.info, все остальное - на primary.
+
+    После первой записи сессия до конца читает с primary: иначе она не увидит
+    собственных незакоммиченных изменений.
+    """
+
+    def get_bind(self, mapper=None, clause=None, **kw):
+        if self._flushing or not _is_read(clause):
+            self.info[WROTE_INFO_KEY] = True
+        replica: Replica | None = self.info.get(REPLICA_INFO_KEY)
+        if (
+            replica is not None
+            and not self.info.get(WROTE_INFO_KEY)
+            and not force_primary_reads.get()
+            and replica.healthy
+        ):
+            db_routed_statements_total.labels(target="replica").inc()
+            return replica.engine.sync_engine
+        db_routed_statements_total.labels(target="primary").inc()
+        return super().get_bind(mapper=mapper, clause=clause, **kw)
+
+
+class ReadConsistency:
+    """Состояние запроса: читать ли с primary и была ли запись (read-your-writes)."""
+
+    __slots__ = ("primary_until", "wrote")
+
+    def __init__(self, primary_until: float = 0.0):
+        self.primary_until = primary_until
+        self.wrote = False
+
+    @property
+    def prefer_primary(self) -> bool:
+        return self.primary_until > time.time()
+
+
+current_read_consistency: ContextVar[ReadConsistency | None] = ContextVar(
+    "current_read_consistency", default=None
+)
+
+
+def _primary_until_from_cookie(headers) -> float:
+    for name, value in headers:
+        if name == b"cookie":
+            morsel = SimpleCookie(value.decode("latin-1")).get(PRIMARY_COOKIE)
+            if morsel is not None:
+                try:
+                    return float(morsel.value)
+                except ValueError:
+                    return 0.0
+    return 0.0
+
+
+class ReadYourWritesMiddleware:
+    """После коммита клиент получает cookie и до ее истечения читает с primary,
+    пока реплики догоняют. Cookie, а не общий стор - работает между воркерами без Redis."""
+
+    def __init__(self, app, sticky_seconds: float = 5.0):
+        self.app = app
+        self.sticky_seconds = sticky_seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        consistency = ReadConsistency(_primary_until_from_cookie(scope["headers"]))
+        token = current_read_consistency.set(consistency)
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and consistency.wrote:
+                until = time.time() + self.sticky_seconds
+                cookie = f"{PRIMARY_COOKIE}={until:.3f}; Max-Age={int(self.sticky_seconds) or 1}; Path=/; HttpOnly"
+                message["headers"] = [*message.get("headers", []), (b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_read_consistency.reset(token)
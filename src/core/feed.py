@@ -0,0 +1,137 @@
+import bisect
+import time
+from collections import OrderedDict
+from typing import Iterable, Protocol
+
+from src.core.config import settings
+from src.core.metrics import registry
+
+feed_reviews_total = registry.counter(
+    "feed_reviews_total",
+    "Отзывы, разосланные по лентам: write - в ленты фанатов, read - подмешиваются при чтении",
+    labelnames=("mode",),
+)
+feed_deliveries_total = registry.counter("feed_deliveries_total", "Записи, добавленные в ленты пользователей")
+feed_read_sources = registry.histogram(
+    "feed_read_sources",
+    "Сколько лент читается для одной страницы ленты",
+    buckets=(1, 2, 5, 10, 25, 50, 100),
+)
+
+
+class TimelineStore(Protocol):
+    """Ленты - ограниченные по длине множества id, упорядоченные по убыванию score.
+
+    По умолчанию score - сам id; при обрезке до max_length уходят id с наименьшим score.
+    """
+
+    async def add(
+        self, keys: Iterable[str], item_id: int, max_length: int, ttl: int, score: int | None = None
+    ) -> None: ...
+
+    async def range_many(self, keys: list[str], before: int | None, limit: int) -> list[list[int]]: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemoryTimelineStore:
+    """Ленты одного процесса: для тестов и локального запуска."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        # key -> (истекает, (score, id) по возрастанию)
+        self._timelines: OrderedDict[str, tuple[float, list[tuple[int, int]]]] = OrderedDict()
+
+    def _get(self, key: str, now: float) -> list[tuple[int, int]]:
+        entry = self._timelines.get(key)
+        if entry is None:
+            return []
+        expires_at, items = entry
+        if expires_at <= now:
+            del self._timelines[key]
+            return []
+        return items
+
+    async def add(
+        self, keys: Iterable[str], item_id: int, max_length: int, ttl: int, score: int | None = None
+    ) -> None:
+        now = time.monotonic()
+        score = item_id if score is None else score
+        for key in keys:
+            # Как ZADD: повторное добавление только меняет score
+            items = [entry for entry in self._get(key, now) if entry[1] != item_id]
+            bisect.insort(items, (score, item_id))
+            del items[:-max_length]
+            self._timelines[key] = (now + ttl, items)
+            self._timelines.move_to_end(key)
+        while len(self._timelines) > self.maxsize:
+            self._timelines.popitem(last=False)
+
+    async def range_many(self, keys: list[str], before: int | None, limit: int) -> list[list[int]]:
+        now = time.monotonic()
+        pages = []
+        for key in keys:
+            items = self._get(key, now)
+            end = len(items) if before is None else bisect.bisect_left(items, (before,))
+            pages.append([item_id for _, item_id in items[max(end - limit, 0):end][::-1]])
+        return pages
+
+    async def close(self) -> None:
+        self._timelines.clear()
+
+
+class RedisTimelineStore:
+    """Лента - sorted set, score - id или переданный score. Запись и чтение - один pipeline на пачку ключей."""
+
+    def __init__(self, url: str, prefix: str = "feed"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def add(
+        self, keys: Iterable[str], item_id: int, max_length: int, ttl: int, score: int | None = None
+    ) -> None:
+        score = item_id if score is None else score
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                key = self._key(key)
+                pipe.zadd(key, {str(item_id): score})
+                pipe.zremrangebyrank(key, 0, -(max_length + 1))
+                pipe.expire(key, ttl)
+            await pipe.execute()
+
+    async def range_many(self, keys: list[str], before: int | None, limit: int) -> list[list[int]]:
+        upper = "+inf" if before is None else f"({before}"
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.zrevrangebyscore(self._key(key), upper, "-inf", start=0, num=limit)
+            pages = await pipe.execute()
+        return [[int(item) for item in page] for page in pages]
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+_timeline_store: TimelineStore | None = None
+
+
+def build_timeline_store() -> TimelineStore:
+    if settings.FEED_BACKEND == "redis":
+        return RedisTimelineStore(settings.redis_url)
+    return InMemoryTimelineStore()
+
+
+def get_timeline_store() -> TimelineStore:
+    global _timeline_store
+    if _timeline_store is None:
+        _timeline_store = build_timeline_store()
+    return _timeline_store
+
+
+def set_timeline_store(store: TimelineStore | None):
+    global _timeline_store
+    _timeline_store = store
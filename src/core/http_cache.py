@@ -0,0 +1,240 @@
+import hashlib
+import json
+import logging
+from http.cookies import SimpleCookie
+from typing import Callable
+from urllib.parse import parse_qsl
+
+from fastapi import HTTPException
+from starlette.routing import Match
+
+from src.core.cache import LocalTTLCache, cache_errors_total, get_repository_cache
+from src.core.config import settings
+from src.core.db_routing import read_from_primary
+from src.core.metrics import registry
+from src.utils.downloads import etag_matches
+
+http_cache_requests_total = registry.counter(
+    "http_cache_requests_total",
+    "Кеширование ответов: not_modified (304), hit, miss, bypass",
+    labelnames=("route", "result"),
+)
+
+# Пространства имен (таблицы), от которых зависит ответ: path-параметры и query -> кортеж
+NamespacesFactory = Callable[[dict, dict[str, list[str]]], tuple[str, ...]]
+
+
+class CachePolicy:
+    """Политика кеширования GET-маршрута.
+
+    ETag строится из поколений пространств имен, которые меняет любая запись
+    репозитория (BaseRepository._on_write), поэтому 304 отдается до вызова
+    эндпоинта: без запросов в БД и сериализации.
+
+    private - ответ зависит от пользователя (cookie access_token), хранится только у клиента.
+    shared - тело хранится в общем кеше и отдается всем с тем же ETag.
+    """
+
+    def __init__(
+        self,
+        namespaces: tuple[str, ...] | NamespacesFactory,
+        cache_control: str = "no-cache",
+        private: bool = False,
+        shared: bool = False,
+        ttl: int = 300,
+    ):
+        if private and shared:
+            raise ValueError("Персональные ответы нельзя класть в общий кеш")
+        self.namespaces = namespaces
+        self.cache_control = cache_control
+        self.private = private
+        self.shared = shared
+        self.ttl = ttl
+
+    def resolve_namespaces(self, path_params: dict, query: dict[str, list[str]]) -> tuple[str, ...]:
+        if callable(self.namespaces):
+            return self.namespaces(path_params, query)
+        return self.namespaces
+
+
+def cache_response(policy: CachePolicy):
+    """Помечает эндпоинт политикой, саму функцию не оборачивает (сигнатура нужна FastAPI)."""
+
+    def decorator(endpoint):
+        endpoint.cache_policy = policy
+        return endpoint
+
+    return decorator
+
+
+def _access_token(headers: dict[bytes, bytes]) -> str | None:
+    raw = headers.get(b"cookie")
+    if raw is None:
+        return None
+    morsel = SimpleCookie(raw.decode("latin-1")).get("access_token")
+    return morsel.value if morsel is not None else None
+
+
+async def _token_is_valid(token: str) -> bool:
+    # Импорт здесь: сервисы зависят от core, а не наоборот
+    from src.services.auth import AuthService
+
+    try:
+        await AuthService().get_token_claims(token)
+    except HTTPException:
+        return False
+    return True
+
+
+class ResponseCacheMiddleware:
+    """Условные GET и общий кеш ответов для маршрутов, помеченных cache_response."""
+
+    def __init__(self, app, max_body_bytes: int = settings.HTTP_CACHE_MAX_BODY_BYTES, l1_ttl: float = 5.0):
+        self.app = app
+        self.max_body_bytes = max_body_bytes
+        # Горячие публичные страницы отдаются из памяти процесса без похода в Redis
+        self.l1 = LocalTTLCache(maxsize=1_000, ttl=l1_ttl)
+
+    def _match(self, scope):
+        # Первый совпавший маршрут, как в роутере: /books/search не должен попасть в /books/{book_id}
+        for route in scope["app"].router.routes:
+            match, child_scope = route.matches(scope)
+            if match == Match.FULL:
+                policy = getattr(getattr(route, "endpoint", None), "cache_policy", None)
+                if policy is None:
+                    return None
+                return route, policy, child_scope.get("path_params", {})
+        return None
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or "app" not in scope:
+            await self.app(scope, receive, send)
+            return
+        matched = self._match(scope)
+        if matched is None:
+            await self.app(scope, receive, send)
+            return
+        route, policy, path_params = matched
+
+        headers = dict(scope["headers"])
+        query_string = scope.get("query_string", b"").decode("latin-1")
+        query: dict[str, list[str]] = {}
+        for name, value in parse_qsl(query_string, keep_blank_values=True):
+            query.setdefault(name, []).append(value)
+
+        key_parts = [scope["path"], json.dumps(sorted(query.items()), ensure_ascii=False)]
+        if policy.private:
+            token = _access_token(headers)
+            if token is None or not await _token_is_valid(token):
+                # Эндпоинт ответит 401, а 304 на истекший токен отдавать нельзя
+                http_cache_requests_total.labels(route=route.path, result="bypass").inc()
+                await self.app(scope, receive, send)
+                return
+            key_parts.append(hashlib.sha256(token.encode()).hexdigest())
+
+        repository_cache = get_repository_cache()
+        version_key = await repository_cache.make_key(
+            policy.resolve_namespaces(path_params, query), "http", *key_parts
+        )
+        etag = f'"{hashlib.sha256(version_key.encode()).hexdigest()[:32]}"'
+        response_headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", policy.cache_control.encode()),
+        ]
+        if policy.private:
+            response_headers.append((b"vary", b"Cookie"))
+
+        if_none_match = headers.get(b"if-none-match")
+        if etag_matches(if_none_match.decode("latin-1") if if_none_match else None, etag):
+            http_cache_requests_total.labels(route=route.path, result="not_modified").inc()
+            await send({"type": "http.response.start", "status": 304, "headers": response_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        if policy.shared:
+            cached = await self._get_shared(repository_cache, etag)
+            if cached is not None:
+                http_cache_requests_total.labels(route=route.path, result="hit").inc()
+                content_type, body = cached
+                await send({
+                    "type": "http.response.start",
+                    "status": 200,
+                    "headers": [
+                        *response_headers,
+                        (b"content-type", content_type),
+                        (b"content-length", str(len(body)).encode()),
+                    ],
+                })
+                await send({"type": "http.response.body", "body": body})
+                return
+
+        http_cache_requests_total.labels(route=route.path, result="miss").inc()
+        await self._call_and_store(scope, receive, send, policy, etag, response_headers, repository_cache)
+
+    async def _call_and_store(self, scope, receive, send, policy, etag, response_headers, repository_cache):
+        start_message = None
+        body = bytearray()
+        cacheable = True
+
+        async def send_wrapper(message):
+            nonlocal start_message, cacheable
+            if message["type"] == "http.response.start":
+                if message["status"] != 200:
+                    cacheable = False
+                    await send(message)
+                    return
+                message["headers"] = [*message.get("headers", []), *response_headers]
+                if not policy.shared:
+                    await send(message)
+                    return
+                start_message = message
+                return
+            if not policy.shared or not cacheable or start_message is None:
+                await send(message)
+                return
+            body.extend(message.get("body", b""))
+            if len(body) > self.max_body_bytes:
+                # Слишком большой ответ не кешируем - отдаем накопленное и дальше как есть
+                cacheable = False
+                await send(start_message)
+                await send({**message, "body": bytes(body)})
+                return
+            if not message.get("more_body", False):
+                await send(start_message)
+                await send({**message, "body": bytes(body)})
+                content_type = dict(start_message["headers"]).get(b"content-type", b"application/json")
+                await self._set_shared(repository_cache, etag, content_type, bytes(body), policy.ttl)
+
+        # ETag уже от нового поколения: тело с отстающей реплики закрепилось бы под ним
+        # в общем кеше и у клиента
+        with read_from_primary():
+            await self.app(scope, receive, send_wrapper)
+
+    def _shared_key(self, repository_cache, etag: str) -> str:
+        return f"{repository_cache.prefix}:http:{etag.strip(chr(34))}"
+
+    async def _get_shared(self, repository_cache, etag: str) -> tuple[bytes, bytes] | None:
+        key = self._shared_key(repository_cache, etag)
+        cached = self.l1.get(key)
+        if cached is not None:
+            return cached
+        try:
+            raw = await repository_cache.backend.get(key)
+        except Exception:
+            cache_errors_total.inc()
+            logging.exception("Ошибка чтения кеша ответов, ключ %s", key)
+            return None
+        if raw is None:
+            return None
+        content_type, _, body = raw.partition(b"\n")
+        self.l1.set(key, (content_type, body))
+        return content_type, body
+
+    async def _set_shared(self, repository_cache, etag: str, content_type: bytes, body: bytes, ttl: int):
+        key = self._shared_key(repository_cache, etag)
+        self.l1.set(key, (content_type, body))
+        try:
+            await repository_cache.backend.set(key, content_type + b"\n" + body, ttl)
+        except Exception:
+            cache_errors_total.inc()
+            logging.exception("Ошибка записи кеша ответов, ключ %s", key)
@@ -0,0 +1,154 @@
+import logging
+import random
+import time
+from contextvars import ContextVar
+
+from src.core.config import settings
+from src.core.metrics import registry
+from src.core.query_stats import QueryStats, current_query_stats
+
+REQUEST_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS = (0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100)
+
+http_requests_total = registry.counter(
+    "http_requests_total", "HTTP-запросы", labelnames=("method", "route", "status")
+)
+http_request_duration_seconds = registry.histogram(
+    "http_request_duration_seconds",
+    "Время обработки запроса, включая отправку тела",
+    labelnames=("method", "route"),
+    buckets=REQUEST_BUCKETS,
+)
+http_request_db_seconds = registry.histogram(
+    "http_request_db_seconds", "Время в БД за запрос", labelnames=("route",), buckets=REQUEST_BUCKETS
+)
+http_request_db_statements = registry.histogram(
+    "http_request_db_statements", "SQL-выражения за запрос", labelnames=("route",), buckets=COUNT_BUCKETS
+)
+http_request_phase_seconds = registry.histogram(
+    "http_request_phase_seconds",
+    "Время отдельных фаз запроса (хеширование, проверка токена)",
+    labelnames=("route", "phase"),
+    buckets=REQUEST_BUCKETS,
+)
+http_requests_in_progress = registry.gauge("http_requests_in_progress", "Запросы в обработке")
+cache_hit_ratio = registry.gauge("cache_hit_ratio", "Доля попаданий в кеш с момента старта", labelnames=("cache",))
+
+logger = logging.getLogger(__name__)
+
+
+class RequestTimings:
+    __slots__ = ("phases",)
+
+    def __init__(self):
+        self.phases: dict[str, float] = {}
+
+
+current_request_timings: ContextVar[RequestTimings | None] = ContextVar("current_request_timings", default=None)
+
+
+def record_timing(phase: str, seconds: float):
+    timings = current_request_timings.get()
+    if timings is not None:
+        timings.phases[phase] = timings.phases.get(phase, 0.0) + seconds
+
+
+def _hit_ratio(counter, **labels):
+    def compute() -> float:
+        hits = counter.labels(**labels, result="hit").value
+        misses = counter.labels(**labels, result="miss").value
+        total = hits + misses
+        return hits / total if total else 0.0
+
+    return compute
+
+
+def register_cache_ratios():
+    from src.core.cache import cache_requests_total
+    from src.utils.token_cache import token_cache_requests_total
+
+    cache_hit_ratio.labels(cache="repository_l1").set_function(_hit_ratio(cache_requests_total, tier="l1"))
+    cache_hit_ratio.labels(cache="repository_l2").set_function(_hit_ratio(cache_requests_total, tier="l2"))
+    cache_hit_ratio.labels(cache="token_claims").set_function(_hit_ratio(token_cache_requests_total))
+
+
+class InstrumentationMiddleware:
+    """ASGI-middleware: латентность по шаблону маршрута, время и число запросов к БД,
+    фазы запроса и выборочный лог медленных запросов с разбивкой по SQL."""
+
+    def __init__(
+        self,
+        app,
+        slow_request_seconds: float = settings.SLOW_REQUEST_SECONDS,
+        slow_request_sample_rate: float = settings.SLOW_REQUEST_LOG_SAMPLE_RATE,
+    ):
+        self.app = app
+        self.slow_request_seconds = slow_request_seconds
+        self.slow_request_sample_rate = slow_request_sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = QueryStats(parent=current_query_stats.get(), track_statements=True)
+        stats_token = current_query_stats.set(stats)
+        timings = RequestTimings()
+        timings_token = current_request_timings.set(timings)
+        status_code = 500
+
+        async def send_wrapper(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        http_requests_in_progress.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            http_requests_in_progress.dec()
+            current_query_stats.reset(stats_token)
+            current_request_timings.reset(timings_token)
+            self._observe(scope, status_code, elapsed, stats, timings)
+
+    def _observe(self, scope, status_code: int, elapsed: float, stats: QueryStats, timings: RequestTimings):
+        # Шаблон пути, а не сам путь: иначе /books/1, /books/2... дадут бесконечно много рядов.
+        # Служебные маршруты Starlette (/docs, /openapi.json) шаблона не оставляют, но и параметров не имеют
+        route = scope.get("route")
+        if route is not None:
+            route_path = route.path
+        elif "endpoint" in scope:
+            route_path = scope["path"]
+        else:
+            route_path = "unmatched"
+        method = scope["method"]
+
+        http_requests_total.labels(method=method, route=route_path, status=status_code).inc()
+        http_request_duration_seconds.labels(method=method, route=route_path).observe(elapsed)
+        if stats.round_trips:
+            http_request_db_seconds.labels(route=route_path).observe(stats.db_time)
+            http_request_db_statements.labels(route=route_path).observe(stats.statements)
+        for phase, seconds in timings.phases.items():
+            http_request_phase_seconds.labels(route=route_path, phase=phase).observe(seconds)
+
+        if elapsed >= self.slow_request_seconds and random.random() < self.slow_request_sample_rate:
+            logger.warning(
+                "Медленный запрос %s %s: %.3fs, БД %.3fs в %d выражениях",
+                method,
+                route_path,
+                elapsed,
+                stats.db_time,
+                stats.statements,
+                extra={
+                    "route": route_path,
+                    "method": method,
+                    "status": status_code,
+                    "duration": round(elapsed, 6),
+                    "db": stats.as_dict(),
+                    "phases": {phase: round(seconds, 6) for phase, seconds in timings.phases.items()},
+                    "top_statements": stats.top_statements(),
+                },
+            )
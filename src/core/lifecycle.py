@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable
+
+from pydantic import BaseModel
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.orm import configure_mappers
+
+from src.core.cache import get_repository_cache
+from src.core.db_routing import ReplicaSet
+from src.core.metrics import registry
+
+app_ready = registry.gauge("app_ready", "API прогрето и принимает трафик")
+db_sessions_active = registry.gauge("db_sessions_active", "Открытые сессии DBManager")
+warmup_step_seconds = registry.histogram(
+    "app_warmup_step_seconds",
+    "Длительность шагов прогрева при старте",
+    labelnames=("step",),
+    buckets=(0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0),
+)
+
+
+def warm_mappers():
+    # Конфигурация связей UserModel/BookModel и кеши DataMapper - иначе на первом запросе
+    from src.repositories.mappers.base import DataMapper
+    from src.repositories.mappers import mappers  # noqa: F401
+    from src.repositories.mixins import _adapter
+
+    configure_mappers()
+    pending = list(DataMapper.__subclasses__())
+    while pending:
+        mapper = pending.pop()
+        pending.extend(mapper.__subclasses__())
+        mapper._column_accessor()
+        mapper._relationship_adapters()
+        # Адаптер, которым CachedRepositoryMixin читает и пишет кеш
+        _adapter(mapper.schema | None)
+
+
+def warm_schemas():
+    from src.schemas.books import Book
+    from src.schemas.pagination import CursorPage, KeysetPage
+    from src.schemas.reviews import Review
+
+    # Параметризованные generic-модели собираются при первом обращении
+    for page in (KeysetPage[Book], CursorPage[Book], CursorPage[Review]):
+        page.model_rebuild()
+    pending = list(BaseModel.__subclasses__())
+    while pending:
+        model = pending.pop()
+        pending.extend(model.__subclasses__())
+        if model.__module__.startswith("src.") and not model.__pydantic_complete__:
+            model.model_rebuild()
+
+
+async def warm_db_pool(engine: AsyncEngine, connections: int, replicas: ReplicaSet | None = None):
+    async def ping():
+        async with engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    # Параллельно - чтобы в пуле оказалось connections соединений, а не одно
+    await asyncio.gather(*(ping() for _ in range(connections)))
+    if replicas is not None:
+        await replicas.check_all()
+
+
+async def warm_caches(namespaces: tuple[str, ...] = ("books", "users", "reviews", "favorite_books")):
+    # Соединение с Redis и поколения самых читаемых таблиц в L1
+    await get_repository_cache().make_key(namespaces)
+
+
+class Lifecycle:
+    """Готовность API: ready после прогрева, draining с начала остановки.
+
+    Считает открытые сессии DBManager, чтобы остановка дождалась их закрытия
+    перед dispose пулов.
+    """
+
+    def __init__(self):
+        self.ready = False
+        self.draining = False
+        self.active_sessions = 0
+
+    @property
+    def accepting(self) -> bool:
+        return self.ready and not self.draining
+
+    def session_started(self):
+        self.active_sessions += 1
+        db_sessions_active.inc()
+
+    def session_finished(self):
+        self.active_sessions -= 1
+        db_sessions_active.dec()
+
+    async def _step(self, name: str, func: Callable[[], Awaitable | None]):
+        started = time.perf_counter()
+        result = func()
+        if result is not None:
+            await result
+        took = time.perf_counter() - started
+        warmup_step_seconds.labels(step=name).observe(took)
+        logging.info("Прогрев %s: %.3fs", name, took)
+
+    async def warm_up(
+        self,
+        engine: AsyncEngine,
+        replicas: ReplicaSet | None = None,
+        password_hasher=None,
+        db_connections: int = 5,
+        retry_seconds: float = 2.0,
+    ):
+        await self._step("mappers", warm_mappers)
+        await self._step("schemas", warm_schemas)
+        if password_hasher is not None:
+            await self._step("password_hasher", password_hasher.warm_up)
+        # Без БД трафик принимать бессмысленно: повторяем, пока не получится
+        while True:
+            try:
+                await self._step("db_pool", lambda: warm_db_pool(engine, db_connections, replicas))
+                break
+            except Exception as e:
+                logging.warning("Прогрев пула БД не удался, повтор через %.1fs: %s", retry_seconds, e)
+                await asyncio.sleep(retry_seconds)
+        try:
+            await self._step("caches", warm_caches)
+        except Exception:
+            # Кеш ходит в БД при недоступности Redis - готовность от него не зависит
+            logging.exception("Прогрев кеша не удался")
+        self.ready = True
+        app_ready.set(1)
+        logging.info("API прогрето и готово принимать запросы")
+
+    def start_draining(self):
+        self.draining = True
+        app_ready.set(0)
+
+    async def wait_for_sessions(self, timeout: float, poll_interval: float = 0.05) -> bool:
+        deadline = time.monotonic() + timeout
+        while self.active_sessions > 0:
+            if time.monotonic() >= deadline:
+                logging.warning("Остановка: не дождались закрытия %d сессий БД", self.active_sessions)
+                return False
+            await asyncio.sleep(poll_interval)
+        return True
+
+
+lifecycle = Lifecycle()
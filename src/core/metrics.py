@@ -0,0 +1,189 @@
+import math
+import threading
+from bisect import bisect_left
+
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labelnames: tuple[str, ...] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+        self._children: dict[tuple[str, ...], "_Metric"] = {}
+
+    def labels(self, **labels):
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"Ожидались метки {self.labelnames}, получено {tuple(labels)}")
+        key = tuple(str(labels[name]) for name in self.labelnames)
+        with self._lock:
+            child = self._children.get(key)
+            if child is None:
+                child = self._new_child()
+                self._children[key] = child
+            return child
+
+    def _new_child(self):
+        return type(self)(self.name, self.documentation)
+
+    def samples(self):
+        if not self.labelnames:
+            yield (), self
+            return
+        with self._lock:
+            children = list(self._children.items())
+        for key, child in children:
+            yield tuple(zip(self.labelnames, key)), child
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self.value += amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._value = 0.0
+        self._function = None
+
+    @property
+    def value(self) -> float:
+        if self._function is not None:
+            return float(self._function())
+        return self._value
+
+    def set(self, value: float):
+        with self._lock:
+            self._value = value
+
+    def set_function(self, function):
+        # Значение вычисляется в момент чтения, например размер пула соединений
+        self._function = function
+
+    def inc(self, amount: float = 1.0):
+        with self._lock:
+            self._value += amount
+
+    def dec(self, amount: float = 1.0):
+        with self._lock:
+            self._value -= amount
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        self.bucket_counts = [0] * (len(self.buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def _new_child(self):
+        return Histogram(self.name, self.documentation, buckets=self.buckets)
+
+    def observe(self, value: float):
+        with self._lock:
+            self.bucket_counts[bisect_left(self.buckets, value)] += 1
+            self.count += 1
+            self.sum += value
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._metrics: dict[str, _Metric] = {}
+
+    def _get_or_create(self, cls, name, documentation, labelnames, **kwargs):
+        with self._lock:
+            metric = self._metrics.get(name)
+            if metric is None:
+                metric = cls(name, documentation, labelnames, **kwargs)
+                self._metrics[name] = metric
+            elif not isinstance(metric, cls):
+                raise ValueError(f"Метрика {name} уже зарегистрирована как {metric.kind}")
+            return metric
+
+    def counter(self, name: str, documentation: str, labelnames=()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames=()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    def get(self, name: str) -> _Metric | None:
+        return self._metrics.get(name)
+
+    def collect(self) -> list[_Metric]:
+        with self._lock:
+            return list(self._metrics.values())
+
+
+registry = MetricsRegistry()
+
+
+PROMETHEUS_CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(labels) -> str:
+    if not labels:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in labels) + "}"
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return "+Inf" if value > 0 else "-Inf"
+    if math.isnan(value):
+        return "NaN"
+    return repr(float(value))
+
+
+def render_prometheus(metrics_registry: MetricsRegistry = registry) -> str:
+    """Текстовый формат экспозиции Prometheus 0.0.4."""
+    lines = []
+    for metric in metrics_registry.collect():
+        documentation = metric.documentation.replace("\\", "\\\\").replace("\n", "\\n")
+        lines.append(f"# HELP {metric.name} {documentation}")
+        lines.append(f"# TYPE {metric.name} {metric.kind}")
+        for labels, sample in metric.samples():
+            if isinstance(sample, Histogram):
+                with sample._lock:
+                    counts = list(sample.bucket_counts)
+                    count, total = sample.count, sample.sum
+                cumulative = 0
+                for bound, bucket_count in zip((*sample.buckets, math.inf), counts):
+                    cumulative += bucket_count
+                    bucket_labels = _format_labels((*labels, ("le", _format_value(bound))))
+                    lines.append(f"{metric.name}_bucket{bucket_labels} {cumulative}")
+                lines.append(f"{metric.name}_sum{_format_labels(labels)} {_format_value(total)}")
+                lines.append(f"{metric.name}_count{_format_labels(labels)} {count}")
+            else:
+                try:
+                    value = sample.value
+                except Exception:
+                    # Значение из set_function недоступно (например, пул уже закрыт)
+                    continue
+                suffix = "_total" if metric.kind == "counter" and not metric.name.endswith("_total") else ""
+                lines.append(f"{metric.name}{suffix}{_format_labels(labels)} {_format_value(value)}")
+    return "\n".join(lines) + "\n"
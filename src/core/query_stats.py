@@ -0,0 +1,131 @@
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Iterator
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.core.metrics import registry
+
+statements_per_request = registry.histogram(
+    "db_statements_per_request",
+    "SQL-выражения за один DBManager",
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+round_trips_per_request = registry.histogram(
+    "db_round_trips_per_request",
+    "Обращения к БД (execute, begin, commit, rollback) за один DBManager",
+    buckets=(1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+
+
+class QueryStats:
+    __slots__ = ("statements", "round_trips", "db_time", "parent", "breakdown", "_started")
+
+    # Сколько разных SQL запоминать для разбивки по выражениям
+    MAX_BREAKDOWN_STATEMENTS = 50
+
+    def __init__(self, parent: "QueryStats | None" = None, track_statements: bool = False):
+        self.statements = 0
+        self.round_trips = 0
+        self.db_time = 0.0
+        # Внешний счетчик (например, capture_queries) видит и вложенные DBManager
+        self.parent = parent
+        # SQL -> [вызовов, время]; включается для запроса целиком, см. InstrumentationMiddleware
+        self.breakdown: dict[str, list] | None = {} if track_statements else None
+        self._started: list[float] = []
+
+    def record_statement(self, statement: str, elapsed: float):
+        entry = self.breakdown.get(statement)
+        if entry is None:
+            if len(self.breakdown) >= self.MAX_BREAKDOWN_STATEMENTS:
+                return
+            entry = self.breakdown[statement] = [0, 0.0]
+        entry[0] += 1
+        entry[1] += elapsed
+
+    def top_statements(self, limit: int = 5) -> list[dict]:
+        if not self.breakdown:
+            return []
+        items = sorted(self.breakdown.items(), key=lambda item: item[1][1], reverse=True)[:limit]
+        return [
+            {"sql": statement[:500], "calls": calls, "time": round(elapsed, 6)}
+            for statement, (calls, elapsed) in items
+        ]
+
+    def chain(self) -> Iterator["QueryStats"]:
+        stats = self
+        while stats is not None:
+            yield stats
+            stats = stats.parent
+
+    def as_dict(self) -> dict:
+        return {
+            "statements": self.statements,
+            "round_trips": self.round_trips,
+            "db_time": round(self.db_time, 6),
+        }
+
+
+current_query_stats: ContextVar[QueryStats | None] = ContextVar("current_query_stats", default=None)
+
+
+def _before_execute(conn, clauseelement, multiparams, params, execution_options):
+    stats = current_query_stats.get()
+    if stats is not None:
+        for item in stats.chain():
+            item.statements += 1
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is not None:
+        # executemany с insertmanyvalues вызывает событие на каждый пакет
+        for item in stats.chain():
+            item.round_trips += 1
+        stats._started.append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    stats = current_query_stats.get()
+    if stats is not None and stats._started:
+        elapsed = time.perf_counter() - stats._started.pop()
+        for item in stats.chain():
+            item.db_time += elapsed
+            if item.breakdown is not None:
+                item.record_statement(statement, elapsed)
+
+
+def _transaction_event(conn):
+    stats = current_query_stats.get()
+    if stats is not None:
+        for item in stats.chain():
+            item.round_trips += 1
+
+
+def install_query_stats(engine: Engine):
+    if event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        return
+    event.listen(engine, "before_execute", _before_execute)
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    for name in ("begin", "commit", "rollback"):
+        event.listen(engine, name, _transaction_event)
+
+
+@contextmanager
+def capture_queries() -> Iterator[QueryStats]:
+    """Считает запросы внутри блока, включая открытые в нем DBManager."""
+    stats = QueryStats(parent=current_query_stats.get())
+    token = current_query_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        current_query_stats.reset(token)
+
+
+def observe_request_stats(stats: QueryStats):
+    if stats.round_trips:
+        statements_per_request.observe(stats.statements)
+        round_trips_per_request.observe(stats.round_trips)
@@ -0,0 +1,272 @@
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Protocol
+
+from src.core.config import settings
+from src.core.metrics import registry
+from src.exceptions import TooManyLoginAttemptsException
+
+login_rate_limited_total = registry.counter(
+    "login_rate_limited_total",
+    "Попытки входа, отклоненные до проверки пароля",
+    labelnames=("reason",),
+)
+login_failures_total = registry.counter("login_failures_total", "Неудачные попытки входа")
+rate_limit_errors_total = registry.counter(
+    "rate_limit_backend_errors_total", "Ошибки хранилища счетчиков лимитера"
+)
+
+
+class RateLimitBackend(Protocol):
+    async def take(self, key: str, capacity: int, per_second: float) -> float: ...
+
+    async def incr(self, key: str, ttl: int) -> int: ...
+
+    async def lock(self, key: str, seconds: float) -> None: ...
+
+    async def locked_for(self, *keys: str) -> float: ...
+
+    async def delete(self, *keys: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemoryRateLimitBackend:
+    """Счетчики одного процесса. Для нескольких воркеров uvicorn нужен Redis."""
+
+    def __init__(self, maxsize: int = 100_000):
+        self.maxsize = maxsize
+        # key -> (истекает, значение): корзина (tokens, ts), счетчик или блокировка
+        self._entries: OrderedDict[str, tuple[float, object]] = OrderedDict()
+
+    def _get(self, key: str, now: float):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        return value
+
+    def _set(self, key: str, value, expires_at: float):
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    async def take(self, key: str, capacity: int, per_second: float) -> float:
+        now = time.monotonic()
+        tokens, updated_at = self._get(key, now) or (capacity, now)
+        tokens = min(capacity, tokens + (now - updated_at) * per_second)
+        retry_after = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            retry_after = (1 - tokens) / per_second
+        self._set(key, (tokens, now), now + capacity / per_second)
+        return retry_after
+
+    async def incr(self, key: str, ttl: int) -> int:
+        now = time.monotonic()
+        value = (self._get(key, now) or 0) + 1
+        self._set(key, value, now + ttl)
+        return value
+
+    async def lock(self, key: str, seconds: float) -> None:
+        now = time.monotonic()
+        self._set(key, True, now + seconds)
+
+    async def locked_for(self, *keys: str) -> float:
+        now = time.monotonic()
+        remaining = 0.0
+        for key in keys:
+            if self._get(key, now) is not None:
+                remaining = max(remaining, self._entries[key][0] - now)
+        return remaining
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self._entries.pop(key, None)
+
+    async def close(self) -> None:
+        self._entries.clear()
+
+
+# Token bucket: время берется из Redis, чтобы часы воркеров на разных хостах не влияли.
+# Возвращает строку - целые числа Lua обрезал бы дробную часть ожидания
+_TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local state = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local updated_at = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(now - updated_at, 0) * rate)
+local retry_after = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    retry_after = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', KEYS[1], math.ceil(capacity / rate * 1000))
+return tostring(retry_after)
+"""
+
+
+class RedisRateLimitBackend:
+    def __init__(self, url: str, prefix: str = "ratelimit"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._take = self.client.register_script(_TAKE_SCRIPT)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}:{key}"
+
+    async def take(self, key: str, capacity: int, per_second: float) -> float:
+        return float(await self._take(keys=[self._key(key)], args=[capacity, per_second]))
+
+    async def incr(self, key: str, ttl: int) -> int:
+        async with self.client.pipeline(transaction=True) as pipe:
+            pipe.incr(self._key(key))
+            pipe.expire(self._key(key), ttl)
+            value, _ = await pipe.execute()
+        return value
+
+    async def lock(self, key: str, seconds: float) -> None:
+        await self.client.set(self._key(key), 1, px=max(math.ceil(seconds * 1000), 1))
+
+    async def locked_for(self, *keys: str) -> float:
+        async with self.client.pipeline(transaction=False) as pipe:
+            for key in keys:
+                pipe.pttl(self._key(key))
+            ttls = await pipe.execute()
+        return max((ttl / 1000 for ttl in ttls if ttl > 0), default=0.0)
+
+    async def delete(self, *keys: str) -> None:
+        await self.client.delete(*(self._key(key) for key in keys))
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class LoginRateLimiter:
+    """Ограничение попыток входа по IP и по email.
+
+    check() вызывается до похода в БД и argon2: блокировка после неудач и
+    token bucket на IP/email. Каждая неудача сверх бесплатных удваивает паузу.
+    Хранилище недоступно - пропускаем запрос, вход важнее защиты.
+    """
+
+    def __init__(
+        self,
+        backend: RateLimitBackend,
+        ip_limit: int = 20,
+        email_limit: int = 5,
+        window_seconds: float = 60.0,
+        email_free_failures: int = 3,
+        ip_free_failures: int = 10,
+        failure_delay_seconds: float = 1.0,
+        max_failure_delay_seconds: float = 300.0,
+        failure_window_seconds: int = 900,
+    ):
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+        self.window_seconds = window_seconds
+        self.email_free_failures = email_free_failures
+        self.ip_free_failures = ip_free_failures
+        self.failure_delay_seconds = failure_delay_seconds
+        self.max_failure_delay_seconds = max_failure_delay_seconds
+        self.failure_window_seconds = failure_window_seconds
+
+    @staticmethod
+    def _subjects(ip: str | None, email: str) -> list[tuple[str, str]]:
+        subjects = [("email", email.strip().lower())]
+        if ip:
+            subjects.append(("ip", ip))
+        return subjects
+
+    def failure_delay(self, failures: int, free_failures: int) -> float:
+        if failures <= free_failures:
+            return 0.0
+        delay = self.failure_delay_seconds * 2 ** (failures - free_failures - 1)
+        return min(delay, self.max_failure_delay_seconds)
+
+    async def check(self, ip: str | None, email: str):
+        subjects = self._subjects(ip, email)
+        try:
+            locked_for = await self.backend.locked_for(*(f"lock:{kind}:{value}" for kind, value in subjects))
+            if locked_for > 0:
+                login_rate_limited_total.labels(reason="failures").inc()
+                raise TooManyLoginAttemptsException(retry_after=locked_for)
+            for kind, value in subjects:
+                limit = self.ip_limit if kind == "ip" else self.email_limit
+                retry_after = await self.backend.take(f"bucket:{kind}:{value}", limit, limit / self.window_seconds)
+                if retry_after > 0:
+                    login_rate_limited_total.labels(reason=kind).inc()
+                    raise TooManyLoginAttemptsException(retry_after=retry_after)
+        except TooManyLoginAttemptsException:
+            raise
+        except Exception as e:
+            rate_limit_errors_total.inc()
+            logging.warning("Лимитер входа недоступен, пропускаем проверку: %s", e)
+
+    async def register_failure(self, ip: str | None, email: str):
+        login_failures_total.inc()
+        try:
+            for kind, value in self._subjects(ip, email):
+                failures = await self.backend.incr(f"failures:{kind}:{value}", self.failure_window_seconds)
+                free_failures = self.ip_free_failures if kind == "ip" else self.email_free_failures
+                delay = self.failure_delay(failures, free_failures)
+                if delay:
+                    await self.backend.lock(f"lock:{kind}:{value}", delay)
+        except Exception as e:
+            rate_limit_errors_total.inc()
+            logging.warning("Не удалось записать неудачный вход: %s", e)
+
+    async def reset(self, email: str):
+        # Успешный вход снимает штраф с почты, но не с IP: подбор по многим почтам продолжает копиться
+        value = email.strip().lower()
+        try:
+            await self.backend.delete(f"failures:email:{value}", f"lock:email:{value}")
+        except Exception as e:
+            rate_limit_errors_total.inc()
+            logging.warning("Не удалось сбросить счетчик неудачных входов: %s", e)
+
+
+_login_rate_limiter: LoginRateLimiter | None = None
+
+
+def build_rate_limit_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        return RedisRateLimitBackend(settings.redis_url)
+    return InMemoryRateLimitBackend()
+
+
+def get_login_rate_limiter() -> LoginRateLimiter:
+    global _login_rate_limiter
+    if _login_rate_limiter is None:
+        _login_rate_limiter = LoginRateLimiter(
+            backend=build_rate_limit_backend(),
+            ip_limit=settings.LOGIN_RATE_LIMIT_PER_IP,
+            email_limit=settings.LOGIN_RATE_LIMIT_PER_EMAIL,
+            window_seconds=settings.LOGIN_RATE_LIMIT_WINDOW_SECONDS,
+            email_free_failures=settings.LOGIN_EMAIL_FREE_FAILURES,
+            ip_free_failures=settings.LOGIN_IP_FREE_FAILURES,
+            failure_delay_seconds=settings.LOGIN_FAILURE_DELAY_SECONDS,
+            max_failure_delay_seconds=settings.LOGIN_FAILURE_MAX_DELAY_SECONDS,
+            failure_window_seconds=settings.LOGIN_FAILURE_WINDOW_SECONDS,
+        )
+    return _login_rate_limiter
+
+
+def set_login_rate_limiter(limiter: LoginRateLimiter | None):
+    global _login_rate_limiter
+    _login_rate_limiter = limiter
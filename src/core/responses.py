@@ -0,0 +1,92 @@
+import functools
+import inspect
+from typing import Any
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.routing import APIRoute
+from fastapi.utils import is_body_allowed_for_status_code
+from pydantic import TypeAdapter
+from pydantic_core import to_json
+from starlette.responses import JSONResponse, Response
+
+
+class FastJSONResponse(JSONResponse):
+    """JSON через сериализатор pydantic-core: модели, списки моделей и словари
+    кодируются в байты за один проход, без jsonable_encoder и json.dumps."""
+
+    def render(self, content: Any) -> bytes:
+        # inf_nan_mode="null": стандартный JSONResponse на NaN падает, невалидный JSON не отдаем
+        return to_json(content, inf_nan_mode="null", fallback=jsonable_encoder)
+
+
+class FastJSONRoute(APIRoute):
+    """Маршрут, который сам сериализует результат эндпоинта, если класс ответа -
+    FastJSONResponse (его задает default_response_class приложения, см. src/main.py).
+
+    FastAPI прогоняет возвращаемое значение через jsonable_encoder, а при
+    response_model еще и валидирует заново. Здесь экземпляр response_model
+    сериализуется как есть, остальное - без промежуточного dict.
+    """
+
+    def get_route_handler(self):
+        call = self.dependant.call
+        if (
+            self._response_class_is_fast()
+            and inspect.iscoroutinefunction(call)
+            and not getattr(call, "renders_response", False)
+        ):
+            self.dependant.call = self._render_directly(call)
+        return super().get_route_handler()
+
+    def _response_class_is_fast(self) -> bool:
+        response_class = getattr(self.response_class, "value", self.response_class)
+        return isinstance(response_class, type) and issubclass(response_class, FastJSONResponse)
+
+    def _response_adapter(self) -> TypeAdapter | None:
+        if self.response_model is None:
+            return None
+        return TypeAdapter(self.response_model)
+
+    def _render_directly(self, call):
+        adapter = self._response_adapter()
+        response_model = self.response_model
+        response_class = getattr(self.response_class, "value", self.response_class)
+        dump_options = {
+            "include": self.response_model_include,
+            "exclude": self.response_model_exclude,
+            "by_alias": self.response_model_by_alias,
+            "exclude_unset": self.response_model_exclude_unset,
+            "exclude_defaults": self.response_model_exclude_defaults,
+            "exclude_none": self.response_model_exclude_none,
+        }
+        route_status_code = self.status_code
+
+        @functools.wraps(call)
+        async def endpoint(*args, **kwargs):
+            content = await call(*args, **kwargs)
+            if isinstance(content, Response):
+                return content
+
+            # Статус и заголовки, выставленные эндпоинтом на внедренном Response (cookie и т.п.)
+            injected = next((value for value in kwargs.values() if isinstance(value, Response)), None)
+            status_code = (injected.status_code if injected is not None else None) or route_status_code or 200
+
+            if not is_body_allowed_for_status_code(status_code):
+                response = Response(status_code=status_code)
+            elif adapter is None:
+                response = response_class(content, status_code=status_code)
+            else:
+                if not (isinstance(response_model, type) and isinstance(content, response_model)):
+                    # Словари и списки проверяем, как FastAPI: иначе лишние поля уйдут клиенту
+                    content = adapter.validate_python(content)
+                response = Response(
+                    adapter.dump_json(content, **dump_options),
+                    status_code=status_code,
+                    media_type=response_class.media_type,
+                )
+            if injected is not None:
+                response.headers.raw.extend(injected.headers.raw)
+            return response
+
+        endpoint.renders_response = True
+        return endpoint
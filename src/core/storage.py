@@ -0,0 +1,288 @@
+import hashlib
+import mimetypes
+import os
+import re
+import tempfile
+from pathlib import Path
+from typing import AsyncIterable, AsyncIterator, Protocol
+
+import anyio
+
+from src.core.config import settings
+from src.core.metrics import registry
+from src.exceptions import FileTooLargeException, StoredFileNotFoundException
+from src.schemas.storage import StoredFile
+
+storage_uploaded_bytes_total = registry.counter(
+    "storage_uploaded_bytes_total", "Принято байт при загрузке файлов"
+)
+storage_deduplicated_total = registry.counter(
+    "storage_deduplicated_total", "Загрузки, совпавшие с уже сохраненным файлом"
+)
+
+
+def make_key(sha256: str, content_type: str | None = None) -> str:
+    # Адрес по содержимому: одинаковые файлы получают один ключ
+    extension = mimetypes.guess_extension((content_type or "").split(";")[0].strip()) or ""
+    return f"{sha256[:2]}/{sha256[2:4]}/{sha256}{extension}"
+
+
+# Формат make_key: aa/bb/<sha256>[.ext]
+_KEY_PATTERN = re.compile(r"([0-9a-f]{2})/([0-9a-f]{2})/\1\2[0-9a-f]{60}(\.[a-z0-9]{1,10})?")
+
+
+def is_content_key(key: str) -> bool:
+    return _KEY_PATTERN.fullmatch(key) is not None
+
+
+def sha256_from_key(key: str) -> str:
+    return Path(key).name.split(".", 1)[0]
+
+
+class FileStorage(Protocol):
+    async def save(
+        self,
+        chunks: AsyncIterable[bytes],
+        content_type: str | None = None,
+        max_size: int | None = None,
+    ) -> StoredFile: ...
+
+    async def stat(self, key: str) -> StoredFile | None: ...
+
+    def iter_range(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]: ...
+
+    def local_path(self, key: str) -> Path | None: ...
+
+    async def delete(self, key: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class _SpooledUpload:
+    """Принимает поток чанков во временный файл на диске, считая sha256 по пути.
+
+    Запись и хеширование идут в пуле потоков, в памяти - не больше одного чанка.
+    """
+
+    def __init__(self, tmp_dir: Path, chunk_size: int, max_size: int | None):
+        self.tmp_dir = tmp_dir
+        self.chunk_size = chunk_size
+        self.max_size = max_size
+        self.digest = hashlib.sha256()
+        self.size = 0
+        self.path: Path | None = None
+
+    def _write(self, file, data: bytes):
+        self.digest.update(data)
+        file.write(data)
+
+    def _finish(self, file):
+        file.flush()
+        os.fsync(file.fileno())
+        file.close()
+
+    async def receive(self, chunks: AsyncIterable[bytes]):
+        self.tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, name = tempfile.mkstemp(dir=self.tmp_dir, suffix=".part")
+        self.path = Path(name)
+        file = os.fdopen(fd, "wb")
+        buffer = bytearray()
+        try:
+            async for chunk in chunks:
+                self.size += len(chunk)
+                if self.max_size is not None and self.size > self.max_size:
+                    raise FileTooLargeException
+                buffer += chunk
+                if len(buffer) >= self.chunk_size:
+                    await anyio.to_thread.run_sync(self._write, file, bytes(buffer))
+                    buffer.clear()
+            if buffer:
+                await anyio.to_thread.run_sync(self._write, file, bytes(buffer))
+            await anyio.to_thread.run_sync(self._finish, file)
+        except BaseException:
+            file.close()
+            self.discard()
+            raise
+        storage_uploaded_bytes_total.inc(self.size)
+
+    def discard(self):
+        if self.path is not None:
+            self.path.unlink(missing_ok=True)
+            self.path = None
+
+
+class LocalFileStorage:
+    def __init__(self, root: str | Path, chunk_size: int = 1024 * 1024):
+        self.root = Path(root)
+        self.chunk_size = chunk_size
+        self.tmp_dir = self.root / ".tmp"
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if self.root.resolve() not in path.parents:
+            raise StoredFileNotFoundException
+        return path
+
+    async def save(
+        self,
+        chunks: AsyncIterable[bytes],
+        content_type: str | None = None,
+        max_size: int | None = None,
+    ) -> StoredFile:
+        upload = _SpooledUpload(self.tmp_dir, self.chunk_size, max_size)
+        await upload.receive(chunks)
+        sha256 = upload.digest.hexdigest()
+        key = make_key(sha256, content_type)
+        path = self._path(key)
+
+        if path.exists():
+            upload.discard()
+            storage_deduplicated_total.inc()
+            return StoredFile(key=key, size=upload.size, sha256=sha256, created=False)
+
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # Атомарно: параллельная загрузка того же файла просто перезапишет его тем же содержимым
+        os.replace(upload.path, path)
+        return StoredFile(key=key, size=upload.size, sha256=sha256)
+
+    async def stat(self, key: str) -> StoredFile | None:
+        try:
+            path = self._path(key)
+            size = (await anyio.to_thread.run_sync(path.stat)).st_size
+        except (FileNotFoundError, StoredFileNotFoundException):
+            return None
+        return StoredFile(key=key, size=size, sha256=sha256_from_key(key), created=False)
+
+    async def iter_range(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        async with await anyio.open_file(self._path(key), "rb") as file:
+            await file.seek(start)
+            remaining = None if end is None else end - start
+            while remaining is None or remaining > 0:
+                size = self.chunk_size if remaining is None else min(self.chunk_size, remaining)
+                chunk = await file.read(size)
+                if not chunk:
+                    break
+                if remaining is not None:
+                    remaining -= len(chunk)
+                yield chunk
+
+    def local_path(self, key: str) -> Path | None:
+        return self._path(key)
+
+    async def delete(self, key: str) -> None:
+        self._path(key).unlink(missing_ok=True)
+
+    async def close(self) -> None:
+        pass
+
+
+class S3FileStorage:
+    """S3-совместимое хранилище (MinIO, Ceph и т.п.) через aiobotocore-подобный клиент.
+
+    Файл сначала принимается во временный файл: ключ зависит от хеша содержимого,
+    который известен только после чтения всего потока.
+    """
+
+    def __init__(self, bucket: str, client=None, endpoint_url: str | None = None, chunk_size: int = 1024 * 1024):
+        self.bucket = bucket
+        self.endpoint_url = endpoint_url
+        self.chunk_size = chunk_size
+        self.tmp_dir = Path(tempfile.gettempdir()) / "book-uploads"
+        self._client = client
+        self._client_context = None
+
+    async def _get_client(self):
+        if self._client is None:
+            from aiobotocore.session import get_session
+
+            self._client_context = get_session().create_client("s3", endpoint_url=self.endpoint_url)
+            self._client = await self._client_context.__aenter__()
+        return self._client
+
+    async def _head(self, key: str) -> dict | None:
+        client = await self._get_client()
+        try:
+            return await client.head_object(Bucket=self.bucket, Key=key)
+        except Exception as e:
+            if getattr(e, "response", {}).get("Error", {}).get("Code") in ("404", "NoSuchKey", "NotFound"):
+                return None
+            raise
+
+    async def save(
+        self,
+        chunks: AsyncIterable[bytes],
+        content_type: str | None = None,
+        max_size: int | None = None,
+    ) -> StoredFile:
+        upload = _SpooledUpload(self.tmp_dir, self.chunk_size, max_size)
+        await upload.receive(chunks)
+        try:
+            sha256 = upload.digest.hexdigest()
+            key = make_key(sha256, content_type)
+            if await self._head(key) is not None:
+                storage_deduplicated_total.inc()
+                return StoredFile(key=key, size=upload.size, sha256=sha256, created=False)
+
+            client = await self._get_client()
+            with upload.path.open("rb") as body:
+                await client.put_object(
+                    Bucket=self.bucket,
+                    Key=key,
+                    Body=body,
+                    ContentType=content_type or "application/octet-stream",
+                )
+            return StoredFile(key=key, size=upload.size, sha256=sha256)
+        finally:
+            upload.discard()
+
+    async def stat(self, key: str) -> StoredFile | None:
+        head = await self._head(key)
+        if head is None:
+            return None
+        return StoredFile(key=key, size=head["ContentLength"], sha256=sha256_from_key(key), created=False)
+
+    async def iter_range(self, key: str, start: int = 0, end: int | None = None) -> AsyncIterator[bytes]:
+        client = await self._get_client()
+        byte_range = f"bytes={start}-{'' if end is None else end - 1}"
+        response = await client.get_object(Bucket=self.bucket, Key=key, Range=byte_range)
+        async with response["Body"] as body:
+            while chunk := await body.read(self.chunk_size):
+                yield chunk
+
+    def local_path(self, key: str) -> Path | None:
+        return None
+
+    async def delete(self, key: str) -> None:
+        client = await self._get_client()
+        await client.delete_object(Bucket=self.bucket, Key=key)
+
+    async def close(self) -> None:
+        if self._client_context is not None:
+            await self._client_context.__aexit__(None, None, None)
+            self._client_context = None
+            self._client = None
+
+
+_storage: FileStorage | None = None
+
+
+def build_storage() -> FileStorage:
+    if settings.STORAGE_BACKEND == "s3":
+        return S3FileStorage(
+            bucket=settings.STORAGE_S3_BUCKET,
+            endpoint_url=settings.STORAGE_S3_ENDPOINT_URL,
+            chunk_size=settings.STORAGE_CHUNK_SIZE,
+        )
+    return LocalFileStorage(settings.STORAGE_LOCAL_ROOT, chunk_size=settings.STORAGE_CHUNK_SIZE)
+
+
+def get_storage() -> FileStorage:
+    global _storage
+    if _storage is None:
+        _storage = build_storage()
+    return _storage
+
+
+def set_storage(storage: FileStorage | None):
+    global _storage
+    _storage = storage
@@ -0,0 +1,390 @@
+import asyncio
+import heapq
+import inspect
+import itertools
+import json
+import logging
+import random
+import time
+import uuid
+from typing import Callable, Protocol
+
+import anyio
+
+from src.core.config import settings
+from src.core.metrics import registry
+
+tasks_enqueued_total = registry.counter(
+    "tasks_enqueued_total", "Поставленные в очередь задачи", labelnames=("queue", "task")
+)
+tasks_duplicates_total = registry.counter(
+    "tasks_duplicates_total", "Повторные постановки с уже известным task_id", labelnames=("queue", "task")
+)
+tasks_processed_total = registry.counter(
+    "tasks_processed_total",
+    "Выполненные задачи по итогу попытки",
+    labelnames=("queue", "task", "status"),
+)
+task_queue_latency_seconds = registry.histogram(
+    "task_queue_latency_seconds",
+    "От момента, когда задачу можно выполнять, до начала выполнения",
+    labelnames=("queue",),
+    buckets=(0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0),
+)
+task_duration_seconds = registry.histogram(
+    "task_duration_seconds", "Время выполнения задачи", labelnames=("queue", "task")
+)
+task_queue_depth = registry.gauge("task_queue_depth", "Задачи, ожидающие выполнения", labelnames=("queue",))
+tasks_running = registry.gauge("tasks_running", "Задачи в работе", labelnames=("queue",))
+
+
+class TaskBroker(Protocol):
+    async def push(self, queue: str, message: str, eta: float) -> None: ...
+
+    async def pop(self, queue: str, now: float, visibility_timeout: float) -> str | None: ...
+
+    async def ack(self, queue: str, message: str) -> None: ...
+
+    async def requeue_expired(self, queue: str, now: float) -> int: ...
+
+    async def depth(self, queue: str) -> int: ...
+
+    async def claim(self, task_id: str, ttl: int) -> bool: ...
+
+    async def release(self, task_id: str) -> None: ...
+
+    async def close(self) -> None: ...
+
+
+class InMemoryBroker:
+    """Брокер в памяти процесса: для тестов, локального запуска и задач с секретами."""
+
+    def __init__(self):
+        self._queues: dict[str, list[tuple[float, int, str]]] = {}
+        self._processing: dict[str, dict[str, float]] = {}
+        self._claims: dict[str, float] = {}
+        self._counter = itertools.count()
+
+    async def push(self, queue: str, message: str, eta: float) -> None:
+        heapq.heappush(self._queues.setdefault(queue, []), (eta, next(self._counter), message))
+
+    async def pop(self, queue: str, now: float, visibility_timeout: float) -> str | None:
+        heap = self._queues.get(queue)
+        if not heap or heap[0][0] > now:
+            return None
+        _, _, message = heapq.heappop(heap)
+        self._processing.setdefault(queue, {})[message] = now + visibility_timeout
+        return message
+
+    async def ack(self, queue: str, message: str) -> None:
+        self._processing.get(queue, {}).pop(message, None)
+
+    async def requeue_expired(self, queue: str, now: float) -> int:
+        processing = self._processing.get(queue, {})
+        expired = [message for message, deadline in processing.items() if deadline <= now]
+        for message in expired:
+            del processing[message]
+            await self.push(queue, message, now)
+        return len(expired)
+
+    async def depth(self, queue: str) -> int:
+        return len(self._queues.get(queue, ()))
+
+    async def claim(self, task_id: str, ttl: int) -> bool:
+        expires_at = self._claims.get(task_id)
+        if expires_at is not None and expires_at > time.monotonic():
+            return False
+        self._claims[task_id] = time.monotonic() + ttl
+        return True
+
+    async def release(self, task_id: str) -> None:
+        self._claims.pop(task_id, None)
+
+    async def close(self) -> None:
+        self._queues.clear()
+        self._processing.clear()
+        self._claims.clear()
+
+
+# Забрать первую готовую задачу и перенести в processing с дедлайном - атомарно
+_POP_SCRIPT = """
+local messages = redis.call('ZRANGEBYSCORE', KEYS[1], '-inf', ARGV[1], 'LIMIT', 0, 1)
+if #messages == 0 then return nil end
+redis.call('ZREM', KEYS[1], messages[1])
+redis.call('ZADD', KEYS[2], ARGV[2], messages[1])
+return messages[1]
+"""
+
+_REQUEUE_SCRIPT = """
+local messages = redis.call('ZRANGEBYSCORE', KEYS[2], '-inf', ARGV[1])
+for _, message in ipairs(messages) do
+    redis.call('ZREM', KEYS[2], message)
+    redis.call('ZADD', KEYS[1], ARGV[1], message)
+end
+return #messages
+"""
+
+
+class RedisBroker:
+    """Очереди - sorted set по времени готовности, выданные задачи - отдельный
+    sorted set с дедлайном: если воркер упал, задача вернется в очередь."""
+
+    def __init__(self, url: str, prefix: str = "tasks"):
+        import redis.asyncio as redis
+
+        self.client = redis.from_url(url, decode_responses=True)
+        self.prefix = prefix
+        self._pop = self.client.register_script(_POP_SCRIPT)
+        self._requeue = self.client.register_script(_REQUEUE_SCRIPT)
+
+    def _keys(self, queue: str) -> list[str]:
+        return [f"{self.prefix}:queue:{queue}", f"{self.prefix}:processing:{queue}"]
+
+    async def push(self, queue: str, message: str, eta: float) -> None:
+        await self.client.zadd(self._keys(queue)[0], {message: eta})
+
+    async def pop(self, queue: str, now: float, visibility_timeout: float) -> str | None:
+        return await self._pop(keys=self._keys(queue), args=[now, now + visibility_timeout])
+
+    async def ack(self, queue: str, message: str) -> None:
+        await self.client.zrem(self._keys(queue)[1], message)
+
+    async def requeue_expired(self, queue: str, now: float) -> int:
+        return await self._requeue(keys=self._keys(queue), args=[now])
+
+    async def depth(self, queue: str) -> int:
+        return await self.client.zcard(self._keys(queue)[0])
+
+    async def claim(self, task_id: str, ttl: int) -> bool:
+        return bool(await self.client.set(f"{self.prefix}:id:{task_id}", 1, nx=True, ex=ttl))
+
+    async def release(self, task_id: str) -> None:
+        await self.client.delete(f"{self.prefix}:id:{task_id}")
+
+    async def close(self) -> None:
+        await self.client.aclose()
+
+
+class TaskDefinition:
+    def __init__(
+        self,
+        task_queue: "TaskQueue",
+        func: Callable,
+        name: str,
+        queue: str,
+        max_retries: int,
+        backoff: float,
+        max_backoff: float,
+        local: bool,
+    ):
+        self.task_queue = task_queue
+        self.func = func
+        self.name = name
+        self.queue = queue
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.local = local
+
+    def retry_delay(self, attempt: int) -> float:
+        # Экспоненциальная задержка с джиттером, чтобы повторы не шли пачкой
+        delay = min(self.backoff * 2 ** (attempt - 1), self.max_backoff)
+        return delay * random.uniform(0.5, 1.0)
+
+    async def enqueue(self, *args, task_id: str | None = None, delay: float = 0, **kwargs) -> str | None:
+        return await self.task_queue.enqueue(self, *args, task_id=task_id, delay=delay, **kwargs)
+
+    async def __call__(self, *args, **kwargs):
+        if inspect.iscoroutinefunction(self.func):
+            return await self.func(*args, **kwargs)
+        return await anyio.to_thread.run_sync(lambda: self.func(*args, **kwargs))
+
+
+class TaskQueue:
+    """Реестр задач и постановка в очередь.
+
+    Задачи с local=True (например, с паролем в аргументах) никогда не уходят во
+    внешний брокер и выполняются воркером внутри процесса API.
+    """
+
+    LOCAL_QUEUE = "local"
+
+    def __init__(self, broker: TaskBroker, local_broker: TaskBroker | None = None, idempotency_ttl: int = 86_400):
+        self.broker = broker
+        self.local_broker = local_broker or InMemoryBroker()
+        self.idempotency_ttl = idempotency_ttl
+        self.tasks: dict[str, TaskDefinition] = {}
+
+    def task(
+        self,
+        name: str,
+        queue: str = "default",
+        max_retries: int = 3,
+        backoff: float = 1.0,
+        max_backoff: float = 300.0,
+        local: bool = False,
+    ):
+        def decorator(func: Callable) -> TaskDefinition:
+            definition = TaskDefinition(
+                self,
+                func,
+                name=name,
+                queue=self.LOCAL_QUEUE if local else queue,
+                max_retries=max_retries,
+                backoff=backoff,
+                max_backoff=max_backoff,
+                local=local,
+            )
+            self.tasks[name] = definition
+            return definition
+
+        return decorator
+
+    def broker_for(self, definition: TaskDefinition) -> TaskBroker:
+        return self.local_broker if definition.local else self.broker
+
+    async def enqueue(
+        self, definition: TaskDefinition, *args, task_id: str | None = None, delay: float = 0, **kwargs
+    ) -> str | None:
+        """Возвращает task_id или None, если задача с таким task_id уже поставлена."""
+        broker = self.broker_for(definition)
+        task_id = task_id or uuid.uuid4().hex
+        if not await broker.claim(f"{definition.name}:{task_id}", self.idempotency_ttl):
+            tasks_duplicates_total.labels(queue=definition.queue, task=definition.name).inc()
+            return None
+
+        eta = time.time() + delay
+        message = json.dumps(
+            {"id": task_id, "task": definition.name, "args": args, "kwargs": kwargs, "attempt": 0, "eta": eta}
+        )
+        await broker.push(definition.queue, message, eta)
+        tasks_enqueued_total.labels(queue=definition.queue, task=definition.name).inc()
+        return task_id
+
+
+class Worker:
+    def __init__(
+        self,
+        task_queue: TaskQueue,
+        concurrency: dict[str, int],
+        broker: TaskBroker | None = None,
+        poll_interval: float = 0.5,
+        visibility_timeout: float = 300.0,
+    ):
+        self.task_queue = task_queue
+        self.concurrency = concurrency
+        self.broker = broker or task_queue.broker
+        self.poll_interval = poll_interval
+        self.visibility_timeout = visibility_timeout
+        self._stopping = asyncio.Event()
+        self._running: set[asyncio.Task] = set()
+
+    async def run(self, until_idle: bool = False):
+        """until_idle - выйти, когда все очереди пусты (скрипты и тесты)."""
+        consumers = [self._consume(queue, limit, until_idle) for queue, limit in self.concurrency.items()]
+        await asyncio.gather(*consumers)
+        if self._running:
+            await asyncio.gather(*self._running, return_exceptions=True)
+
+    async def stop(self, timeout: float = 30.0):
+        self._stopping.set()
+        if self._running:
+            await asyncio.wait(self._running, timeout=timeout)
+
+    async def _consume(self, queue: str, limit: int, until_idle: bool):
+        slots = asyncio.Semaphore(limit)
+        running: set[asyncio.Task] = set()
+        while not self._stopping.is_set():
+            await slots.acquire()
+            now = time.time()
+            message = await self.broker.pop(queue, now, self.visibility_timeout)
+            if message is None:
+                slots.release()
+                await self.broker.requeue_expired(queue, now)
+                task_queue_depth.labels(queue=queue).set(await self.broker.depth(queue))
+                if until_idle and not running and not await self.broker.depth(queue):
+                    return
+                try:
+                    await asyncio.wait_for(self._stopping.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+
+            task = asyncio.create_task(self._execute(queue, message))
+            running.add(task)
+            self._running.add(task)
+            task.add_done_callback(running.discard)
+            task.add_done_callback(self._running.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _execute(self, queue: str, raw: str):
+        message = json.loads(raw)
+        definition = self.task_queue.tasks.get(message["task"])
+        started = time.time()
+        task_queue_latency_seconds.labels(queue=queue).observe(max(started - message["eta"], 0))
+        tasks_running.labels(queue=queue).inc()
+        try:
+            if definition is None:
+                logging.error("Неизвестная задача %s, id=%s", message["task"], message["id"])
+                return
+            await self._run_attempt(definition, message)
+        finally:
+            tasks_running.labels(queue=queue).dec()
+            await self.broker.ack(queue, raw)
+
+    async def _run_attempt(self, definition: TaskDefinition, message: dict):
+        labels = {"queue": definition.queue, "task": definition.name}
+        started = time.perf_counter()
+        try:
+            await definition(*message["args"], **message["kwargs"])
+        except Exception:
+            attempt = message["attempt"] + 1
+            if attempt > definition.max_retries:
+                tasks_processed_total.labels(**labels, status="failed").inc()
+                logging.exception(
+                    "Задача %s id=%s не выполнена за %d попыток", definition.name, message["id"], attempt
+                )
+                # Разрешаем поставить задачу с тем же id заново, например вручную
+                await self.broker.release(f"{definition.name}:{message['id']}")
+                return
+            delay = definition.retry_delay(attempt)
+            tasks_processed_total.labels(**labels, status="retry").inc()
+            logging.warning(
+                "Задача %s id=%s упала, повтор %d через %.1fs",
+                definition.name,
+                message["id"],
+                attempt,
+                delay,
+                exc_info=True,
+            )
+            eta = time.time() + delay
+            await self.broker.push(definition.queue, json.dumps({**message, "attempt": attempt, "eta": eta}), eta)
+        else:
+            tasks_processed_total.labels(**labels, status="success").inc()
+        finally:
+            task_duration_seconds.labels(**labels).observe(time.perf_counter() - started)
+
+
+def build_task_queue() -> TaskQueue:
+    if settings.TASK_BROKER == "redis":
+        broker = RedisBroker(settings.redis_url)
+        return TaskQueue(broker, idempotency_ttl=settings.TASK_IDEMPOTENCY_TTL_SECONDS)
+    # Без Redis все задачи выполняются внутри процесса одним локальным брокером
+    broker = InMemoryBroker()
+    return TaskQueue(broker, local_broker=broker, idempotency_ttl=settings.TASK_IDEMPOTENCY_TTL_SECONDS)
+
+
+task_queue = build_task_queue()
+
+
+def build_local_worker(queue: TaskQueue = task_queue) -> Worker:
+    # В процессе API: локальные задачи, а без Redis - вообще все очереди
+    concurrency = {TaskQueue.LOCAL_QUEUE: settings.TASK_LOCAL_CONCURRENCY}
+    if queue.local_broker is queue.broker:
+        concurrency = {**settings.TASK_QUEUE_CONCURRENCY, **concurrency}
+    return Worker(
+        queue,
+        concurrency,
+        broker=queue.local_broker,
+        visibility_timeout=settings.TASK_VISIBILITY_TIMEOUT_SECONDS,
+    )
@@ -0,0 +1,77 @@
+import logging
+from contextlib import asynccontextmanager
+from itertools import groupby
+
+from pydantic import BaseModel
+from sqlalchemy import insert, update
+from sqlalchemy.exc import IntegrityError
+
+from src.exceptions import DataIntegrityError
+
+
+class UnitOfWork:
+    """Копит вставки и обновления из разных репозиториев и отправляет их пачками.
+
+    Подряд идущие операции одного вида над одной моделью уходят одним
+    executemany, порядок между разными таблицами сохраняется.
+    """
+
+    def __init__(self, session):
+        self.session = session
+        self._pending: list[tuple[str, object, dict]] = []
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    @staticmethod
+    def _values(data: BaseModel | dict) -> dict:
+        if isinstance(data, BaseModel):
+            return data.model_dump(exclude_unset=True)
+        return dict(data)
+
+    def register_insert(self, repository, data: BaseModel | dict):
+        self._pending.append(("insert", repository, self._values(data)))
+
+    def register_update(self, repository, data: BaseModel | dict, id: int):
+        values = self._values(data)
+        values["id"] = id
+        self._pending.append(("update", repository, values))
+
+    def discard(self):
+        self._pending.clear()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        operations, self._pending = self._pending, []
+
+        touched = []
+        for (kind, repository), group in groupby(operations, key=lambda op: (op[0], op[1])):
+            rows = [values for _, _, values in group]
+            stmt = insert(repository.model) if kind == "insert" else update(repository.model)
+            try:
+                await self.session.execute(stmt, rows)
+            except IntegrityError:
+                logging.exception(
+                    "Ошибка пакетной записи в %s, строк=%d", repository.model.__tablename__, len(rows)
+                )
+                raise DataIntegrityError
+            if repository not in touched:
+                touched.append(repository)
+
+        for repository in touched:
+            await repository._on_write()
+
+    @asynccontextmanager
+    async def savepoint(self):
+        # Все, что накоплено до точки сохранения, пишем сразу, чтобы откат
+        # затронул только операции внутри блока
+        await self.flush()
+        try:
+            async with self.session.begin_nested():
+                yield self
+                await self.flush()
+        except BaseException:
+            self.discard()
+            raise
@@ -39,4 +39,44 @@ class RegisterErrorException(BaseException):
 
 
 class LoginErrorException(BaseException):
-    detail = "Login error"
\ No newline at end of file
+    detail = "Login error"
+
+
+class InvalidRefreshTokenException(BaseException):
+    detail = "Invalid refresh token"
+
+
+class RefreshTokenReuseException(InvalidRefreshTokenException):
+    detail = "Refresh token reuse detected"
+
+
+class PasswordHasherBusyException(BaseException):
+    detail = "Password hasher is busy"
+
+
+class InvalidCursorException(BaseException):
+    detail = "Invalid pagination cursor"
+
+
+class UnknownLoadOptionException(BaseException):
+    detail = "Unknown relationship or projection in load plan"
+
+
+class FileTooLargeException(BaseException):
+    detail = "File is too large"
+
+
+class StoredFileNotFoundException(BaseException):
+    detail = "Stored file not found"
+
+
+class BookAlreadyExistsException(BaseException):
+    detail = "Book with this file already exists"
+
+
+class TooManyLoginAttemptsException(BaseException):
+    detail = "Too many login attempts"
+
+    def __init__(self, retry_after: float = 0.0):
+        super().__init__()
+        self.retry_after = retry_after
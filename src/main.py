@@ -1,8 +1,77 @@
+import asyncio
+from contextlib import asynccontextmanager
+
 import uvicorn
 from fastapi import FastAPI
 
-app = FastAPI()
+from src.api.auth import router as auth_router
+from src.api.books import router as books_router
+from src.api.health import router as health_router
+from src.api.metrics import router as metrics_router
+from src.core.config import settings
+from src.core.db import dispose_db, get_engine, get_replica_set, init_db
+from src.core.db_routing import ReadYourWritesMiddleware
+from src.core.http_cache import ResponseCacheMiddleware
+from src.core.instrumentation import InstrumentationMiddleware, register_cache_ratios
+from src.core.lifecycle import lifecycle
+from src.core.logs import configure_logging
+from src.core.responses import FastJSONResponse
+from src.core.tasks import build_local_worker
+from src.tasks import auth, books, feed  # noqa: F401
+from src.utils.hashing import password_hasher
+
+configure_logging()
+register_cache_ratios()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_db(role="api")
+    # Прогрев в фоне: /health/live отвечает сразу, /health/ready - после прогрева
+    warmup_task = asyncio.create_task(
+        lifecycle.warm_up(
+            get_engine(),
+            replicas=get_replica_set(),
+            password_hasher=password_hasher,
+            db_connections=settings.WARMUP_DB_CONNECTIONS,
+            retry_seconds=settings.WARMUP_RETRY_SECONDS,
+        )
+    )
+    # Локальные задачи (и все задачи, если брокер в памяти) выполняются в процессе API
+    worker = build_local_worker()
+    worker_task = asyncio.create_task(worker.run())
+    replicas = get_replica_set()
+    health_task = None
+    if replicas is not None:
+        health_task = asyncio.create_task(
+            replicas.run_health_checks(settings.DB_REPLICA_HEALTH_INTERVAL_SECONDS)
+        )
+    yield
+
+    # Остановка ограничена по времени: снимаемся с балансировки, ждем задачи и сессии БД
+    lifecycle.start_draining()
+    warmup_task.cancel()
+    if health_task is not None:
+        health_task.cancel()
+    await worker.stop(timeout=settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    # Не уложившиеся в таймаут задачи прерываются: повторит брокер после visibility timeout
+    worker_task.cancel()
+    await asyncio.gather(worker_task, return_exceptions=True)
+    await lifecycle.wait_for_sessions(settings.SHUTDOWN_DRAIN_TIMEOUT_SECONDS)
+    await dispose_db()
+    password_hasher.shutdown(wait=False)
+
+
+# Ответы сериализует pydantic-core, минуя jsonable_encoder, см. FastJSONRoute
+app = FastAPI(lifespan=lifespan, default_response_class=FastJSONResponse)
+app.add_middleware(ResponseCacheMiddleware)
+app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=settings.DB_READ_YOUR_WRITES_SECONDS)
+app.add_middleware(InstrumentationMiddleware)
+app.include_router(health_router)
+app.include_router(metrics_router)
+app.include_router(auth_router)
+app.include_router(books_router)
 
 
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
@@ -1,8 +1,9 @@
-from sqlalchemy import String, Text, ForeignKey
+from sqlalchemy import String, Text, ForeignKey, Computed, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.db import Base
-from src.models.reviews import ReviewModel
+from src.models.reviews import ReviewModel, BookRatingModel
 from src.models.users import BookAuthorModel, book_authors_books, UserModel, favorite_books
 
 
@@ -12,14 +13,29 @@ class BookModel(Base):
     id: Mapped[int] = mapped_column(primary_key=True)
     title: Mapped[str] = mapped_column(String(255), nullable=False)
     description: Mapped[str | None] = mapped_column(Text)
-    file_path: Mapped[str] = mapped_column(String(500), nullable=False)
+    file_path: Mapped[str] = mapped_column(String(500), nullable=False, unique=True)
     author_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
+    # Поддерживается самой БД при каждой вставке/обновлении, руками не пишется
+    search_vector: Mapped[str] = mapped_column(
+        TSVECTOR,
+        Computed(
+            "setweight(to_tsvector('russian', coalesce(title, '')), 'A') || "
+            "setweight(to_tsvector('russian', coalesce(description, '')), 'B')",
+            persisted=True,
+        ),
+        deferred=True,
+    )
 
     uploader: Mapped["UserModel"] = relationship(back_populates="uploaded_books")
     reviews: Mapped[list["ReviewModel"]] = relationship(back_populates="book")
+    rating: Mapped["BookRatingModel | None"] = relationship(viewonly=True)
     authors: Mapped[list["BookAuthorModel"]] = relationship(
         secondary=book_authors_books, back_populates="books"
     )
     fans: Mapped[list["UserModel"]] = relationship(
-        "User", secondary=favorite_books, back_populates="favorites"
+        "UserModel", secondary=favorite_books, back_populates="favorites"
+    )
+
+    __table_args__ = (
+        Index("ix_books_search_vector", "search_vector", postgresql_using="gin"),
     )
\ No newline at end of file
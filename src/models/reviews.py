@@ -1,17 +1,54 @@
-from sqlalchemy import ForeignKey, Integer, Text
+from typing import TYPE_CHECKING
+
+from sqlalchemy import CheckConstraint, Computed, ForeignKey, Index, Integer, Numeric, Text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from src.core.db import Base
 
+if TYPE_CHECKING:
+    from src.models.books import BookModel
+    from src.models.users import UserModel
+
+MIN_RATING = 1
+MAX_RATING = 5
+
 
 class ReviewModel(Base):
     __tablename__ = "reviews"
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), nullable=False)
-    book_id: Mapped[int] = mapped_column(ForeignKey("books.id"), nullable=False)
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id"), nullable=False, index=True)
     text: Mapped[str] = mapped_column(Text, nullable=False)
     rating: Mapped[int] = mapped_column(Integer, nullable=False)
 
     user: Mapped["UserModel"] = relationship(back_populates="reviews")
-    book: Mapped["BookModel"] = relationship(back_populates="reviews")
\ No newline at end of file
+    book: Mapped["BookModel"] = relationship(back_populates="reviews")
+
+    __table_args__ = (
+        CheckConstraint(f"rating BETWEEN {MIN_RATING} AND {MAX_RATING}", name="ck_reviews_rating_range"),
+    )
+
+
+class BookRatingModel(Base):
+    """Агрегаты отзывов по книге, обновляются в той же транзакции, что и отзыв."""
+
+    __tablename__ = "book_ratings"
+
+    book_id: Mapped[int] = mapped_column(ForeignKey("books.id", ondelete="CASCADE"), primary_key=True)
+    reviews_count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_sum: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_1: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_2: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_3: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_4: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    rating_5: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+    average_rating: Mapped[float] = mapped_column(
+        Numeric(4, 3, asdecimal=False),
+        Computed("CASE WHEN reviews_count > 0 THEN rating_sum * 1.0 / reviews_count ELSE 0 END"),
+    )
+
+    __table_args__ = (
+        Index("ix_book_ratings_top_rated", average_rating.desc(), reviews_count.desc()),
+        Index("ix_book_ratings_most_reviewed", reviews_count.desc()),
+    )
@@ -1,11 +1,16 @@
 import enum
-from datetime import date
+from datetime import date, datetime
+from typing import TYPE_CHECKING
 
 from sqlalchemy.orm import Mapped, mapped_column, relationship
-from sqlalchemy import String, Date, Enum, Column, ForeignKey, Table, Text
+from sqlalchemy import String, Date, DateTime, Enum, Column, ForeignKey, Table, Text, Index, DDL, event
 
 from src.core.db import Base
 
+if TYPE_CHECKING:
+    from src.models.books import BookModel
+    from src.models.reviews import ReviewModel
+
 
 class RoleEnum(enum.Enum):
     user = "user"
@@ -17,6 +22,8 @@ favorite_books = Table(
     Base.metadata,
     Column("user_id", ForeignKey("users.id"), primary_key=True),
     Column("book_id", ForeignKey("books.id"), primary_key=True),
+    # Фанаты книги для рассылки ленты: первичный ключ начинается с user_id
+    Index("ix_favorite_books_book_id_user_id", "book_id", "user_id"),
 )
 
 book_authors_books = Table(
@@ -24,6 +31,14 @@ book_authors_books = Table(
     Base.metadata,
     Column("book_id", ForeignKey("books.id"), primary_key=True),
     Column("author_id", ForeignKey("book_authors.id"), primary_key=True),
+    Index("ix_book_authors_books_author_id", "author_id"),
+)
+
+# Триграммные индексы для нечеткого поиска требуют расширения pg_trgm
+event.listen(
+    Base.metadata,
+    "before_create",
+    DDL("CREATE EXTENSION IF NOT EXISTS pg_trgm").execute_if(dialect="postgresql"),
 )
 
 class UserModel(Base):
@@ -44,6 +59,25 @@ class UserModel(Base):
         "BookModel", secondary=favorite_books, back_populates="fans"
     )
 
+class RefreshTokenModel(Base):
+    """Выданные refresh-токены. Сам токен не хранится - только sha256 от него.
+
+    Токены одного входа образуют семейство: при ротации старый помечается
+    used_at, новый получает тот же family_id. Повторное предъявление
+    использованного токена отзывает все семейство.
+    """
+
+    __tablename__ = "refresh_tokens"
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id", ondelete="CASCADE"), index=True)
+    family_id: Mapped[str] = mapped_column(String(32), index=True)
+    token_hash: Mapped[str] = mapped_column(String(64), unique=True)
+    expires_at: Mapped[datetime] = mapped_column(DateTime(timezone=True))
+    used_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+    revoked_at: Mapped[datetime | None] = mapped_column(DateTime(timezone=True))
+
+
 class BookAuthorModel(Base):
     __tablename__ = "book_authors"
 
@@ -55,4 +89,13 @@ class BookAuthorModel(Base):
 
     books: Mapped[list["BookModel"]] = relationship(
         secondary=book_authors_books, back_populates="authors"
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_book_authors_full_name_trgm",
+            "full_name",
+            postgresql_using="gin",
+            postgresql_ops={"full_name": "gin_trgm_ops"},
+        ),
     )
\ No newline at end of file
@@ -1,47 +1,151 @@
 import logging
+from itertools import islice
+from typing import Any, AsyncIterator, Iterable, Sequence
 
 from asyncpg import UniqueViolationError
-from sqlalchemy import select, delete, update, insert
+from sqlalchemy import any_, bindparam, select, delete, update, insert
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
 from pydantic import BaseModel, ValidationError
 from sqlalchemy.exc import NoResultFound, IntegrityError
 
-from src.exceptions import ObjectNotFoundException, ValidationServiceError
+from src.core.cache import get_repository_cache
+from src.core.dataloader import DataLoader, get_loader
+from src.exceptions import ObjectNotFoundException, UnknownLoadOptionException, ValidationServiceError
 from src.repositories.mappers.base import DataMapper
+from src.repositories.mixins import register_write
 
 
 class BaseRepository:
     model = None
     mapper: DataMapper = None
+    # Строки из собственной БД можно маппить без валидации Pydantic
+    trusted_reads: bool = False
+
+    # План загрузки: имя связи -> опция загрузчика (selectinload/joinedload)
+    load_options: dict[str, Any] = {}
+    # Имя поля схемы -> скалярный подзапрос-агрегат, добавляемый в тот же SELECT
+    load_projections: dict[str, Any] = {}
 
     def __init__(self, session):
         self.session = session
 
-    async def get_filtered(self, *filter, **filters):
+    stream_batch_size: int = 500
+
+    def _apply_load_plan(self, query, load: Iterable[str]):
+        projections = []
+        for name in load:
+            if name in self.load_options:
+                query = query.options(self.load_options[name])
+            elif name in self.load_projections:
+                query = query.add_columns(self.load_projections[name].label(name))
+                projections.append(name)
+            else:
+                raise UnknownLoadOptionException
+        return query, projections
+
+    def _map_rows(self, result, projections: list[str]) -> list[BaseModel]:
+        if not projections:
+            return self.mapper.map_many(result.scalars().all(), trusted=self.trusted_reads)
+        return [self._map_row(row, projections) for row in result.all()]
+
+    def _map_row(self, row, projections: list[str]) -> BaseModel:
+        if not projections:
+            return self.mapper.map_to_domain_entity(row, trusted=self.trusted_reads)
+        model, *values = row
+        return self.mapper.map_to_domain_entity(
+            model, trusted=self.trusted_reads, extra=dict(zip(projections, values))
+        )
+
+    def _filtered_query(self, *filter, after_id: int | None = None, limit: int | None = None, **filters):
         query = select(self.model).filter(*filter).filter_by(**filters)
+        if after_id is not None or limit is not None:
+            # Keyset-пагинация по первичному ключу: стабильный порядок без OFFSET
+            query = query.order_by(self.model.id)
+            if after_id is not None:
+                query = query.where(self.model.id > after_id)
+            if limit is not None:
+                query = query.limit(limit)
+        return query
+
+    async def get_filtered(
+        self,
+        *filter,
+        after_id: int | None = None,
+        limit: int | None = None,
+        load: Iterable[str] = (),
+        **filters,
+    ):
+        query = self._filtered_query(*filter, after_id=after_id, limit=limit, **filters)
+        query, projections = self._apply_load_plan(query, load)
         result = await self.session.execute(query)
-        return [self.mapper.map_to_domain_entity(model) for model in result.scalars().all()]
-
-    async def get_all(self):
-        return await self.get_filtered()
+        return self._map_rows(result, projections)
+
+    async def get_all(self, after_id: int | None = None, limit: int | None = None, load: Iterable[str] = ()):
+        return await self.get_filtered(after_id=after_id, limit=limit, load=load)
+
+    async def stream_filtered(
+        self,
+        *filter,
+        after_id: int | None = None,
+        limit: int | None = None,
+        load: Iterable[str] = (),
+        **filters,
+    ) -> AsyncIterator[BaseModel]:
+        query = self._filtered_query(*filter, after_id=after_id, limit=limit, **filters)
+        if after_id is None and limit is None:
+            query = query.order_by(self.model.id)
+        query, projections = self._apply_load_plan(query, load)
+        # selectinload догружает связи для каждой пачки yield_per отдельным запросом
+        query = query.execution_options(yield_per=self.stream_batch_size)
+
+        if projections:
+            result = await self.session.stream(query)
+        else:
+            result = await self.session.stream_scalars(query)
+        try:
+            async for row in result:
+                yield self._map_row(row, projections)
+        finally:
+            await result.close()
 
-    async def get_one_or_none(self, **filter):
-        query = select(self.model).filter_by(**filter)
+    async def get_one_or_none(self, load: Iterable[str] = (), **filter):
+        query, projections = self._apply_load_plan(select(self.model).filter_by(**filter), load)
         result = await self.session.execute(query)
-        sth = result.scalar_one_or_none()
+        sth = result.one_or_none() if projections else result.scalar_one_or_none()
 
         if sth:
-            return self.mapper.map_to_domain_entity(sth)
+            return self._map_row(sth, projections)
 
         return None
 
-    async def get_one(self, **filter_by) -> BaseModel:
-        query = select(self.model).filter_by(**filter_by)
+    async def get_one(self, load: Iterable[str] = (), **filter_by) -> BaseModel:
+        query, projections = self._apply_load_plan(select(self.model).filter_by(**filter_by), load)
         result = await self.session.execute(query)
         try:
-            model = result.scalar_one()
+            row = result.one() if projections else result.scalar_one()
         except NoResultFound:
             raise ObjectNotFoundException
-        return self.mapper.map_to_domain_entity(model)
+        return self._map_row(row, projections)
+
+    async def get_many_by_ids(self, ids: Sequence[int]) -> dict[int, BaseModel]:
+        if self.session.bind is not None and self.session.bind.dialect.name == "postgresql":
+            # Массив - один параметр: план и prepared statement не зависят от числа id
+            condition = self.model.id == any_(bindparam("ids", list(ids), type_=ARRAY(self.model.id.type)))
+        else:
+            condition = self.model.id.in_(ids)
+        result = await self.session.execute(select(self.model).where(condition))
+        return {obj.id: obj for obj in self.mapper.map_many(result.scalars().all(), trusted=self.trusted_reads)}
+
+    @property
+    def loader(self) -> DataLoader:
+        """Пакетная загрузка по id в пределах сессии: load(id) из разных мест
+        одного такта - один запрос, повторный load(id) - без запроса."""
+        return get_loader(self.session, self.model.__tablename__, self.get_many_by_ids)
+
+    async def _on_write(self, *namespaces: str):
+        # Любая запись меняет поколение таблицы: от него зависят ETag ответов
+        # (src/core/http_cache.py) и кеш репозиториев, см. CachedRepositoryMixin
+        await register_write(self.session, get_repository_cache(), namespaces or (self.model.__tablename__,))
 
     async def add(self, data: BaseModel):
         add_stmt = (
@@ -51,21 +155,37 @@ class BaseRepository:
             result = await self.session.execute(add_stmt)
             created_data = result.scalar_one_or_none()
         except IntegrityError as e:
-            logging.exception(f"Ошибка добавления данных в БД, входные данные={data}")
+            logging.exception("Ошибка добавления данных в БД, входные данные=%s", data)
             if isinstance(e.orig.__cause__, UniqueViolationError):
                 raise ObjectNotFoundException
             else:
-                logging.exception(f"Незнакомая ошибка, входные данные={data}")
+                logging.exception("Незнакомая ошибка, входные данные=%s", data)
                 raise e
         created = self.mapper.map_to_domain_entity(created_data)
+        await self._on_write()
 
         return created
 
-    async def add_bulk(self, data: list[BaseModel]):
-        add_data_stmt = insert(self.model).values(
-            [item.model_dump(exclude_unset=True) for item in data]
-        )
-        await self.session.execute(add_data_stmt)
+    async def add_bulk(
+        self, data: Iterable[BaseModel], chunk_size: int = 1000, on_conflict_do_nothing: bool = False
+    ) -> list[int]:
+        ids = []
+        data = iter(data)
+        while chunk := list(islice(data, chunk_size)):
+            if on_conflict_do_nothing:
+                add_data_stmt = pg_insert(self.model).on_conflict_do_nothing()
+            else:
+                add_data_stmt = insert(self.model)
+            add_data_stmt = add_data_stmt.values(
+                [item.model_dump(exclude_unset=True) for item in chunk]
+            ).returning(self.model.id)
+            result = await self.session.execute(add_data_stmt)
+            # При on_conflict_do_nothing пропущенные строки не возвращают id
+            ids.extend(result.scalars().all())
+
+        if ids:
+            await self._on_write()
+        return ids
 
     async def update(self, data: BaseModel, **filter):
         update_data = data.model_dump(exclude_unset=True)
@@ -83,6 +203,7 @@ class BaseRepository:
         except ValidationError:
             raise ValidationServiceError
 
+        await self._on_write()
         return edited
 
     async def delete(self, **filter):
@@ -95,4 +216,5 @@ class BaseRepository:
         if filter and result.rowcount == 0:
             raise ObjectNotFoundException
 
+        await self._on_write()
         return True
\ No newline at end of file
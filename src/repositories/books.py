@@ -1,9 +1,85 @@
+from sqlalchemy import and_, func, literal, or_, select, union_all
+from sqlalchemy.dialects.postgresql import REGCONFIG
+from sqlalchemy.orm import joinedload, selectinload
+
 from src.models.books import BookModel
+from src.models.reviews import ReviewModel
+from src.models.users import BookAuthorModel, UserModel, book_authors_books, favorite_books
 from src.repositories.base import BaseRepository
 from src.repositories.mappers.mappers import BookDataMapper
+from src.repositories.mixins import CachedRepositoryMixin
+from src.utils.cursors import decode_cursor, encode_cursor
+
+SEARCH_TS_CONFIG = "russian"
 
 
-class BooksRepository(BaseRepository):
+class BooksRepository(CachedRepositoryMixin, BaseRepository):
     model = BookModel
     mapper = BookDataMapper
+    cache_ttl = 60
+    # Один-к-одному - JOIN в основном запросе, коллекции - один IN-запрос на связь
+    load_options = {
+        "uploader": joinedload(BookModel.uploader).load_only(UserModel.id, UserModel.nickname),
+        "authors": selectinload(BookModel.authors),
+        "reviews": selectinload(BookModel.reviews),
+        "fans": selectinload(BookModel.fans).load_only(UserModel.id, UserModel.nickname),
+    }
+    load_projections = {
+        "reviews_count": select(func.count())
+        .where(ReviewModel.book_id == BookModel.id)
+        .correlate(BookModel)
+        .scalar_subquery(),
+        "fans_count": select(func.count())
+        .where(favorite_books.c.book_id == BookModel.id)
+        .correlate(BookModel)
+        .scalar_subquery(),
+    }
+
+    async def search(self, query: str, limit: int = 20, cursor: str | None = None):
+        ts_query = func.websearch_to_tsquery(literal(SEARCH_TS_CONFIG, type_=REGCONFIG), query)
+
+        # Два кандидата, каждый идет по своему GIN-индексу: полнотекстовый по
+        # названию/описанию и триграммный (опечатки) по имени автора
+        text_hits = select(
+            BookModel.id.label("book_id"),
+            func.ts_rank_cd(BookModel.search_vector, ts_query).label("score"),
+        ).where(BookModel.search_vector.op("@@")(ts_query))
+        author_hits = (
+            select(
+                book_authors_books.c.book_id,
+                func.similarity(BookAuthorModel.full_name, literal(query)).label("score"),
+            )
+            .join(BookAuthorModel, BookAuthorModel.id == book_authors_books.c.author_id)
+            .where(BookAuthorModel.full_name.op("%")(literal(query)))
+        )
+        candidates = union_all(text_hits, author_hits).subquery("candidates")
+        scored = (
+            select(candidates.c.book_id, func.sum(candidates.c.score).label("score"))
+            .group_by(candidates.c.book_id)
+            .subquery("scored")
+        )
+
+        stmt = (
+            select(BookModel, scored.c.score)
+            .join(scored, scored.c.book_id == BookModel.id)
+            .order_by(scored.c.score.desc(), BookModel.id.desc())
+            .limit(limit)
+        )
+        if cursor is not None:
+            last_score, last_id = decode_cursor(cursor, float, int)
+            stmt = stmt.where(
+                or_(
+                    scored.c.score < last_score,
+                    and_(scored.c.score == last_score, BookModel.id < last_id),
+                )
+            )
+
+        result = await self.session.execute(stmt)
+        rows = result.all()
+        books = self.mapper.map_many([book for book, _ in rows], trusted=self.trusted_reads)
 
+        next_cursor = None
+        if len(rows) == limit:
+            last_book, last_score = rows[-1]
+            next_cursor = encode_cursor(float(last_score), last_book.id)
+        return books, next_cursor
@@ -0,0 +1,120 @@
+from typing import AsyncIterator, Iterable
+
+from sqlalchemy import delete, func, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+
+from src.exceptions import ObjectNotFoundException
+from src.models.books import BookModel
+from src.models.users import favorite_books
+from src.repositories.mappers.mappers import BookDataMapper
+from src.repositories.mixins import CachedRepositoryMixin
+from src.schemas.books import Book
+
+
+class FavoritesRepository(CachedRepositoryMixin):
+    """Избранное пользователя поверх таблицы favorite_books.
+
+    Множество id избранных книг кешируется целиком на пользователя, поэтому
+    проверки "в избранном ли" - это поиск в множестве, а не запрос к БД.
+    """
+
+    table = favorite_books
+    mapper = BookDataMapper
+    cache_ttl = 300
+
+    def __init__(self, session):
+        self.session = session
+
+    @staticmethod
+    def user_namespace(user_id: int) -> str:
+        return f"favorite_books:{user_id}"
+
+    async def add(self, user_id: int, book_id: int) -> bool:
+        stmt = (
+            pg_insert(self.table)
+            .values(user_id=user_id, book_id=book_id)
+            .on_conflict_do_nothing()
+            .returning(self.table.c.book_id)
+        )
+        try:
+            result = await self.session.execute(stmt)
+        except IntegrityError:
+            # Нарушен внешний ключ: нет такой книги или пользователя
+            raise ObjectNotFoundException
+        added = result.scalar_one_or_none() is not None
+        if added:
+            # Общее пространство - для счетчиков и списков фанатов в каталоге
+            await self._on_write(self.user_namespace(user_id), self.table.name)
+        return added
+
+    async def remove(self, user_id: int, book_id: int) -> bool:
+        stmt = delete(self.table).where(
+            self.table.c.user_id == user_id, self.table.c.book_id == book_id
+        )
+        result = await self.session.execute(stmt)
+        removed = result.rowcount > 0
+        if removed:
+            await self._on_write(self.user_namespace(user_id), self.table.name)
+        return removed
+
+    async def get_book_ids(self, user_id: int) -> frozenset[int]:
+        return await self.cached(
+            "book_ids",
+            {"user_id": user_id},
+            lambda: self._load_book_ids(user_id),
+            frozenset[int],
+            namespaces=(self.user_namespace(user_id),),
+        )
+
+    async def _load_book_ids(self, user_id: int) -> frozenset[int]:
+        query = select(self.table.c.book_id).where(self.table.c.user_id == user_id)
+        result = await self.session.execute(query)
+        return frozenset(result.scalars().all())
+
+    async def contains(self, user_id: int, book_id: int) -> bool:
+        return book_id in await self.get_book_ids(user_id)
+
+    async def contains_many(self, user_id: int, book_ids: Iterable[int]) -> dict[int, bool]:
+        # Одно обращение к кешу (или один запрос при промахе) на всю страницу книг
+        favorites = await self.get_book_ids(user_id)
+        return {book_id: book_id in favorites for book_id in book_ids}
+
+    async def get_books(
+        self, user_id: int, after_id: int | None = None, limit: int = 50
+    ) -> list[Book]:
+        # Идет по первичному ключу (user_id, book_id) без сортировки
+        query = (
+            select(BookModel)
+            .join(self.table, self.table.c.book_id == BookModel.id)
+            .where(self.table.c.user_id == user_id)
+            .order_by(self.table.c.book_id)
+            .limit(limit)
+        )
+        if after_id is not None:
+            query = query.where(self.table.c.book_id > after_id)
+        result = await self.session.execute(query)
+        return self.mapper.map_many(result.scalars().all(), trusted=True)
+
+    async def count_fans(self, book_id: int) -> int:
+        query = select(func.count()).select_from(self.table).where(self.table.c.book_id == book_id)
+        return await self.session.scalar(query)
+
+    async def iter_fan_ids(self, book_id: int, chunk_size: int = 1000) -> AsyncIterator[list[int]]:
+        # Keyset по индексу (book_id, user_id): фанатов может быть много, в память их не тянем
+        after_id = None
+        while True:
+            query = (
+                select(self.table.c.user_id)
+                .where(self.table.c.book_id == book_id)
+                .order_by(self.table.c.user_id)
+                .limit(chunk_size)
+            )
+            if after_id is not None:
+                query = query.where(self.table.c.user_id > after_id)
+            user_ids = list((await self.session.scalars(query)).all())
+            if user_ids:
+                yield user_ids
+            if len(user_ids) < chunk_size:
+                return
+            after_id = user_ids[-1]
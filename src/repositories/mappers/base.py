@@ -1,6 +1,8 @@
-from typing import Type
+from operator import attrgetter
+from typing import Iterable, Type
 
-from pydantic import BaseModel
+from pydantic import BaseModel, TypeAdapter
+from sqlalchemy import inspect as sa_inspect
 
 from src.core.db import Base
 
@@ -9,9 +11,76 @@ class DataMapper:
     schema: Type[BaseModel]
 
     @classmethod
-    def map_to_domain_entity(cls, data) -> BaseModel:
-        return cls.schema.model_validate(data, from_attributes=True)
+    def map_to_domain_entity(cls, data, trusted: bool = False, extra: dict | None = None) -> BaseModel:
+        if not isinstance(data, cls.db_model):
+            return cls.schema.model_validate(data, from_attributes=True)
+        values = cls._column_values(data)
+        values.update(cls._loaded_relationships(data))
+        if extra:
+            values.update(extra)
+        if trusted:
+            # Доверенный путь для строк из нашей БД: без валидации верхнего уровня
+            return cls.schema.model_construct(**values)
+        return cls.schema.model_validate(values)
+
+    @classmethod
+    def map_many(cls, data: Iterable, trusted: bool = False) -> list[BaseModel]:
+        if trusted and not cls._relationship_adapters():
+            construct = cls._construct
+            return [construct(row) for row in data]
+        mapper = cls.map_to_domain_entity
+        return [mapper(row, trusted=trusted) for row in data]
 
     @classmethod
     def map_to_persistence_entity(cls, data) -> Base:
-        return cls.db_model(**data.model_dump(exclude_unset=True))
\ No newline at end of file
+        return cls.db_model(**data.model_dump(exclude_unset=True))
+
+    @classmethod
+    def _column_accessor(cls) -> tuple[tuple[str, ...], attrgetter]:
+        # Считаем один раз на класс маппера: какие поля схемы являются колонками модели
+        accessor = cls.__dict__.get("_trusted_accessor")
+        if accessor is None:
+            columns = set(sa_inspect(cls.db_model).column_attrs.keys())
+            fields = tuple(name for name in cls.schema.model_fields if name in columns)
+            getter = attrgetter(*fields) if len(fields) > 1 else (lambda row: (getattr(row, fields[0]),))
+            accessor = (fields, getter)
+            cls._trusted_accessor = accessor
+        return accessor
+
+    @classmethod
+    def _relationship_adapters(cls) -> dict[str, TypeAdapter]:
+        # Поля схемы, которые соответствуют связям модели, и адаптеры для их типов
+        adapters = cls.__dict__.get("_relationship_adapters_cache")
+        if adapters is None:
+            relationships = set(sa_inspect(cls.db_model).relationships.keys())
+            adapters = {
+                name: TypeAdapter(field.annotation)
+                for name, field in cls.schema.model_fields.items()
+                if name in relationships
+            }
+            cls._relationship_adapters_cache = adapters
+        return adapters
+
+    @classmethod
+    def _column_values(cls, data) -> dict:
+        fields, getter = cls._column_accessor()
+        return dict(zip(fields, getter(data)))
+
+    @classmethod
+    def _loaded_relationships(cls, data) -> dict:
+        # Читаем только связи, загруженные планом запроса: обращение к
+        # незагруженной связи в async-сессии означало бы ленивый запрос
+        adapters = cls._relationship_adapters()
+        if not adapters:
+            return {}
+        unloaded = sa_inspect(data).unloaded
+        return {
+            name: adapter.validate_python(getattr(data, name), from_attributes=True)
+            for name, adapter in adapters.items()
+            if name not in unloaded
+        }
+
+    @classmethod
+    def _construct(cls, data) -> BaseModel:
+        # Только колонки: поля-связи не читаются, чтобы не вызвать ленивую загрузку
+        return cls.schema.model_construct(**cls._column_values(data))
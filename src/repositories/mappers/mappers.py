@@ -1,8 +1,10 @@
 from src.models.books import BookModel
-from src.models.users import UserModel
+from src.models.reviews import BookRatingModel, ReviewModel
+from src.models.users import RefreshTokenModel, UserModel
 from src.repositories.mappers.base import DataMapper
 from src.schemas.books import Book
-from src.schemas.users import User, UserWithHashedPassword
+from src.schemas.reviews import BookRating, Review
+from src.schemas.users import RefreshToken, User, UserWithHashedPassword
 
 
 class UserDataMapper(DataMapper):
@@ -14,6 +16,22 @@ class UserWithHashedPasswordDataMapper(DataMapper):
     db_model = UserModel
     schema = UserWithHashedPassword
 
+
+class RefreshTokenDataMapper(DataMapper):
+    db_model = RefreshTokenModel
+    schema = RefreshToken
+
+
 class BookDataMapper(DataMapper):
     db_model = BookModel
-    schema = Book
\ No newline at end of file
+    schema = Book
+
+
+class ReviewDataMapper(DataMapper):
+    db_model = ReviewModel
+    schema = Review
+
+
+class BookRatingDataMapper(DataMapper):
+    db_model = BookRatingModel
+    schema = BookRating
@@ -0,0 +1,98 @@
+import hashlib
+from functools import cache
+from typing import Any, Awaitable, Callable, Iterable
+
+from pydantic import TypeAdapter
+
+from src.core.cache import RepositoryCache, get_repository_cache
+from src.core.dataloader import clear_loaders
+from src.core.db_routing import read_from_primary
+from src.exceptions import ObjectNotFoundException
+
+PENDING_INVALIDATIONS_KEY = "cache_pending_invalidations"
+
+
+@cache
+def _adapter(type_) -> TypeAdapter:
+    return TypeAdapter(type_)
+
+
+class CachedRepositoryMixin:
+    """Read-through кеш для get_one/get_one_or_none, подключается наследованием
+    перед BaseRepository. Запись через add/update/delete инвалидирует кеш модели."""
+
+    cache_ttl: int = 60
+    cache: RepositoryCache | None = None
+
+    @property
+    def cache_namespace(self) -> str:
+        return self.model.__tablename__
+
+    def _get_cache(self) -> RepositoryCache:
+        return self.cache or get_repository_cache()
+
+    async def cached(
+        self,
+        method: str,
+        params: dict,
+        loader: Callable[[], Awaitable[Any]],
+        result_type,
+        namespaces: tuple[str, ...] | None = None,
+        ttl: int | None = None,
+    ):
+        # Значения фильтров (например, email) не должны попадать в ключ открытым текстом
+        if self.session.info.get(PENDING_INVALIDATIONS_KEY):
+            # Сессия уже писала: ее чтения видят незакоммиченные строки, в общий кеш им нельзя
+            return await loader()
+        params_digest = hashlib.sha256(repr(sorted(params.items())).encode()).hexdigest()[:32]
+        key_parts = (method, params_digest)
+
+        async def load_from_primary():
+            # Поколение уже новое, а реплика могла не догнать коммит
+            with read_from_primary():
+                return await loader()
+
+        return await self._get_cache().get_or_load(
+            namespaces=namespaces or (self.cache_namespace,),
+            key_parts=key_parts,
+            loader=load_from_primary,
+            adapter=_adapter(result_type),
+            ttl=ttl or self.cache_ttl,
+        )
+
+    async def get_one_or_none(self, load: Iterable[str] = (), **filter):
+        if load:
+            # Связи в кеш не кладем: их состав зависит от плана загрузки
+            return await super().get_one_or_none(load=load, **filter)
+        return await self.cached(
+            "get_one_or_none",
+            filter,
+            lambda: super(CachedRepositoryMixin, self).get_one_or_none(**filter),
+            self.mapper.schema | None,
+        )
+
+    async def get_one(self, load: Iterable[str] = (), **filter_by):
+        obj = await self.get_one_or_none(load=load, **filter_by)
+        if obj is None:
+            raise ObjectNotFoundException
+        return obj
+
+    async def _on_write(self, *namespaces: str):
+        await register_write(self.session, self._get_cache(), namespaces or (self.cache_namespace,))
+
+
+async def register_write(session, repository_cache: RepositoryCache, namespaces: Iterable[str]):
+    # Сразу - чтобы ETag и кеш других запросов сменились вместе с записью,
+    # и после коммита или отката - чтобы параллельный запрос не закешировал старое повторно
+    await repository_cache.invalidate(*namespaces)
+    # Запомненные загрузчиком объекты этой сессии тоже устарели
+    clear_loaders(session, namespaces)
+    session.info.setdefault(PENDING_INVALIDATIONS_KEY, {}).setdefault(repository_cache, set()).update(namespaces)
+
+
+async def flush_pending_invalidations(session):
+    pending = session.info.pop(PENDING_INVALIDATIONS_KEY, None)
+    if not pending:
+        return
+    for repository_cache, namespaces in pending.items():
+        await repository_cache.invalidate(*namespaces)
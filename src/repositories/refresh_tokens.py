@@ -0,0 +1,61 @@
+from datetime import datetime
+
+from sqlalchemy import select, update
+
+from src.models.users import RefreshTokenModel
+from src.repositories.base import BaseRepository
+from src.repositories.mappers.mappers import RefreshTokenDataMapper
+from src.schemas.users import RefreshToken
+
+
+class RefreshTokensRepository(BaseRepository):
+    """Поиск только по уникальному token_hash: один индексный запрос на обновление."""
+
+    model = RefreshTokenModel
+    mapper = RefreshTokenDataMapper
+    trusted_reads = True
+
+    async def _on_write(self, *namespaces: str):
+        # Таблица не кешируется и не участвует в ETag - поколения не трогаем
+        pass
+
+    async def consume(self, token_hash: str, now: datetime) -> RefreshToken | None:
+        """Атомарно помечает действующий токен использованным.
+
+        None - токена нет, он истек, отозван или уже использован: при
+        параллельной ротации одним токеном пройдет только один запрос.
+        """
+        stmt = (
+            update(self.model)
+            .where(
+                self.model.token_hash == token_hash,
+                self.model.used_at.is_(None),
+                self.model.revoked_at.is_(None),
+                self.model.expires_at > now,
+            )
+            .values(used_at=now)
+            .returning(self.model)
+        )
+        result = await self.session.execute(stmt)
+        row = result.scalar_one_or_none()
+        return None if row is None else self.mapper.map_to_domain_entity(row, trusted=True)
+
+    async def get_by_hash(self, token_hash: str) -> RefreshToken | None:
+        result = await self.session.execute(select(self.model).filter_by(token_hash=token_hash))
+        row = result.scalar_one_or_none()
+        return None if row is None else self.mapper.map_to_domain_entity(row, trusted=True)
+
+    async def revoke_family(self, family_id: str, now: datetime) -> int:
+        stmt = (
+            update(self.model)
+            .where(self.model.family_id == family_id, self.model.revoked_at.is_(None))
+            .values(revoked_at=now)
+        )
+        result = await self.session.execute(stmt)
+        return result.rowcount
+
+    async def delete_expired(self, now: datetime) -> int:
+        result = await self.session.execute(
+            self.model.__table__.delete().where(self.model.expires_at <= now)
+        )
+        return result.rowcount
@@ -0,0 +1,150 @@
+from collections import Counter
+
+from pydantic import BaseModel
+from sqlalchemy import delete, func, literal, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from src.models.books import BookModel
+from src.models.reviews import MAX_RATING, MIN_RATING, BookRatingModel, ReviewModel
+from src.repositories.base import BaseRepository
+from src.repositories.mappers.mappers import BookDataMapper, BookRatingDataMapper, ReviewDataMapper
+from src.schemas.reviews import RatedBook
+
+RATING_COLUMNS = [f"rating_{value}" for value in range(MIN_RATING, MAX_RATING + 1)]
+
+
+class BookRatingsRepository(BaseRepository):
+    model = BookRatingModel
+    mapper = BookRatingDataMapper
+    trusted_reads = True
+
+    async def apply_deltas(self, deltas: Counter):
+        """deltas: (book_id, rating) -> +n/-n отзывов. Один upsert на книгу."""
+        per_book: dict[int, dict[str, int]] = {}
+        for (book_id, rating), count in deltas.items():
+            if not count:
+                continue
+            values = per_book.setdefault(book_id, {"reviews_count": 0, "rating_sum": 0})
+            values["reviews_count"] += count
+            values["rating_sum"] += rating * count
+            values[f"rating_{rating}"] = values.get(f"rating_{rating}", 0) + count
+
+        table = self.model.__table__
+        for book_id, values in per_book.items():
+            initial = {
+                column: max(values.get(column, 0), 0)
+                for column in ("reviews_count", "rating_sum", *RATING_COLUMNS)
+            }
+            stmt = pg_insert(table).values(book_id=book_id, **initial)
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[table.c.book_id],
+                set_={column: table.c[column] + delta for column, delta in values.items()},
+            )
+            await self.session.execute(stmt)
+
+    async def reconcile(self, book_ids: list[int] | None = None) -> int:
+        """Пересчитывает агрегаты по таблице reviews. Для периодической сверки."""
+        reviews = ReviewModel.__table__
+        aggregates = select(
+            reviews.c.book_id,
+            func.count().label("reviews_count"),
+            func.coalesce(func.sum(reviews.c.rating), 0).label("rating_sum"),
+            *[
+                func.count().filter(reviews.c.rating == value).label(f"rating_{value}")
+                for value in range(MIN_RATING, MAX_RATING + 1)
+            ],
+        ).group_by(reviews.c.book_id)
+        if book_ids is not None:
+            aggregates = aggregates.where(reviews.c.book_id.in_(book_ids))
+
+        table = self.model.__table__
+        columns = ["book_id", "reviews_count", "rating_sum", *RATING_COLUMNS]
+        upsert = pg_insert(table).from_select(columns, aggregates)
+        upsert = upsert.on_conflict_do_update(
+            index_elements=[table.c.book_id],
+            set_={column: upsert.excluded[column] for column in columns[1:]},
+        )
+        result = await self.session.execute(upsert)
+
+        # Книги, у которых отзывов больше нет
+        stale = delete(table).where(
+            ~select(literal(1)).where(reviews.c.book_id == table.c.book_id).exists()
+        )
+        if book_ids is not None:
+            stale = stale.where(table.c.book_id.in_(book_ids))
+        await self.session.execute(stale)
+        # Страницы рейтингов кешируются по поколению reviews (RATINGS_PAGE)
+        await self._on_write(self.model.__tablename__, ReviewModel.__tablename__)
+        return result.rowcount
+
+    async def _rated_books(self, order_by, limit: int, *where) -> list[RatedBook]:
+        query = (
+            select(BookModel, self.model)
+            .join(self.model, self.model.book_id == BookModel.id)
+            .where(*where)
+            .order_by(*order_by)
+            .limit(limit)
+        )
+        result = await self.session.execute(query)
+        return [
+            RatedBook(
+                book=BookDataMapper.map_to_domain_entity(book),
+                rating=self.mapper.map_to_domain_entity(rating, trusted=True),
+            )
+            for book, rating in result.all()
+        ]
+
+    async def get_top_rated(self, limit: int = 20, min_reviews: int = 1) -> list[RatedBook]:
+        return await self._rated_books(
+            (self.model.average_rating.desc(), self.model.reviews_count.desc()),
+            limit,
+            self.model.reviews_count >= min_reviews,
+        )
+
+    async def get_most_reviewed(self, limit: int = 20) -> list[RatedBook]:
+        return await self._rated_books((self.model.reviews_count.desc(),), limit)
+
+
+class ReviewsRepository(BaseRepository):
+    model = ReviewModel
+    mapper = ReviewDataMapper
+
+    def __init__(self, session):
+        super().__init__(session)
+        self.ratings = BookRatingsRepository(session)
+
+    async def _lock_ratings(self, **filter) -> list[tuple[int, int]]:
+        query = select(self.model.book_id, self.model.rating).filter_by(**filter).with_for_update()
+        result = await self.session.execute(query)
+        return [tuple(row) for row in result.all()]
+
+    async def add(self, data: BaseModel):
+        created = await super().add(data)
+        await self.ratings.apply_deltas(Counter({(created.book_id, created.rating): 1}))
+        return created
+
+    async def add_bulk(self, data, chunk_size: int = 1000, on_conflict_do_nothing: bool = False):
+        data = list(data)
+        ids = await super().add_bulk(
+            data, chunk_size=chunk_size, on_conflict_do_nothing=on_conflict_do_nothing
+        )
+        if on_conflict_do_nothing and len(ids) != len(data):
+            # Неизвестно, какие строки пропущены - пересчитываем затронутые книги
+            await self.ratings.reconcile(sorted({item.book_id for item in data}))
+        else:
+            await self.ratings.apply_deltas(Counter((item.book_id, item.rating) for item in data))
+        return ids
+
+    async def update(self, data: BaseModel, **filter):
+        before = await self._lock_ratings(**filter)
+        edited = await super().update(data, **filter)
+        deltas = Counter(before)
+        deltas.subtract({(edited.book_id, edited.rating): 1})
+        await self.ratings.apply_deltas(Counter({key: -count for key, count in deltas.items()}))
+        return edited
+
+    async def delete(self, **filter):
+        before = await self._lock_ratings(**filter)
+        await super().delete(**filter)
+        await self.ratings.apply_deltas(Counter({key: -count for key, count in Counter(before).items()}))
+        return True
@@ -0,0 +1,40 @@
+from typing import Annotated
+
+from pydantic import BaseModel, Field, field_validator
+
+# Как у book_authors.full_name: длинное имя отклоняем здесь, а не ошибкой всего пакета в БД
+AuthorName = Annotated[str, Field(max_length=255)]
+
+
+class BookImportRow(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: str | None = None
+    file_path: str = Field(..., min_length=1, max_length=500)
+    author_id: int = Field(..., description="id пользователя, загрузившего книгу")
+    authors: list[AuthorName] = Field(default_factory=list)
+
+    @field_validator("authors", mode="before")
+    @classmethod
+    def split_authors(cls, value):
+        # В CSV авторы приходят одной строкой через ";"
+        if isinstance(value, str):
+            value = value.split(";")
+        return [name.strip() for name in value or [] if name and name.strip()]
+
+
+class BookImportProgress(BaseModel):
+    rows_read: int = 0
+    rows_imported: int = 0
+    rows_skipped: int = 0
+    books_inserted: int = 0
+    books_updated: int = 0
+    authors_inserted: int = 0
+    links_inserted: int = 0
+    elapsed_seconds: float = 0.0
+    errors: list[str] = Field(default_factory=list)
+
+    @property
+    def rows_per_second(self) -> float:
+        if not self.elapsed_seconds:
+            return 0.0
+        return self.rows_imported / self.elapsed_seconds
@@ -1,5 +1,26 @@
+from typing import Literal
+
 from pydantic import BaseModel, Field
 
+from src.schemas.users import UserPublic
+
+# Что можно догрузить к книге одним планом запроса, см. BooksRepository.load_options
+BookInclude = Literal["uploader", "authors", "reviews", "fans", "reviews_count", "fans_count"]
+
+
+class BookAuthor(BaseModel):
+    id: int
+    full_name: str
+    birth_year: int | None = None
+    death_year: int | None = None
+
+
+class BookReview(BaseModel):
+    id: int
+    user_id: int
+    text: str
+    rating: int
+
 
 class Book(BaseModel):
     id: int = Field(...)
@@ -7,7 +28,24 @@ class Book(BaseModel):
     description: str | None = None
     file_path: str = Field(...)
     author_id: int = Field(...)
-    uploader: int = Field(...)
-    authors: list[str] | None = None
-    reviews: list[str] | None = None
-    fans: list[str] | None = None
\ No newline at end of file
+    # Связи и агрегаты заполняются, только если их запросили в плане загрузки
+    uploader: UserPublic | None = None
+    authors: list[BookAuthor] | None = None
+    reviews: list[BookReview] | None = None
+    fans: list[UserPublic] | None = None
+    reviews_count: int | None = None
+    fans_count: int | None = None
+
+
+class BookRequestAdd(BaseModel):
+    title: str = Field(..., min_length=1, max_length=255)
+    description: str | None = None
+    # Ключ файла, полученный от POST /books/files
+    file_key: str = Field(..., min_length=1, max_length=500)
+
+
+class BookAdd(BaseModel):
+    title: str
+    description: str | None = None
+    file_path: str
+    author_id: int
@@ -0,0 +1,46 @@
+from pydantic import BaseModel, Field, computed_field
+
+from src.models.reviews import MAX_RATING, MIN_RATING
+from src.schemas.books import Book
+
+
+class ReviewAdd(BaseModel):
+    user_id: int
+    book_id: int
+    text: str = Field(..., min_length=1)
+    rating: int = Field(..., ge=MIN_RATING, le=MAX_RATING)
+
+
+class ReviewRequestAdd(BaseModel):
+    text: str = Field(..., min_length=1)
+    rating: int = Field(..., ge=MIN_RATING, le=MAX_RATING)
+
+
+class ReviewPatch(BaseModel):
+    text: str | None = Field(None, min_length=1)
+    rating: int | None = Field(None, ge=MIN_RATING, le=MAX_RATING)
+
+
+class Review(ReviewAdd):
+    id: int
+
+
+class BookRating(BaseModel):
+    book_id: int
+    reviews_count: int = 0
+    average_rating: float = 0.0
+    rating_1: int = 0
+    rating_2: int = 0
+    rating_3: int = 0
+    rating_4: int = 0
+    rating_5: int = 0
+
+    @computed_field
+    @property
+    def histogram(self) -> dict[int, int]:
+        return {value: getattr(self, f"rating_{value}") for value in range(MIN_RATING, MAX_RATING + 1)}
+
+
+class RatedBook(BaseModel):
+    book: Book
+    rating: BookRating
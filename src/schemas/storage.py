@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class StoredFile(BaseModel):
+    key: str
+    size: int
+    sha256: str
+    # False - такой файл уже был в хранилище, загрузка дедуплицирована
+    created: bool = True
+
+    @property
+    def etag(self) -> str:
+        return f'"{self.sha256}"'
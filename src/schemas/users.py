@@ -1,4 +1,4 @@
-from datetime import date
+from datetime import date, datetime
 
 from pydantic import BaseModel, Field, EmailStr, constr
 
@@ -24,11 +24,20 @@ class UserAdd(BaseModel):
     role: RoleEnum = Field(default=RoleEnum.user)
 
 
+class UserPasswordUpdate(BaseModel):
+    hashed_password: str
+
+
 class UserLogin(BaseModel):
     email: EmailStr
     password: str
 
 
+class UserPublic(BaseModel):
+    id: int
+    nickname: str
+
+
 class User(BaseModel):
     id: int
     first_name: str
@@ -40,4 +49,17 @@ class User(BaseModel):
 
 
 class UserWithHashedPassword(User):
-    hashed_password: str
\ No newline at end of file
+    hashed_password: str
+
+
+class RefreshTokenAdd(BaseModel):
+    user_id: int
+    family_id: str
+    token_hash: str
+    expires_at: datetime
+
+
+class RefreshToken(RefreshTokenAdd):
+    id: int
+    used_at: datetime | None = None
+    revoked_at: datetime | None = None
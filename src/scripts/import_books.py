@@ -0,0 +1,37 @@
+import argparse
+import asyncio
+import logging
+
+from src.core.db import dispose_db, get_session_maker
+from src.core.db_manager import DBManager
+from src.core.logs import configure_logging
+from src.services.book_import import BookImportService
+
+
+async def main(path: str, fmt: str | None, chunk_size: int):
+    async with DBManager(session_factory=get_session_maker()) as db:
+        service = BookImportService(db)
+        service.chunk_size = chunk_size
+        progress = await service.import_file(path, fmt)
+    await dispose_db()
+
+    logging.info(
+        "Импорт завершен: %d строк за %.1fс (%.0f строк/с)",
+        progress.rows_imported,
+        progress.elapsed_seconds,
+        progress.rows_per_second,
+        extra={"progress": progress.model_dump(exclude={"errors"})},
+    )
+    for error in progress.errors:
+        logging.warning(error)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Импорт каталога книг из CSV/JSONL")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=["csv", "jsonl"], default=None)
+    parser.add_argument("--chunk-size", type=int, default=BookImportService.chunk_size)
+    args = parser.parse_args()
+
+    configure_logging()
+    asyncio.run(main(args.path, args.format, args.chunk_size))
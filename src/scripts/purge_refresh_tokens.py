@@ -0,0 +1,21 @@
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+from src.core.db import dispose_db, get_session_maker
+from src.core.db_manager import DBManager
+from src.core.logs import configure_logging
+
+
+async def main():
+    # Истекшие токены не нужны даже для обнаружения повторного использования
+    async with DBManager(session_factory=get_session_maker()) as db:
+        deleted = await db.refresh_tokens.delete_expired(datetime.now(timezone.utc))
+        await db.commit()
+    await dispose_db()
+    logging.info("Удалено истекших refresh-токенов: %s", deleted)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(main())
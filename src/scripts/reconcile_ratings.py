@@ -0,0 +1,19 @@
+import asyncio
+import logging
+
+from src.core.db import dispose_db, get_session_maker
+from src.core.db_manager import DBManager
+from src.core.logs import configure_logging
+
+
+async def main():
+    async with DBManager(session_factory=get_session_maker()) as db:
+        updated = await db.ratings.reconcile()
+        await db.commit()
+    await dispose_db()
+    logging.info("Сверка рейтингов завершена, обновлено книг: %s", updated)
+
+
+if __name__ == "__main__":
+    configure_logging()
+    asyncio.run(main())
@@ -0,0 +1,53 @@
+import argparse
+import asyncio
+import logging
+import signal
+
+from src.core.config import settings
+from src.core.db import dispose_db, init_db
+from src.core.logs import configure_logging
+from src.core.tasks import Worker, task_queue
+# Импорт регистрирует задачи в task_queue
+from src.tasks import auth, books, feed  # noqa: F401
+
+
+def parse_concurrency(values: list[str] | None) -> dict[str, int]:
+    if not values:
+        return dict(settings.TASK_QUEUE_CONCURRENCY)
+    concurrency = {}
+    for value in values:
+        queue, _, limit = value.partition("=")
+        concurrency[queue] = int(limit or 1)
+    return concurrency
+
+
+async def main(concurrency: dict[str, int]):
+    init_db(role="worker")
+    worker = Worker(
+        task_queue,
+        concurrency,
+        visibility_timeout=settings.TASK_VISIBILITY_TIMEOUT_SECONDS,
+    )
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, lambda: asyncio.ensure_future(worker.stop()))
+
+    logging.info("Воркер запущен, очереди: %s", concurrency)
+    try:
+        await worker.run()
+    finally:
+        await task_queue.broker.close()
+        await dispose_db()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Воркер фоновых задач")
+    parser.add_argument(
+        "--queue",
+        action="append",
+        help="Очередь и лимит параллельности, например files=2. По умолчанию TASK_QUEUE_CONCURRENCY",
+    )
+    args = parser.parse_args()
+
+    configure_logging()
+    asyncio.run(main(parse_concurrency(args.queue)))
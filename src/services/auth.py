@@ -1,25 +1,45 @@
+import hashlib
 import logging
+import math
+import secrets
+import time
 from datetime import datetime, timedelta, timezone, date
 
 from fastapi import HTTPException
 import jwt
-from passlib.context import CryptContext
 from sqlalchemy.exc import NoResultFound
 
 from src.core.config import settings
+from src.core.instrumentation import record_timing
+from src.core.metrics import registry
+from src.core.rate_limit import get_login_rate_limiter
 from src.exceptions import (
     EmailIsAlreadyRegisteredException,
     NicknameIsEmptyException,
     ObjectNotFoundException,
     LoginErrorException,
+    InvalidRefreshTokenException,
+    RefreshTokenReuseException,
 )
 from src.models.users import RoleEnum
-from src.schemas.users import UserRequestAddRegister, UserAdd, UserLogin
+from src.schemas.users import UserRequestAddRegister, UserAdd, UserLogin, RefreshTokenAdd
 from src.services.base import BaseService
+from src.services.favorites import FavoritesService
+from src.tasks.auth import rehash_password
+from src.utils.hashing import password_hasher
+from src.utils.token_cache import token_claims_cache, token_denylist
+
+refresh_requests_total = registry.counter(
+    "auth_refresh_requests_total",
+    "Обновления токена доступа по refresh-токену",
+    labelnames=("result",),
+)
 
 
 class AuthService(BaseService):
-    pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+    hasher = password_hasher
+    claims_cache = token_claims_cache
+    denylist = token_denylist
 
     def create_access_token(self, data: dict) -> str:
         logging.debug("Create access token")
@@ -36,14 +56,14 @@ class AuthService(BaseService):
             )
             return encoded_jwt
         except Exception as e:
-            logging.error(f"Token creation failed: {e}")
+            logging.error("Token creation failed: %s", e)
             raise
 
-    def verify_password(self, plain_password, hashed_password):
-        return self.pwd_context.verify(plain_password, hashed_password)
+    async def verify_password(self, plain_password, hashed_password) -> bool:
+        return await self.hasher.verify(plain_password, hashed_password)
 
-    def hash_password(self, password: str) -> str:
-        return self.pwd_context.hash(password)
+    async def hash_password(self, password: str) -> str:
+        return await self.hasher.hash(password)
 
     def decode_token(self, token: str) -> dict:
         logging.debug("Decode token")
@@ -53,62 +73,152 @@ class AuthService(BaseService):
                 settings.JWT_SECRET_KEY.get_secret_value(),
                 algorithms=[settings.JWT_ALGORITHM],
             )
-            logging.info("Token decoded")
+            logging.debug("Token decoded")
             return result
-        except jwt.exceptions.InvalidSignatureError:
-            logging.error("Invalid token")
+        except jwt.exceptions.ExpiredSignatureError:
+            logging.info("Token expired")
+            raise HTTPException(status_code=401, detail="Срок действия токена истек")
+        except jwt.exceptions.InvalidTokenError:
+            logging.warning("Invalid token")
             raise HTTPException(status_code=401, detail="Ошибка: Неверная подпись(токен)")
 
+    async def get_token_claims(self, token: str) -> dict:
+        started = time.perf_counter()
+        claims = self.claims_cache.get(token)
+        if claims is None:
+            claims = self.decode_token(token)
+            # Отозванный на другом воркере токен виден здесь не позже TTL кеша claims
+            if await self.denylist.is_revoked(token):
+                raise HTTPException(status_code=401, detail="Токен отозван")
+            self.claims_cache.put(token, claims)
+        record_timing("auth", time.perf_counter() - started)
+        return claims
+
+    async def revoke_token(self, token: str):
+        self.claims_cache.invalidate(token)
+        try:
+            claims = self.decode_token(token)
+        except HTTPException:
+            # Истекший или поддельный токен и так не пройдет проверку
+            return
+        exp = claims.get("exp")
+        ttl = settings.ACCESS_TOKEN_EXPIRE_MINUTES * 60 if exp is None else math.ceil(exp - time.time())
+        if ttl > 0:
+            await self.denylist.revoke(token, ttl)
+
+    @staticmethod
+    def hash_refresh_token(token: str) -> str:
+        # В токене 256 случайных бит: перебор не грозит, argon2 не нужен
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    async def issue_refresh_token(self, user_id: int, family_id: str | None = None) -> str:
+        token = secrets.token_urlsafe(32)
+        await self.db.refresh_tokens.add(
+            RefreshTokenAdd(
+                user_id=user_id,
+                family_id=family_id or secrets.token_hex(16),
+                token_hash=self.hash_refresh_token(token),
+                expires_at=datetime.now(timezone.utc) + timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS),
+            )
+        )
+        return token
+
+    async def refresh_access_token(self, refresh_token: str) -> dict:
+        now = datetime.now(timezone.utc)
+        token_hash = self.hash_refresh_token(refresh_token)
+        consumed = await self.db.refresh_tokens.consume(token_hash, now)
+        if consumed is None:
+            stored = await self.db.refresh_tokens.get_by_hash(token_hash)
+            if stored is not None and stored.used_at is not None and stored.revoked_at is None:
+                # Использованный токен пришел еще раз - одна из копий украдена, отзываем весь вход
+                await self.db.refresh_tokens.revoke_family(stored.family_id, now)
+                await self.db.commit()
+                logging.warning("Повторное использование refresh-токена", extra={"user_id": stored.user_id})
+                refresh_requests_total.labels(result="reused").inc()
+                raise RefreshTokenReuseException
+            refresh_requests_total.labels(result="invalid").inc()
+            raise InvalidRefreshTokenException
+
+        new_refresh_token = await self.issue_refresh_token(consumed.user_id, consumed.family_id)
+        await self.db.commit()
+        refresh_requests_total.labels(result="rotated").inc()
+        return {
+            'access_token': self.create_access_token({"user_id": consumed.user_id}),
+            'refresh_token': new_refresh_token,
+        }
+
+    async def revoke_refresh_token(self, refresh_token: str):
+        stored = await self.db.refresh_tokens.get_by_hash(self.hash_refresh_token(refresh_token))
+        if stored is None:
+            return
+        await self.db.refresh_tokens.revoke_family(stored.family_id, datetime.now(timezone.utc))
+        await self.db.commit()
+
     async def register_user(self, data: UserRequestAddRegister):
-        logging.info(f"Начинаем регистрацию пользователя с почтой: {data.email}")
+        logging.debug("Начинаем регистрацию пользователя с почтой: %s", data.email)
 
         if data.birth_day and (date.today() - data.birth_day).days < 18 * 365:
-            logging.warning(f"Пользователь младше 18, {data.birth_day}")
+            logging.warning("Пользователь младше 18, %s", data.birth_day)
             raise HTTPException(status_code=400, detail="Возраст должен быть 18+")
 
         if not data.nickname.strip():
-            logging.warning(f"Пустой ник во время регистрации для почты, {data.email}")
+            logging.warning("Пустой ник во время регистрации для почты, %s", data.email)
             raise NicknameIsEmptyException
 
+        hashed_password = await self.hash_password(data.password)
         new_user = UserAdd(
             first_name=data.first_name,
             last_name=data.last_name,
             nickname=data.nickname,
             birth_day=data.birth_day,
             email=data.email,
-            hashed_password=self.hash_password(data.password),
+            hashed_password=hashed_password,
             role=RoleEnum.user,
         )
 
         try:
             await self.db.users.add(new_user)
             await self.db.commit()
-            logging.info(f"Пользователь успешно зарегистрировался с почтой={new_user.email}")
+            logging.info("Пользователь успешно зарегистрировался с почтой=%s", new_user.email)
             return {"message": "Вы успешно зарегистрировались!"}
         except ObjectNotFoundException:
-            logging.warning(f"Пользователь ввел уже существующую почту, {new_user.email}")
+            logging.warning("Пользователь ввел уже существующую почту, %s", new_user.email)
             raise EmailIsAlreadyRegisteredException
 
-    async def login_and_get_access_token(self, data: UserLogin):
-        logging.info(f"Login and get access token for email: {data.email}")
+    async def login_and_get_access_token(self, data: UserLogin, client_ip: str | None = None):
+        logging.debug("Login and get access token for email: %s", data.email)
+        limiter = get_login_rate_limiter()
+        # Отсекаем перебор до запроса в БД и argon2
+        await limiter.check(client_ip, data.email)
         try:
             user = await self.db.users.get_user_with_hashed_password(user_email=data.email)
         except NoResultFound:
-            logging.warning(f"Неверная почта или пароль для пользователя {data.email}")
+            logging.warning("Неверная почта или пароль для пользователя %s", data.email)
+            await limiter.register_failure(client_ip, data.email)
             raise LoginErrorException
 
-        if not self.verify_password(data.password, user.hashed_password):
-            logging.warning(f"Неверная почта или пароль для пользователя {data.email}")
+        if not await self.verify_password(data.password, user.hashed_password):
+            logging.warning("Неверная почта или пароль для пользователя %s", data.email)
+            await limiter.register_failure(client_ip, data.email)
             raise LoginErrorException
+        await limiter.reset(data.email)
+
+        if self.hasher.needs_update(user.hashed_password):
+            # Пересчет хеша - еще один argon2, не задерживаем им ответ на логин
+            await rehash_password.enqueue(
+                user.id, data.password, user.hashed_password, task_id=str(user.id)
+            )
 
         token = self.create_access_token({"user_id": user.id})
+        refresh_token = await self.issue_refresh_token(user.id)
+        await self.db.commit()
 
-        logging.info(f"Login successful: {data.email}, user_id={user.id}")
-        return {'access_token': token}
+        logging.info("Login successful: %s", data.email, extra={"user_id": user.id})
+        return {'access_token': token, 'refresh_token': refresh_token}
 
-    async def get_favourite_books(self, user_id: int):
-        logging.info(f"Get favourite books for user {user_id}")
-        return await self.db.users.get_favourite_books(user_id=user_id)
+    async def get_favourite_books(self, user_id: int, after_id: int | None = None, limit: int = 50):
+        logging.debug("Get favourite books for user %s", user_id)
+        return await FavoritesService(self.db).get_books(user_id, after_id=after_id, limit=limit)
 
     async def get_one_or_none_user(self, user_id: int):
-        return await self.db.users.get_one_or_none(user_id)
\ No newline at end of file
+        return await self.db.users.get_one_or_none(id=user_id)
\ No newline at end of file
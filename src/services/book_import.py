@@ -0,0 +1,185 @@
+import csv
+import json
+import logging
+import time
+from itertools import islice
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Literal, NamedTuple
+
+from pydantic import ValidationError
+from sqlalchemy import text
+
+from src.schemas.book_import import BookImportProgress, BookImportRow
+from src.services.base import BaseService
+from src.tasks.books import clean_search_index
+
+ImportFormat = Literal["csv", "jsonl"]
+
+STAGING_TABLE = "staging_book_import"
+STAGING_COLUMNS = ("row_no", "title", "description", "file_path", "author_id", "authors")
+MAX_REPORTED_ERRORS = 100
+
+
+class MalformedRow(NamedTuple):
+    """Строка файла, которую не удалось разобрать: пропускается, как невалидная."""
+
+    error: str
+
+
+def iter_import_rows(path: str | Path, fmt: ImportFormat | None = None) -> Iterator[dict | MalformedRow]:
+    path = Path(path)
+    fmt = fmt or ("jsonl" if path.suffix in (".jsonl", ".ndjson") else "csv")
+    with path.open(encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            yield from csv.DictReader(f)
+        else:
+            for line in f:
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError as e:
+                    yield MalformedRow(f"неверный JSON: {e.msg}")
+
+
+class BookImportService(BaseService):
+    """Потоковый импорт каталога: чанк -> COPY во временную таблицу -> upsert.
+
+    В памяти одновременно находится только один чанк, дубликаты разрешаются
+    через ON CONFLICT, а не роняют весь импорт.
+    """
+
+    chunk_size = 10_000
+
+    async def import_rows(
+        self,
+        rows: Iterable[dict],
+        on_progress: Callable[[BookImportProgress], None] | None = None,
+    ) -> BookImportProgress:
+        progress = BookImportProgress()
+        started = time.perf_counter()
+
+        rows = iter(rows)
+        while chunk := list(islice(rows, self.chunk_size)):
+            records = self._validate_chunk(chunk, progress)
+            if records:
+                # Один чанк - одна короткая транзакция
+                await self._import_chunk(records, progress)
+                await self.db.commit()
+
+            progress.elapsed_seconds = time.perf_counter() - started
+            logging.info(
+                "Импорт книг: прочитано=%s импортировано=%s пропущено=%s, %.0f строк/с",
+                progress.rows_read,
+                progress.rows_imported,
+                progress.rows_skipped,
+                progress.rows_per_second,
+            )
+            if on_progress is not None:
+                on_progress(progress)
+
+        progress.elapsed_seconds = time.perf_counter() - started
+        if progress.rows_imported:
+            await clean_search_index.enqueue()
+        return progress
+
+    async def import_file(
+        self,
+        path: str | Path,
+        fmt: ImportFormat | None = None,
+        on_progress: Callable[[BookImportProgress], None] | None = None,
+    ) -> BookImportProgress:
+        return await self.import_rows(iter_import_rows(path, fmt), on_progress=on_progress)
+
+    @staticmethod
+    def _skip_row(progress: BookImportProgress, error: str):
+        progress.rows_skipped += 1
+        if len(progress.errors) < MAX_REPORTED_ERRORS:
+            progress.errors.append(f"строка {progress.rows_read}: {error}")
+
+    def _validate_chunk(self, chunk: list[dict | MalformedRow], progress: BookImportProgress) -> list[tuple]:
+        records = []
+        for raw in chunk:
+            progress.rows_read += 1
+            if isinstance(raw, MalformedRow):
+                self._skip_row(progress, raw.error)
+                continue
+            try:
+                row = BookImportRow.model_validate(raw)
+            except ValidationError as e:
+                self._skip_row(progress, e.errors()[0]['msg'])
+                continue
+            records.append(
+                (progress.rows_read, row.title, row.description, row.file_path, row.author_id, row.authors)
+            )
+        return records
+
+    async def _create_staging_table(self):
+        # ON COMMIT DROP: после коммита сессия может вернуть соединение в пул
+        await self.db.session.execute(text(f"""
+            CREATE TEMP TABLE {STAGING_TABLE} (
+                row_no bigint NOT NULL,
+                title varchar(255) NOT NULL,
+                description text,
+                file_path varchar(500) NOT NULL,
+                author_id integer NOT NULL,
+                authors text[] NOT NULL
+            ) ON COMMIT DROP
+        """))
+
+    async def _copy_to_staging(self, records: list[tuple]):
+        connection = await self.db.session.connection()
+        raw_connection = await connection.get_raw_connection()
+        await raw_connection.driver_connection.copy_records_to_table(
+            STAGING_TABLE, records=records, columns=STAGING_COLUMNS
+        )
+
+    async def _import_chunk(self, records: list[tuple], progress: BookImportProgress):
+        session = self.db.session
+        await self._create_staging_table()
+        await self._copy_to_staging(records)
+
+        # Строки с несуществующим загрузчиком иначе уронили бы весь чанк на внешнем ключе
+        result = await session.execute(text(f"""
+            DELETE FROM {STAGING_TABLE} s
+            WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.id = s.author_id)
+        """))
+        orphaned = result.rowcount
+        progress.rows_skipped += orphaned
+        if orphaned and len(progress.errors) < MAX_REPORTED_ERRORS:
+            progress.errors.append(f"{orphaned} строк с несуществующим author_id")
+
+        result = await session.execute(text(f"""
+            INSERT INTO book_authors (full_name)
+            SELECT DISTINCT name FROM {STAGING_TABLE}, unnest(authors) AS name
+            ON CONFLICT (full_name) DO NOTHING
+        """))
+        progress.authors_inserted += result.rowcount
+
+        # Внутри чанка побеждает последняя строка с тем же file_path
+        result = await session.execute(text(f"""
+            INSERT INTO books (title, description, file_path, author_id)
+            SELECT DISTINCT ON (file_path) title, description, file_path, author_id
+            FROM {STAGING_TABLE}
+            ORDER BY file_path, row_no DESC
+            ON CONFLICT (file_path) DO UPDATE
+                SET title = EXCLUDED.title, description = EXCLUDED.description
+            RETURNING (xmax = 0) AS inserted
+        """))
+        inserted = result.scalars().all()
+        progress.books_inserted += sum(inserted)
+        progress.books_updated += len(inserted) - sum(inserted)
+
+        result = await session.execute(text(f"""
+            INSERT INTO book_authors_books (book_id, author_id)
+            SELECT DISTINCT b.id, a.id
+            FROM {STAGING_TABLE} s
+            CROSS JOIN LATERAL unnest(s.authors) AS n(full_name)
+            JOIN books b ON b.file_path = s.file_path
+            JOIN book_authors a ON a.full_name = n.full_name
+            ON CONFLICT DO NOTHING
+        """))
+        progress.links_inserted += result.rowcount
+        progress.rows_imported += len(records) - orphaned
+
+        await self.db.books._on_write("books", "book_authors")
@@ -1,6 +1,96 @@
+import logging
+from typing import AsyncIterable, AsyncIterator, Iterable
+
+from src.core.config import settings
+from src.core.storage import FileStorage, get_storage, is_content_key
+from src.exceptions import BookAlreadyExistsException, ObjectNotFoundException, StoredFileNotFoundException
+from src.schemas.books import Book, BookAdd, BookInclude, BookRequestAdd
+from src.schemas.pagination import CursorPage, KeysetPage
+from src.schemas.reviews import RatedBook, Review, ReviewAdd, ReviewRequestAdd
+from src.schemas.storage import StoredFile
 from src.services.base import BaseService
+from src.tasks.books import verify_book_file
+from src.tasks.feed import fan_out_review
 
 
 class BooksService(BaseService):
-    async def create_book(self):
-        pass
\ No newline at end of file
+    storage: FileStorage | None = None
+
+    def get_file_storage(self) -> FileStorage:
+        return self.storage or get_storage()
+
+    async def upload_file(self, chunks: AsyncIterable[bytes], content_type: str | None = None) -> StoredFile:
+        stored = await self.get_file_storage().save(
+            chunks, content_type=content_type, max_size=settings.STORAGE_MAX_UPLOAD_BYTES
+        )
+        logging.info(
+            "Загружен файл %s, %d байт",
+            stored.key,
+            stored.size,
+            extra={"storage_key": stored.key, "size": stored.size, "created": stored.created},
+        )
+        return stored
+
+    async def create_book(self, user_id: int, data: BookRequestAdd) -> Book:
+        # Принимаем только ключи, выданные save: иначе можно сослаться на любой файл хранилища
+        if not is_content_key(data.file_key) or await self.get_file_storage().stat(data.file_key) is None:
+            raise StoredFileNotFoundException
+        new_book = BookAdd(
+            title=data.title,
+            description=data.description,
+            file_path=data.file_key,
+            author_id=user_id,
+        )
+        try:
+            book = await self.db.books.add(new_book)
+        except ObjectNotFoundException:
+            # Файлы адресуются по содержимому: тот же файл - та же книга
+            raise BookAlreadyExistsException
+        await self.db.commit()
+        await verify_book_file.enqueue(book.file_path, task_id=book.file_path)
+        return book
+
+    async def add_review(self, user_id: int, book_id: int, data: ReviewRequestAdd) -> Review:
+        await self.db.books.get_one(id=book_id)
+        review = await self.db.reviews.add(
+            ReviewAdd(user_id=user_id, book_id=book_id, text=data.text, rating=data.rating)
+        )
+        await self.db.commit()
+        # Рассылка по лентам фанатов - после коммита и вне запроса
+        await fan_out_review.enqueue(review.id, book_id, user_id, task_id=str(review.id))
+        return review
+
+    async def get_book_file(self, book_id: int) -> tuple[Book, StoredFile]:
+        book = await self.db.books.get_one(id=book_id)
+        stored = await self.get_file_storage().stat(book.file_path)
+        if stored is None:
+            raise StoredFileNotFoundException
+        return book, stored
+
+    async def get_books(
+        self, after_id: int | None = None, limit: int = 50, include: Iterable[BookInclude] = ()
+    ) -> KeysetPage[Book]:
+        books = await self.db.books.get_all(after_id=after_id, limit=limit, load=include)
+        next_after_id = books[-1].id if len(books) == limit else None
+        return KeysetPage[Book](items=books, next_after_id=next_after_id)
+
+    def stream_books(
+        self, after_id: int | None = None, include: Iterable[BookInclude] = ()
+    ) -> AsyncIterator[Book]:
+        return self.db.books.stream_filtered(after_id=after_id, load=include)
+
+    async def get_book(self, book_id: int, include: Iterable[BookInclude] = ()) -> Book:
+        return await self.db.books.get_one(load=include, id=book_id)
+
+    async def search_books(self, query: str, limit: int = 20, cursor: str | None = None) -> CursorPage[Book]:
+        query = query.strip()
+        if not query:
+            return CursorPage[Book](items=[])
+        books, next_cursor = await self.db.books.search(query, limit=limit, cursor=cursor)
+        return CursorPage[Book](items=books, next_cursor=next_cursor)
+
+    async def get_top_rated(self, limit: int = 20, min_reviews: int = 1) -> list[RatedBook]:
+        return await self.db.ratings.get_top_rated(limit=limit, min_reviews=min_reviews)
+
+    async def get_most_reviewed(self, limit: int = 20) -> list[RatedBook]:
+        return await self.db.ratings.get_most_reviewed(limit=limit)
@@ -0,0 +1,29 @@
+import logging
+from typing import Iterable
+
+from src.schemas.books import Book
+from src.schemas.pagination import KeysetPage
+from src.services.base import BaseService
+
+
+class FavoritesService(BaseService):
+    async def add_book(self, user_id: int, book_id: int) -> bool:
+        added = await self.db.favorites.add(user_id, book_id)
+        await self.db.commit()
+        logging.debug("Книга %s добавлена в избранное пользователя %s: %s", book_id, user_id, added)
+        return added
+
+    async def remove_book(self, user_id: int, book_id: int) -> bool:
+        removed = await self.db.favorites.remove(user_id, book_id)
+        await self.db.commit()
+        return removed
+
+    async def get_books(
+        self, user_id: int, after_id: int | None = None, limit: int = 50
+    ) -> KeysetPage[Book]:
+        books = await self.db.favorites.get_books(user_id, after_id=after_id, limit=limit)
+        next_after_id = books[-1].id if len(books) == limit else None
+        return KeysetPage[Book](items=books, next_after_id=next_after_id)
+
+    async def contains(self, user_id: int, book_ids: Iterable[int]) -> dict[int, bool]:
+        return await self.db.favorites.contains_many(user_id, book_ids)
@@ -0,0 +1,98 @@
+import heapq
+import logging
+
+from src.core.config import settings
+from src.core.feed import (
+    TimelineStore,
+    feed_deliveries_total,
+    feed_read_sources,
+    feed_reviews_total,
+    get_timeline_store,
+)
+from src.schemas.pagination import CursorPage
+from src.schemas.reviews import Review
+from src.services.base import BaseService
+from src.utils.cursors import decode_cursor, encode_cursor
+
+HOT_BOOKS_KEY = "hot_books"
+
+
+def user_timeline(user_id: int) -> str:
+    return f"user:{user_id}"
+
+
+def book_timeline(book_id: int) -> str:
+    return f"book:{book_id}"
+
+
+class FeedService(BaseService):
+    """Лента новых отзывов на избранные книги.
+
+    Обычные книги - fan-out on write: id отзыва дописывается в ленты всех фанатов.
+    Книги, у которых фанатов больше FEED_FANOUT_MAX_FANS, попадают в hot_books,
+    и их лента подмешивается при чтении (fan-out on read). Отзывы идут по
+    убыванию id, курсор - последний отданный id.
+    """
+
+    store: TimelineStore | None = None
+
+    def _get_store(self) -> TimelineStore:
+        return self.store or get_timeline_store()
+
+    async def fan_out_review(self, review_id: int, book_id: int, author_id: int) -> int:
+        store = self._get_store()
+        max_length, ttl = settings.FEED_MAX_LENGTH, settings.FEED_TTL_SECONDS
+        # Лента книги ведется всегда: из нее читают фанаты популярных книг
+        await store.add([book_timeline(book_id)], review_id, max_length, ttl)
+
+        if await self.db.favorites.count_fans(book_id) > settings.FEED_FANOUT_MAX_FANS:
+            # Пока книга получает отзывы, она остается в hot_books: ее старые отзывы
+            # есть только в ленте книги, и выпадать из лент фанатов им нельзя.
+            # Score - id отзыва: при обрезке уходят книги, давно не получавшие отзывов
+            await store.add([HOT_BOOKS_KEY], book_id, settings.FEED_HOT_BOOKS_LIMIT, ttl, score=review_id)
+            feed_reviews_total.labels(mode="read").inc()
+            return 0
+
+        delivered = 0
+        async for user_ids in self.db.favorites.iter_fan_ids(book_id, settings.FEED_FANOUT_CHUNK_SIZE):
+            keys = [user_timeline(user_id) for user_id in user_ids if user_id != author_id]
+            await store.add(keys, review_id, max_length, ttl)
+            delivered += len(keys)
+        feed_reviews_total.labels(mode="write").inc()
+        feed_deliveries_total.inc(delivered)
+        logging.debug("Отзыв %s разослан по %d лентам", review_id, delivered)
+        return delivered
+
+    async def get_feed(self, user_id: int, cursor: str | None = None, limit: int = 20) -> CursorPage[Review]:
+        before = decode_cursor(cursor, int)[0] if cursor else None
+        store = self._get_store()
+
+        # Множество избранного закешировано: чтение не зависит от числа избранных книг
+        favorites = await self.db.favorites.get_book_ids(user_id)
+        [hot_books] = await store.range_many([HOT_BOOKS_KEY], None, settings.FEED_HOT_BOOKS_LIMIT)
+        keys = [user_timeline(user_id), *(book_timeline(book_id) for book_id in hot_books if book_id in favorites)]
+        feed_read_sources.observe(len(keys))
+
+        pages = await store.range_many(keys, before, limit)
+        review_ids = []
+        for review_id in heapq.merge(*pages, reverse=True):
+            if not review_ids or review_ids[-1] != review_id:
+                review_ids.append(review_id)
+            if len(review_ids) == limit:
+                break
+        if not review_ids:
+            return CursorPage[Review](items=[])
+
+        loaded = await self.db.reviews.loader.load_many(review_ids)
+        reviews = {review.id: review for review in loaded if review is not None}
+        # Удаленные отзывы и книги, убранные из избранного после рассылки, пропускаем:
+        # страница может оказаться короче limit
+        items = [
+            reviews[review_id]
+            for review_id in review_ids
+            if review_id in reviews
+            and reviews[review_id].book_id in favorites
+            and reviews[review_id].user_id != user_id
+        ]
+        next_cursor = encode_cursor(review_ids[-1]) if len(review_ids) == limit else None
+        return CursorPage[Review](items=items, next_cursor=next_cursor)
@@ -0,0 +1,26 @@
+import logging
+
+from src.core.db import get_session_maker
+from src.core.db_manager import DBManager
+from src.core.tasks import task_queue
+from src.exceptions import ObjectNotFoundException
+from src.schemas.users import UserPasswordUpdate
+from src.utils.hashing import password_hasher
+
+
+# local=True: пароль в аргументах не должен попадать во внешний брокер
+@task_queue.task("auth.rehash_password", local=True, max_retries=2)
+async def rehash_password(user_id: int, password: str, old_hashed_password: str):
+    hashed_password = await password_hasher.hash(password)
+    async with DBManager(session_factory=get_session_maker()) as db:
+        try:
+            # Если пароль успели сменить, старый хеш уже не совпадет
+            await db.users.update(
+                UserPasswordUpdate(hashed_password=hashed_password),
+                id=user_id,
+                hashed_password=old_hashed_password,
+            )
+        except ObjectNotFoundException:
+            return
+        await db.commit()
+    logging.info("Хеш пароля пользователя %s обновлен до текущих параметров argon2", user_id)
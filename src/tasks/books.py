@@ -0,0 +1,44 @@
+import hashlib
+import logging
+
+from sqlalchemy import text
+
+from src.core.db import get_session_maker
+from src.core.db_manager import DBManager
+from src.core.storage import get_storage, sha256_from_key
+from src.core.tasks import task_queue
+
+SEARCH_INDEXES = ("ix_books_search_vector", "ix_book_authors_full_name_trgm")
+
+
+@task_queue.task("books.verify_file", queue="files", max_retries=5, backoff=5.0)
+async def verify_book_file(key: str):
+    storage = get_storage()
+    digest = hashlib.sha256()
+    async for chunk in storage.iter_range(key):
+        digest.update(chunk)
+    if digest.hexdigest() != sha256_from_key(key):
+        # Повтор не поможет: содержимое не совпадает с адресом
+        logging.error("Файл %s поврежден: sha256 не совпадает с ключом", key)
+        return
+    logging.debug("Файл %s проверен", key)
+
+
+@task_queue.task("books.clean_search_index", queue="maintenance", max_retries=2, backoff=30.0)
+async def clean_search_index():
+    # После массовой вставки GIN-индексы копят pending list (fastupdate), а поиск
+    # просматривает его линейно. Переносим его в основное дерево вне запросов.
+    async with DBManager(session_factory=get_session_maker()) as db:
+        for index in SEARCH_INDEXES:
+            await db.session.execute(
+                text("SELECT gin_clean_pending_list(CAST(:index AS regclass))"), {"index": index}
+            )
+        await db.commit()
+
+
+@task_queue.task("ratings.reconcile", queue="maintenance", max_retries=3, backoff=10.0)
+async def reconcile_ratings(book_ids: list[int] | None = None):
+    async with DBManager(session_factory=get_session_maker()) as db:
+        updated = await db.ratings.reconcile(book_ids)
+        await db.commit()
+    logging.info("Сверка рейтингов: обновлено книг %s", updated)
@@ -0,0 +1,11 @@
+from src.core.db import get_session_maker
+from src.core.db_manager import DBManager
+from src.core.tasks import task_queue
+from src.services.feed import FeedService
+
+
+@task_queue.task("feed.fan_out_review", queue="feed", max_retries=5, backoff=2.0)
+async def fan_out_review(review_id: int, book_id: int, author_id: int):
+    # Повтор безопасен: добавление id в ленту идемпотентно
+    async with DBManager(session_factory=get_session_maker()) as db:
+        await FeedService(db).fan_out_review(review_id, book_id, author_id)
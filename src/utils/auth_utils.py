@@ -12,8 +12,8 @@ def get_token(request: Request) -> str:
     return access_token
 
 
-def get_current_user_id(token=Depends(get_token)) -> int:
-    data = AuthService().decode_token(token)
+async def get_current_user_id(token=Depends(get_token)) -> int:
+    data = await AuthService().get_token_claims(token)
     return data["user_id"]
 
 
@@ -0,0 +1,33 @@
+import base64
+import json
+import math
+
+from src.exceptions import InvalidCursorException
+
+
+def encode_cursor(*values) -> str:
+    raw = json.dumps(values, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _matches(value, type_: type) -> bool:
+    # bool - подкласс int; целое число допустимо там, где ждем float
+    if isinstance(value, bool):
+        return False
+    if type_ is float:
+        return isinstance(value, (int, float)) and math.isfinite(value)
+    return isinstance(value, type_)
+
+
+def decode_cursor(cursor: str, *types: type) -> list:
+    """Значения курсора с проверкой типов: курсор приходит от клиента и идет в SQL."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        values = json.loads(raw)
+    except ValueError:
+        raise InvalidCursorException
+    if not isinstance(values, list) or len(values) != len(types):
+        raise InvalidCursorException
+    if not all(_matches(value, type_) for value, type_ in zip(values, types)):
+        raise InvalidCursorException
+    return values
@@ -0,0 +1,101 @@
+import mimetypes
+import re
+from urllib.parse import quote
+
+from fastapi import Request, Response
+from fastapi.responses import FileResponse, StreamingResponse
+
+from src.core.storage import FileStorage
+from src.schemas.storage import StoredFile
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    # Для If-None-Match сравнение слабое: W/"x" совпадает с "x"
+    candidates = (tag.strip().removeprefix("W/") for tag in if_none_match.split(","))
+    return etag in candidates
+
+
+def parse_range(header: str | None, size: int) -> tuple[int, int] | None:
+    """Один диапазон из заголовка Range -> (start, end) с end не включительно.
+
+    None - заголовка нет или он нам не подходит (несколько диапазонов), отдаем файл целиком.
+    ValueError - диапазон за пределами файла (416).
+    """
+    if not header:
+        return None
+    match = _RANGE_RE.match(header.strip())
+    if match is None:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # bytes=-500: последние 500 байт
+        suffix = int(last)
+        if suffix == 0:
+            raise ValueError(header)
+        return max(size - suffix, 0), size
+    start = int(first)
+    end = min(int(last) + 1, size) if last else size
+    if start >= size or start >= end:
+        raise ValueError(header)
+    return start, end
+
+
+def content_disposition(filename: str) -> str:
+    quoted = quote(filename)
+    if quoted != filename:
+        return f"attachment; filename*=utf-8''{quoted}"
+    return f'attachment; filename="{filename}"'
+
+
+def file_response(
+    request: Request,
+    storage: FileStorage,
+    stored: StoredFile,
+    filename: str | None = None,
+) -> Response:
+    media_type = mimetypes.guess_type(stored.key)[0] or "application/octet-stream"
+    # Содержимое неизменяемо (ключ = хеш), поэтому ETag сильный и кешировать можно долго
+    headers = {"ETag": stored.etag, "Cache-Control": "private, max-age=86400"}
+
+    if etag_matches(request.headers.get("if-none-match"), stored.etag):
+        return Response(status_code=304, headers=headers)
+
+    local_path = storage.local_path(stored.key)
+    if local_path is not None:
+        # Range/If-Range обрабатывает сам FileResponse, а при поддержке сервером
+        # расширения http.response.pathsend файл отдается без копирования в процесс
+        return FileResponse(local_path, headers=headers, media_type=media_type, filename=filename)
+
+    headers["Accept-Ranges"] = "bytes"
+    if filename is not None:
+        headers["Content-Disposition"] = content_disposition(filename)
+
+    byte_range = None
+    if_range = request.headers.get("if-range")
+    if if_range is None or if_range == stored.etag:
+        try:
+            byte_range = parse_range(request.headers.get("range"), stored.size)
+        except ValueError:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{stored.size}"})
+
+    if byte_range is None:
+        headers["Content-Length"] = str(stored.size)
+        return StreamingResponse(storage.iter_range(stored.key), media_type=media_type, headers=headers)
+
+    start, end = byte_range
+    headers["Content-Range"] = f"bytes {start}-{end - 1}/{stored.size}"
+    headers["Content-Length"] = str(end - start)
+    return StreamingResponse(
+        storage.iter_range(stored.key, start, end),
+        status_code=206,
+        media_type=media_type,
+        headers=headers,
+    )
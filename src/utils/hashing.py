@@ -0,0 +1,149 @@
+import asyncio
+import logging
+import threading
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+
+from passlib.context import CryptContext
+
+from src.core.config import settings
+from src.core.instrumentation import record_timing
+from src.core.metrics import registry
+from src.exceptions import PasswordHasherBusyException
+
+pwd_context = CryptContext(schemes=["argon2"], deprecated="auto")
+
+hash_queue_wait_seconds = registry.histogram(
+    "password_hash_queue_wait_seconds",
+    "Время ожидания задачи хеширования в очереди пула",
+    labelnames=("operation",),
+)
+hash_duration_seconds = registry.histogram(
+    "password_hash_duration_seconds",
+    "Время выполнения argon2 в воркере",
+    labelnames=("operation",),
+)
+hash_rejected_total = registry.counter(
+    "password_hash_rejected_total",
+    "Задачи хеширования, отклоненные из-за переполнения очереди",
+    labelnames=("operation",),
+)
+hash_in_flight = registry.gauge(
+    "password_hash_in_flight",
+    "Задачи хеширования в очереди и в работе",
+)
+
+
+# Функции уровня модуля, чтобы их можно было передать в ProcessPoolExecutor.
+# time.monotonic() общий для всех процессов, поэтому ожидание считается корректно.
+def _hash_job(password: str, submitted_at: float) -> tuple[str, float, float]:
+    started_at = time.monotonic()
+    hashed = pwd_context.hash(password)
+    return hashed, started_at - submitted_at, time.monotonic() - started_at
+
+
+def _verify_job(password: str, hashed_password: str, submitted_at: float) -> tuple[bool, float, float]:
+    started_at = time.monotonic()
+    verified = pwd_context.verify(password, hashed_password)
+    return verified, started_at - submitted_at, time.monotonic() - started_at
+
+
+def _load_backend_job() -> str:
+    # passlib подгружает backend argon2 при первом обращении к хешеру
+    return pwd_context.handler().get_backend()
+
+
+class PasswordHasher:
+    def __init__(self, executor: str = "thread", max_workers: int = 4, max_queue: int = 32):
+        if executor not in ("thread", "process"):
+            raise ValueError(f"Неизвестный тип пула: {executor}")
+        self.executor_kind = executor
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor: Executor | None = None
+        self._executor_lock = threading.Lock()
+        self._in_flight = 0
+
+    @property
+    def capacity(self) -> int:
+        return self.max_workers + self.max_queue
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    def _get_executor(self) -> Executor:
+        if self._executor is None:
+            with self._executor_lock:
+                if self._executor is None:
+                    if self.executor_kind == "process":
+                        self._executor = ProcessPoolExecutor(max_workers=self.max_workers)
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers, thread_name_prefix="password-hasher"
+                        )
+        return self._executor
+
+    async def _submit(self, operation: str, func, *args):
+        # Счетчик меняется только из event loop, поэтому блокировка не нужна
+        if self._in_flight >= self.capacity:
+            hash_rejected_total.labels(operation=operation).inc()
+            logging.warning("Пул хеширования переполнен, операция %s отклонена", operation)
+            raise PasswordHasherBusyException
+
+        loop = asyncio.get_running_loop()
+        job = self._get_executor().submit(func, *args, time.monotonic())
+        self._in_flight += 1
+        hash_in_flight.inc()
+        # Слот освобождает сама задача: отмена запроса не останавливает argon2 в пуле
+        job.add_done_callback(lambda _: self._release_threadsafe(loop))
+        result, waited, took = await asyncio.wrap_future(job)
+
+        record_timing("password_hash", waited + took)
+        hash_queue_wait_seconds.labels(operation=operation).observe(waited)
+        hash_duration_seconds.labels(operation=operation).observe(took)
+        return result
+
+    def _release(self):
+        self._in_flight -= 1
+        hash_in_flight.dec()
+
+    def _release_threadsafe(self, loop: asyncio.AbstractEventLoop):
+        # Колбэк приходит из потока пула
+        try:
+            loop.call_soon_threadsafe(self._release)
+        except RuntimeError:
+            # Event loop уже закрыт - считать больше некому
+            pass
+
+    async def hash(self, password: str) -> str:
+        return await self._submit("hash", _hash_job, password)
+
+    async def verify(self, password: str, hashed_password: str) -> bool:
+        return await self._submit("verify", _verify_job, password, hashed_password)
+
+    async def warm_up(self):
+        # Запускаем воркеры пула и загружаем в них backend до первого входа
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(loop.run_in_executor(executor, _load_backend_job) for _ in range(self.max_workers)))
+
+    def needs_update(self, hashed_password: str) -> bool:
+        # Только разбор параметров хеша, без argon2 - можно вызывать в event loop
+        try:
+            return pwd_context.needs_update(hashed_password)
+        except ValueError:
+            return False
+
+    def shutdown(self, wait: bool = True):
+        with self._executor_lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=wait, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher(
+    executor=settings.PASSWORD_HASHER_EXECUTOR,
+    max_workers=settings.PASSWORD_HASHER_WORKERS,
+    max_queue=settings.PASSWORD_HASHER_MAX_QUEUE,
+)
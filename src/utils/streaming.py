@@ -0,0 +1,28 @@
+from typing import AsyncIterator, Literal
+
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel
+
+StreamFormat = Literal["ndjson", "json"]
+
+
+async def _iter_ndjson(items: AsyncIterator[BaseModel]) -> AsyncIterator[bytes]:
+    async for item in items:
+        yield item.model_dump_json().encode() + b"\n"
+
+
+async def _iter_json_array(items: AsyncIterator[BaseModel]) -> AsyncIterator[bytes]:
+    yield b"["
+    first = True
+    async for item in items:
+        if not first:
+            yield b","
+        first = False
+        yield item.model_dump_json().encode()
+    yield b"]"
+
+
+def stream_models(items: AsyncIterator[BaseModel], fmt: StreamFormat = "ndjson") -> StreamingResponse:
+    if fmt == "json":
+        return StreamingResponse(_iter_json_array(items), media_type="application/json")
+    return StreamingResponse(_iter_ndjson(items), media_type="application/x-ndjson")
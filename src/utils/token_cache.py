@@ -0,0 +1,104 @@
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from src.core.cache import CacheBackend, cache_errors_total, get_repository_cache
+from src.core.config import settings
+from src.core.metrics import registry
+
+token_cache_requests_total = registry.counter(
+    "token_claims_cache_requests_total",
+    "Обращения к кешу проверенных JWT",
+    labelnames=("result",),
+)
+
+
+class TokenClaimsCache:
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: OrderedDict[bytes, tuple[float, dict]] = OrderedDict()
+
+    @staticmethod
+    def _key(token: str) -> bytes:
+        # Храним дайджест, а не сам токен
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, token: str) -> dict | None:
+        key = self._key(token)
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                expires_at, claims = entry
+                if expires_at > now:
+                    self._entries.move_to_end(key)
+                    token_cache_requests_total.labels(result="hit").inc()
+                    return claims
+                del self._entries[key]
+        token_cache_requests_total.labels(result="miss").inc()
+        return None
+
+    def put(self, token: str, claims: dict):
+        expires_at = time.time() + self.ttl
+        exp = claims.get("exp")
+        if exp is not None:
+            expires_at = min(expires_at, float(exp))
+        if expires_at <= time.time():
+            return
+
+        key = self._key(token)
+        with self._lock:
+            self._entries[key] = (expires_at, claims)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, token: str):
+        with self._lock:
+            self._entries.pop(self._key(token), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TokenDenylist:
+    """JWT, отозванные до истечения (выход из системы). Общие для воркеров через
+    backend кеша; запись живет, пока токен еще был бы действителен."""
+
+    def __init__(self, backend: CacheBackend | None = None, prefix: str = "auth:revoked"):
+        self.backend = backend
+        self.prefix = prefix
+
+    def _get_backend(self) -> CacheBackend:
+        return self.backend or get_repository_cache().backend
+
+    def _key(self, token: str) -> str:
+        return f"{self.prefix}:{hashlib.sha256(token.encode()).hexdigest()}"
+
+    async def revoke(self, token: str, ttl: int):
+        await self._get_backend().set(self._key(token), b"1", ttl)
+
+    async def is_revoked(self, token: str) -> bool:
+        try:
+            return await self._get_backend().get(self._key(token)) is not None
+        except Exception:
+            # Как и кеш: при недоступном Redis не блокируем вход всем
+            cache_errors_total.inc()
+            logging.exception("Не удалось проверить отзыв токена")
+            return False
+
+
+token_denylist = TokenDenylist()
+
+token_claims_cache = TokenClaimsCache(
+    maxsize=settings.TOKEN_CACHE_MAXSIZE,
+    ttl=settings.TOKEN_CACHE_TTL_SECONDS,
+)
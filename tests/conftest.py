@@ -0,0 +1,89 @@
+# Импорты ниже блока окружения - намеренно
+# ruff: noqa: E402
+import os
+
+# Настройки читаются при импорте src, поэтому задаем их до первого импорта
+for _key, _value in {
+    "MODE": "TEST",
+    "DB_HOST": "localhost",
+    "DB_PORT": "5432",
+    "DB_USER": "test",
+    "DB_PASS": "test",
+    "DB_NAME": "test",
+    "REDIS_HOST": "localhost",
+    "REDIS_PORT": "6379",
+    "JWT_SECRET_KEY": "test",
+    "JWT_ALGORITHM": "HS256",
+    "CACHE_BACKEND": "memory",
+    "TASK_BROKER": "memory",
+    "RATE_LIMIT_BACKEND": "memory",
+    "FEED_BACKEND": "memory",
+}.items():
+    os.environ.setdefault(_key, _value)
+
+from contextlib import contextmanager
+
+import pytest
+import pytest_asyncio
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.pool import StaticPool
+
+from src.core.cache import InMemoryCacheBackend, RepositoryCache, set_repository_cache
+from src.core.db import Base
+from src.core.db_manager import DBManager
+from src.core.query_stats import capture_queries, install_query_stats
+from src.core.rate_limit import InMemoryRateLimitBackend, LoginRateLimiter, set_login_rate_limiter
+import src.models.books  # noqa: F401
+import benchmarks.sqlite_compat  # noqa: F401
+
+
+@pytest_asyncio.fixture
+async def session_maker():
+    engine = create_async_engine(
+        "sqlite+aiosqlite://",
+        poolclass=StaticPool,
+        connect_args={"check_same_thread": False},
+    )
+    install_query_stats(engine.sync_engine)
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    try:
+        yield async_sessionmaker(bind=engine, expire_on_commit=False)
+    finally:
+        await engine.dispose()
+
+
+@pytest_asyncio.fixture
+async def db(session_maker):
+    async with DBManager(session_factory=session_maker) as db:
+        yield db
+
+
+@pytest.fixture(autouse=True)
+def repository_cache():
+    # Отдельный кеш на тест: базы создаются заново, а id совпадают
+    cache = RepositoryCache(InMemoryCacheBackend())
+    set_repository_cache(cache)
+    yield cache
+    set_repository_cache(None)
+
+
+@pytest.fixture(autouse=True)
+def login_rate_limiter():
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend())
+    set_login_rate_limiter(limiter)
+    yield limiter
+    set_login_rate_limiter(None)
+
+
+@pytest.fixture
+def assert_max_queries():
+    @contextmanager
+    def _assert_max_queries(expected: int):
+        with capture_queries() as stats:
+            yield stats
+        assert stats.statements <= expected, (
+            f"Ожидалось не больше {expected} запросов, выполнено {stats.statements}"
+        )
+
+    return _assert_max_queries
@@ -0,0 +1,177 @@
+from datetime import datetime, timedelta, timezone
+
+import jwt
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.auth import router as auth_router
+from src.api.dependencies import get_db
+from src.core.config import settings
+from src.core.db_manager import DBManager
+
+USER = {
+    "first_name": "John",
+    "last_name": "Doe",
+    "nickname": "reader",
+    "birth_day": "1990-01-01",
+    "email": "reader@example.com",
+    "password": "correct-horse",
+}
+
+
+@pytest_asyncio.fixture
+async def client(session_maker):
+    async def override_get_db():
+        async with DBManager(session_factory=session_maker) as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest_asyncio.fixture
+async def registered(client):
+    response = await client.post("/auth/register", json=USER)
+    assert response.status_code == 200
+    return client
+
+
+@pytest.mark.asyncio
+async def test_register_login_me(registered):
+    response = await registered.post(
+        "/auth/login", json={"email": USER["email"], "password": USER["password"]}
+    )
+    assert response.status_code == 200
+    token = response.json()["access_token"]
+    assert registered.cookies["access_token"] == token
+
+    response = await registered.get("/auth/me")
+    assert response.status_code == 200
+    me = response.json()
+    assert me["email"] == USER["email"]
+    assert me["nickname"] == USER["nickname"]
+    assert "hashed_password" not in me
+
+
+@pytest.mark.asyncio
+async def test_login_wrong_password(registered):
+    response = await registered.post("/auth/login", json={"email": USER["email"], "password": "wrong-pass"})
+    assert response.status_code == 401
+
+    response = await registered.post("/auth/login", json={"email": "nobody@example.com", "password": "x"})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_register_underage(client):
+    response = await client.post("/auth/register", json={**USER, "birth_day": "2020-01-01"})
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("token", [
+    None,
+    "not-a-jwt",
+    jwt.encode({"user_id": 1}, "other-secret", algorithm="HS256"),
+    jwt.encode(
+        {"user_id": 1, "exp": datetime.now(timezone.utc) - timedelta(minutes=1)},
+        settings.JWT_SECRET_KEY.get_secret_value(),
+        algorithm=settings.JWT_ALGORITHM,
+    ),
+])
+async def test_me_rejects_bad_token(client, token):
+    cookies = {} if token is None else {"access_token": token}
+    client.cookies.update(cookies)
+    response = await client.get("/auth/me")
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_login_rate_limited(registered, login_rate_limiter):
+    login_rate_limiter.email_limit = 2
+    payload = {"email": USER["email"], "password": "wrong-pass"}
+    for _ in range(2):
+        assert (await registered.post("/auth/login", json=payload)).status_code == 401
+
+    response = await registered.post("/auth/login", json=payload)
+    assert response.status_code == 429
+    assert int(response.headers["Retry-After"]) >= 1
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_access_token(registered):
+    response = await registered.post("/auth/login", json={"email": USER["email"], "password": USER["password"]})
+    access_token = response.json()["access_token"]
+    assert (await registered.post("/auth/logout")).status_code == 200
+
+    # Тот же JWT еще не истек, но после выхода не принимается
+    registered.cookies.set("access_token", access_token)
+    assert (await registered.get("/auth/me")).status_code == 401
+
+
+async def login(client) -> str:
+    response = await client.post("/auth/login", json={"email": USER["email"], "password": USER["password"]})
+    assert response.status_code == 200
+    # Refresh-токен живет только в httponly cookie
+    assert "refresh_token" not in response.json()
+    return client.cookies["refresh_token"]
+
+
+async def refresh(client, refresh_token: str):
+    client.cookies.clear()
+    client.cookies.set("refresh_token", refresh_token)
+    return await client.post("/auth/refresh")
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_without_password_hashing(registered, monkeypatch):
+    refresh_token = await login(registered)
+
+    async def fail(*args):
+        raise AssertionError("обновление токена не должно считать argon2")
+
+    monkeypatch.setattr("src.services.auth.AuthService.verify_password", fail)
+    response = await registered.post("/auth/refresh")
+    assert response.status_code == 200
+    assert set(response.json()) == {"access_token"}
+    assert registered.cookies["refresh_token"] != refresh_token
+    assert registered.cookies["access_token"] == response.json()["access_token"]
+    assert (await registered.get("/auth/me")).status_code == 200
+
+    # Из тела запроса токен не принимается
+    registered.cookies.clear()
+    response = await registered.post("/auth/refresh", json={"refresh_token": refresh_token})
+    assert response.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_refresh_reuse_revokes_family(registered):
+    first = await login(registered)
+    other_login = await login(registered)
+
+    assert (await refresh(registered, first)).status_code == 200
+    second = registered.cookies.get("refresh_token", path="/auth")
+    response = await refresh(registered, first)
+    assert response.status_code == 401
+    assert response.json()["detail"] == "Токен уже использован, войдите заново"
+
+    # Отозвано все семейство, включая выданный при ротации токен, но не другой вход
+    assert (await refresh(registered, second)).status_code == 401
+    assert (await refresh(registered, other_login)).status_code == 200
+    assert (await refresh(registered, "unknown")).status_code == 401
+    registered.cookies.clear()
+    assert (await registered.post("/auth/refresh")).status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_logout_revokes_refresh_token(registered):
+    refresh_token = await login(registered)
+    assert (await registered.post("/auth/logout")).status_code == 200
+    assert "refresh_token" not in registered.cookies
+
+    assert (await refresh(registered, refresh_token)).status_code == 401
@@ -0,0 +1,54 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import func, select
+
+from src.core.query_stats import capture_queries
+from src.models.books import BookModel
+from src.models.users import UserModel
+
+
+def user_row(user_id: int) -> dict:
+    return {
+        "id": user_id,
+        "first_name": "John",
+        "last_name": "Doe",
+        "nickname": f"reader{user_id}",
+        "birth_day": date(1990, 1, 1),
+        "email": f"reader{user_id}@example.com",
+        "hashed_password": "hash",
+    }
+
+
+@pytest.mark.asyncio
+async def test_queued_inserts_are_sent_in_one_statement_per_table(db):
+    for user_id in range(1, 4):
+        db.queue_insert(db.users, user_row(user_id))
+    for book_id in range(1, 6):
+        db.queue_insert(
+            db.books,
+            {"id": book_id, "title": f"Книга {book_id}", "file_path": f"/books/{book_id}.pdf", "author_id": 1},
+        )
+
+    with capture_queries() as stats:
+        await db.flush()
+
+    assert stats.statements == 2
+    assert await db.session.scalar(select(func.count()).select_from(UserModel)) == 3
+    assert await db.session.scalar(select(func.count()).select_from(BookModel)) == 5
+
+
+@pytest.mark.asyncio
+async def test_queued_updates_are_flushed_on_commit(db):
+    for user_id in range(1, 4):
+        db.queue_insert(db.users, user_row(user_id))
+    await db.flush()
+
+    for user_id in range(1, 4):
+        db.queue_update(db.users, {"nickname": f"renamed{user_id}"}, id=user_id)
+    with capture_queries() as stats:
+        await db.commit()
+
+    assert stats.statements == 1
+    nicknames = await db.session.scalars(select(UserModel.nickname).order_by(UserModel.id))
+    assert list(nicknames) == ["renamed1", "renamed2", "renamed3"]
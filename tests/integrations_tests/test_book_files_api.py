@@ -0,0 +1,115 @@
+import hashlib
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.books import router as books_router
+from src.api.dependencies import get_db
+from src.core.db_manager import DBManager
+from src.core.storage import LocalFileStorage, set_storage
+from src.models.users import UserModel
+from src.utils.auth_utils import get_current_user_id
+
+CONTENT = bytes(range(256)) * 400
+
+
+@pytest_asyncio.fixture
+async def client(session_maker, tmp_path):
+    async with session_maker() as session:
+        session.add(
+            UserModel(
+                id=1,
+                first_name="John",
+                last_name="Doe",
+                nickname="uploader",
+                birth_day=date(1990, 1, 1),
+                email="uploader@example.com",
+                hashed_password="hash",
+            )
+        )
+        await session.commit()
+
+    async def override_get_db():
+        async with DBManager(session_factory=session_maker) as db:
+            yield db
+
+    set_storage(LocalFileStorage(tmp_path, chunk_size=4096))
+    app = FastAPI()
+    app.include_router(books_router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user_id] = lambda: 1
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+    set_storage(None)
+
+
+async def upload_book(client) -> int:
+    response = await client.post(
+        "/books/files", content=CONTENT, headers={"Content-Type": "application/pdf"}
+    )
+    assert response.status_code == 200
+    stored = response.json()
+    assert stored["sha256"] == hashlib.sha256(CONTENT).hexdigest()
+
+    response = await client.post("/books", json={"title": "Книга", "file_key": stored["key"]})
+    assert response.status_code == 200
+    return response.json()["id"]
+
+
+@pytest.mark.asyncio
+async def test_download_full_and_not_modified(client):
+    book_id = await upload_book(client)
+
+    response = await client.get(f"/books/{book_id}/file")
+    assert response.status_code == 200
+    assert response.content == CONTENT
+    assert response.headers["content-type"] == "application/pdf"
+    etag = response.headers["etag"]
+    assert etag == f'"{hashlib.sha256(CONTENT).hexdigest()}"'
+
+    response = await client.get(f"/books/{book_id}/file", headers={"If-None-Match": etag})
+    assert response.status_code == 304
+    assert response.content == b""
+
+
+@pytest.mark.asyncio
+async def test_download_range(client):
+    book_id = await upload_book(client)
+
+    response = await client.get(f"/books/{book_id}/file", headers={"Range": "bytes=1000-1999"})
+
+    assert response.status_code == 206
+    assert response.content == CONTENT[1000:2000]
+    assert response.headers["content-range"] == f"bytes 1000-1999/{len(CONTENT)}"
+
+
+@pytest.mark.asyncio
+async def test_create_book_requires_uploaded_file(client):
+    response = await client.post("/books", json={"title": "Книга", "file_key": "aa/bb/missing.pdf"})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("file_key", [".tmp/upload.part", "notes.txt", "{sha}.pdf", "{sha_upper}", "zz/zz/{sha}.pdf"])
+async def test_create_book_rejects_keys_not_issued_by_upload(client, tmp_path, file_key):
+    (tmp_path / ".tmp").mkdir(exist_ok=True)
+    (tmp_path / ".tmp" / "upload.part").write_bytes(b"partial")
+    (tmp_path / "notes.txt").write_bytes(b"notes")
+    sha = hashlib.sha256(CONTENT).hexdigest()
+    await client.post("/books/files", content=CONTENT, headers={"Content-Type": "application/pdf"})
+
+    file_key = file_key.format(sha=sha, sha_upper=f"{sha[:2]}/{sha[2:4]}/{sha.upper()}.pdf")
+    response = await client.post("/books", json={"title": "Книга", "file_key": file_key})
+
+    assert response.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_upload_rejects_bad_content_length(client):
+    response = await client.post("/books/files", content=b"data", headers={"Content-Length": "four"})
+
+    assert response.status_code == 400
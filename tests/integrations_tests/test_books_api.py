@@ -0,0 +1,115 @@
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.books import router as books_router
+from src.api.dependencies import get_db
+from src.core.db_manager import DBManager
+from src.models.books import BookModel
+from src.models.reviews import ReviewModel
+from src.models.users import BookAuthorModel, UserModel
+
+BOOKS_COUNT = 10
+
+
+@pytest_asyncio.fixture
+async def client(session_maker):
+    async with session_maker() as session:
+        users = [
+            UserModel(
+                id=i,
+                first_name="John",
+                last_name="Doe",
+                nickname=f"user{i}",
+                birth_day=date(1990, 1, 1),
+                email=f"user{i}@example.com",
+                hashed_password="hash",
+            )
+            for i in range(1, 4)
+        ]
+        authors = [BookAuthorModel(id=i, full_name=f"Автор {i}") for i in range(1, 3)]
+        session.add_all(users + authors)
+        for i in range(1, BOOKS_COUNT + 1):
+            book = BookModel(
+                id=i,
+                title=f"Книга {i}",
+                file_path=f"/books/{i}.pdf",
+                author_id=users[i % 3].id,
+                authors=authors,
+                fans=users[: i % 3 + 1],
+            )
+            session.add(book)
+            session.add(ReviewModel(user_id=users[0].id, book_id=i, text="Отлично", rating=5))
+        await session.commit()
+
+    async def override_get_db():
+        async with DBManager(session_factory=session_maker) as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(books_router)
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("include,max_queries", [
+    ([], 1),
+    (["uploader"], 1),
+    (["fans_count", "reviews_count"], 1),
+    (["authors"], 2),
+    (["uploader", "authors", "reviews", "fans"], 4),
+    (["uploader", "authors", "reviews", "fans", "fans_count", "reviews_count"], 4),
+])
+async def test_books_list_query_count(client, assert_max_queries, include, max_queries):
+    # Число запросов не зависит от числа книг на странице
+    with assert_max_queries(max_queries):
+        response = await client.get("/books", params={"limit": BOOKS_COUNT, "include": include})
+
+    assert response.status_code == 200
+    items = response.json()["items"]
+    assert len(items) == BOOKS_COUNT
+    for name in include:
+        assert items[0][name] is not None
+
+
+@pytest.mark.asyncio
+async def test_books_list_includes_relationships(client):
+    response = await client.get(
+        "/books", params={"limit": 3, "include": ["uploader", "authors", "fans", "fans_count"]}
+    )
+
+    book = response.json()["items"][0]
+    assert book["uploader"] == {"id": 2, "nickname": "user2"}
+    assert [author["full_name"] for author in book["authors"]] == ["Автор 1", "Автор 2"]
+    assert book["fans_count"] == len(book["fans"]) == 2
+    assert book["reviews"] is None
+
+
+@pytest.mark.asyncio
+async def test_book_detail_query_count(client, assert_max_queries):
+    with assert_max_queries(3):
+        response = await client.get("/books/1", params={"include": ["uploader", "reviews", "fans"]})
+
+    assert response.status_code == 200
+    assert response.json()["reviews"][0]["rating"] == 5
+
+
+@pytest.mark.asyncio
+async def test_book_stream_query_count(client, assert_max_queries):
+    with assert_max_queries(2):
+        response = await client.get("/books/stream", params={"include": ["authors"]})
+
+    assert response.status_code == 200
+    assert len(response.text.splitlines()) == BOOKS_COUNT
+
+
+@pytest.mark.asyncio
+async def test_unknown_include_rejected(client):
+    response = await client.get("/books", params={"include": ["password"]})
+
+    assert response.status_code == 422
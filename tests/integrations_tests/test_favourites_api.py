@@ -0,0 +1,87 @@
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.auth import router as auth_router
+from src.api.dependencies import get_db
+from src.core.db_manager import DBManager
+from src.models.books import BookModel
+from src.models.users import UserModel
+from src.utils.auth_utils import get_current_user_id
+
+USER_ID = 1
+
+
+@pytest_asyncio.fixture
+async def seeded(session_maker):
+    async with session_maker() as session:
+        session.add(
+            UserModel(
+                id=USER_ID,
+                first_name="John",
+                last_name="Doe",
+                nickname="reader",
+                birth_day=date(1990, 1, 1),
+                email="reader@example.com",
+                hashed_password="hash",
+            )
+        )
+        session.add_all(
+            BookModel(id=i, title=f"Книга {i}", file_path=f"/books/{i}.pdf", author_id=USER_ID)
+            for i in range(1, 6)
+        )
+        await session.commit()
+    return session_maker
+
+
+@pytest_asyncio.fixture
+async def client(seeded):
+    async def override_get_db():
+        async with DBManager(session_factory=seeded) as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user_id] = lambda: USER_ID
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+@pytest.mark.asyncio
+async def test_add_list_remove(client):
+    for book_id in (3, 1, 4):
+        response = await client.put(f"/auth/me/favourites/{book_id}")
+        assert response.json() == {"added": True}
+    assert (await client.put("/auth/me/favourites/1")).json() == {"added": False}
+
+    page = (await client.get("/auth/me/favourites", params={"limit": 2})).json()
+    assert [book["id"] for book in page["items"]] == [1, 3]
+    page = (await client.get("/auth/me/favourites", params={"after_id": page["next_after_id"]})).json()
+    assert [book["id"] for book in page["items"]] == [4]
+
+    assert (await client.delete("/auth/me/favourites/3")).json() == {"removed": True}
+    assert (await client.delete("/auth/me/favourites/3")).json() == {"removed": False}
+    response = await client.get("/auth/me/favourites/contains", params={"book_ids": [1, 2, 3, 4]})
+    assert response.json() == {"1": True, "2": False, "3": False, "4": True}
+
+
+@pytest.mark.asyncio
+async def test_contains_many_served_from_cache(seeded, assert_max_queries):
+    async with DBManager(session_factory=seeded) as db:
+        await db.favorites.add(USER_ID, 2)
+        await db.commit()
+
+        with assert_max_queries(1):
+            assert await db.favorites.contains_many(USER_ID, range(1, 6)) == {
+                1: False, 2: True, 3: False, 4: False, 5: False
+            }
+        with assert_max_queries(0):
+            assert await db.favorites.contains(USER_ID, 2)
+
+        await db.favorites.remove(USER_ID, 2)
+        await db.commit()
+        assert not await db.favorites.contains(USER_ID, 2)
@@ -0,0 +1,169 @@
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from src.api.auth import router as auth_router
+from src.api.books import router as books_router
+from src.api.dependencies import get_db
+from src.core.config import settings
+from src.core.db_manager import DBManager
+from src.core.feed import InMemoryTimelineStore, set_timeline_store
+from src.models.books import BookModel
+from src.models.reviews import ReviewModel
+from src.models.users import UserModel, favorite_books
+from src.services.feed import FeedService
+from src.utils.auth_utils import get_current_user_id
+from src.utils.cursors import encode_cursor
+
+AUTHOR_ID, READER_ID, OTHER_ID = 1, 2, 3
+
+
+@pytest.fixture(autouse=True)
+def timeline_store():
+    store = InMemoryTimelineStore()
+    set_timeline_store(store)
+    yield store
+    set_timeline_store(None)
+
+
+@pytest_asyncio.fixture
+async def seeded(session_maker):
+    async with session_maker() as session:
+        session.add_all(
+            UserModel(
+                id=i,
+                first_name="John",
+                last_name="Doe",
+                nickname=f"user{i}",
+                birth_day=date(1990, 1, 1),
+                email=f"user{i}@example.com",
+                hashed_password="hash",
+            )
+            for i in (AUTHOR_ID, READER_ID, OTHER_ID)
+        )
+        session.add_all(
+            BookModel(id=i, title=f"Книга {i}", file_path=f"/books/{i}.pdf", author_id=AUTHOR_ID) for i in (1, 2, 3)
+        )
+        await session.flush()
+        await session.execute(
+            favorite_books.insert(),
+            [
+                {"user_id": READER_ID, "book_id": 1},
+                {"user_id": READER_ID, "book_id": 2},
+                {"user_id": OTHER_ID, "book_id": 1},
+                {"user_id": AUTHOR_ID, "book_id": 1},
+            ],
+        )
+        await session.commit()
+    return session_maker
+
+
+async def add_review(session_maker, book_id: int, user_id: int = AUTHOR_ID) -> int:
+    async with session_maker() as session:
+        review = ReviewModel(user_id=user_id, book_id=book_id, text="Отлично", rating=5)
+        session.add(review)
+        await session.commit()
+    async with DBManager(session_factory=session_maker) as db:
+        await FeedService(db).fan_out_review(review.id, book_id, user_id)
+    return review.id
+
+
+async def read_feed(session_maker, user_id: int, **kwargs):
+    async with DBManager(session_factory=session_maker) as db:
+        return await FeedService(db).get_feed(user_id, **kwargs)
+
+
+@pytest.mark.asyncio
+async def test_fan_out_on_write_to_fans_except_author(seeded):
+    first = await add_review(seeded, 1)
+    second = await add_review(seeded, 2)
+    await add_review(seeded, 3)
+
+    page = await read_feed(seeded, READER_ID)
+    assert [review.id for review in page.items] == [second, first]
+    assert [review.id for review in (await read_feed(seeded, OTHER_ID)).items] == [first]
+    assert (await read_feed(seeded, AUTHOR_ID)).items == []
+
+
+@pytest.mark.asyncio
+async def test_hot_books_are_merged_on_read(seeded, timeline_store, monkeypatch, assert_max_queries):
+    monkeypatch.setattr(settings, "FEED_FANOUT_MAX_FANS", 2)
+    # У книги 1 три фаната - рассылки нет, у книги 2 один - обычная рассылка
+    ids = [await add_review(seeded, book_id) for book_id in (1, 2, 1, 2, 1)]
+    assert (await timeline_store.range_many(["user:2"], None, 10)) == [[ids[3], ids[1]]]
+
+    async with DBManager(session_factory=seeded) as db:
+        service = FeedService(db)
+        await service.get_feed(READER_ID)
+        # Избранное уже в кеше: один запрос за отзывами при любом числе источников
+        with assert_max_queries(1):
+            page = await service.get_feed(READER_ID, limit=3)
+    assert [review.id for review in page.items] == ids[:1:-1]
+
+    page = await read_feed(seeded, READER_ID, cursor=page.next_cursor, limit=3)
+    assert [review.id for review in page.items] == ids[1::-1]
+    assert page.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_unfavourited_books_are_skipped(seeded):
+    await add_review(seeded, 1)
+    second = await add_review(seeded, 2)
+    async with DBManager(session_factory=seeded) as db:
+        await db.favorites.remove(READER_ID, 1)
+        await db.commit()
+
+    assert [review.id for review in (await read_feed(seeded, READER_ID)).items] == [second]
+
+
+@pytest.mark.asyncio
+async def test_timeline_is_bounded():
+    store = InMemoryTimelineStore()
+    for item_id in (5, 1, 3, 4, 2, 3):
+        await store.add(["a", "b"], item_id, max_length=3, ttl=60)
+
+    assert await store.range_many(["a", "b", "missing"], None, 10) == [[5, 4, 3], [5, 4, 3], []]
+    assert await store.range_many(["a"], 5, 1) == [[4]]
+
+
+@pytest.mark.asyncio
+async def test_scored_timeline_trims_least_recent():
+    store = InMemoryTimelineStore()
+    # Горячие книги: score - id последнего отзыва, а не id книги
+    for book_id, review_id in ((9, 1), (1, 2), (5, 3), (9, 4)):
+        await store.add(["hot"], book_id, max_length=2, ttl=60, score=review_id)
+
+    assert await store.range_many(["hot"], None, 10) == [[9, 5]]
+
+
+@pytest.mark.asyncio
+async def test_review_api_enqueues_and_feed_api_pages(seeded):
+    current_user = {"id": AUTHOR_ID}
+
+    async def override_get_db():
+        async with DBManager(session_factory=seeded) as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.include_router(books_router)
+    app.dependency_overrides[get_db] = override_get_db
+    app.dependency_overrides[get_current_user_id] = lambda: current_user["id"]
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        response = await client.post("/books/1/reviews", json={"text": "Отлично", "rating": 5})
+        assert response.status_code == 200
+        review_id = response.json()["id"]
+        assert (await client.post("/books/99/reviews", json={"text": "?", "rating": 5})).status_code == 404
+
+        async with DBManager(session_factory=seeded) as db:
+            await FeedService(db).fan_out_review(review_id, 1, AUTHOR_ID)
+
+        current_user["id"] = READER_ID
+        page = (await client.get("/auth/me/feed")).json()
+        assert [review["id"] for review in page["items"]] == [review_id]
+        assert (await client.get("/auth/me/feed", params={"cursor": "bad"})).status_code == 400
+        assert (await client.get("/auth/me/feed", params={"cursor": encode_cursor("x")})).status_code == 400
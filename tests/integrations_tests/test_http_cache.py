@@ -0,0 +1,141 @@
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from src.api.auth import router as auth_router
+from src.api.books import router as books_router
+from src.api.dependencies import get_db
+from src.core.db_manager import DBManager
+from src.core.http_cache import ResponseCacheMiddleware
+from src.models.books import BookModel
+from src.models.users import UserModel
+from src.schemas.books import BookAdd
+from src.services.auth import AuthService
+from src.utils.token_cache import token_claims_cache
+
+
+@pytest_asyncio.fixture
+async def client(session_maker):
+    async with session_maker() as session:
+        session.add(
+            UserModel(
+                id=1,
+                first_name="John",
+                last_name="Doe",
+                nickname="reader",
+                birth_day=date(1990, 1, 1),
+                email="reader@example.com",
+                hashed_password="hash",
+            )
+        )
+        session.add_all(
+            BookModel(id=i, title=f"Книга {i}", file_path=f"/books/{i}.pdf", author_id=1) for i in range(1, 4)
+        )
+        await session.commit()
+
+    async def override_get_db():
+        async with DBManager(session_factory=session_maker) as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(auth_router)
+    app.include_router(books_router)
+    app.add_middleware(ResponseCacheMiddleware)
+    app.dependency_overrides[get_db] = override_get_db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        yield client
+
+
+async def rename_book(session_maker, book_id: int, title: str):
+    async with DBManager(session_factory=session_maker) as db:
+        await db.books.update(BookAdd(title=title, file_path=f"/books/{book_id}.pdf", author_id=1), id=book_id)
+        await db.commit()
+
+
+@pytest.mark.asyncio
+async def test_conditional_get_returns_304_until_write(client, session_maker, assert_max_queries):
+    response = await client.get("/books/1")
+    etag = response.headers["etag"]
+    assert response.headers["cache-control"] == "public, max-age=60"
+
+    with assert_max_queries(0):
+        not_modified = await client.get("/books/1", headers={"If-None-Match": etag})
+    assert not_modified.status_code == 304
+    assert not_modified.content == b""
+
+    await rename_book(session_maker, 1, "Новое название")
+
+    response = await client.get("/books/1", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Новое название"
+    assert response.headers["etag"] != etag
+
+
+@pytest.mark.asyncio
+async def test_shared_pages_served_without_db(client, session_maker, assert_max_queries):
+    first = await client.get("/books", params={"limit": 2})
+
+    with assert_max_queries(0):
+        second = await client.get("/books", params={"limit": 2})
+    assert second.status_code == 200
+    assert second.json() == first.json()
+    assert second.headers["etag"] == first.headers["etag"]
+
+    # Другие параметры - другой ключ
+    other = await client.get("/books", params={"limit": 1})
+    assert other.headers["etag"] != first.headers["etag"]
+
+    await rename_book(session_maker, 1, "Новое название")
+    with assert_max_queries(1):
+        fresh = await client.get("/books", params={"limit": 2})
+    assert fresh.json()["items"][0]["title"] == "Новое название"
+
+
+def test_policy_taken_from_first_matching_route():
+    app = FastAPI()
+    app.include_router(books_router)
+    middleware = ResponseCacheMiddleware(app)
+
+    def match(path: str):
+        return middleware._match({"type": "http", "method": "GET", "path": path, "app": app})
+
+    assert match("/books/1")[2] == {"book_id": "1"}
+    # /books/search объявлен раньше /books/{book_id} и не кешируется
+    assert match("/books/search") is None
+
+
+@pytest.mark.asyncio
+async def test_private_profile_is_keyed_by_token(client, session_maker):
+    response = await client.get("/auth/me")
+    assert response.status_code == 401
+    assert "etag" not in response.headers
+
+    async with DBManager(session_factory=session_maker) as db:
+        token = AuthService(db).create_access_token({"user_id": 1})
+    client.cookies.update({"access_token": token})
+    response = await client.get("/auth/me")
+    assert response.status_code == 200
+    assert response.headers["cache-control"] == "private, no-cache"
+    assert response.headers["vary"] == "Cookie"
+
+    not_modified = await client.get("/auth/me", headers={"If-None-Match": response.headers["etag"]})
+    assert not_modified.status_code == 304
+
+
+@pytest.mark.asyncio
+async def test_private_not_modified_requires_valid_token(client, session_maker, monkeypatch):
+    async with DBManager(session_factory=session_maker) as db:
+        token = AuthService(db).create_access_token({"user_id": 1})
+    client.cookies.update({"access_token": token})
+    etag = (await client.get("/auth/me")).headers["etag"]
+
+    def expired(self, token):
+        raise HTTPException(status_code=401, detail="Срок действия токена истек")
+
+    monkeypatch.setattr(AuthService, "decode_token", expired)
+    token_claims_cache.clear()
+    response = await client.get("/auth/me", headers={"If-None-Match": etag})
+    assert response.status_code == 401
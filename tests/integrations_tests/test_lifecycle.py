@@ -0,0 +1,60 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.api.health import router as health_router
+from src.core.db_manager import DBManager
+from src.core.lifecycle import Lifecycle, lifecycle
+from src.utils.hashing import PasswordHasher
+
+
+@pytest.mark.asyncio
+async def test_ready_only_after_warm_up(session_maker, monkeypatch):
+    monkeypatch.setattr(lifecycle, "ready", False)
+    monkeypatch.setattr(lifecycle, "draining", False)
+    app = FastAPI()
+    app.include_router(health_router)
+    hasher = PasswordHasher(max_workers=1)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/health/live")).status_code == 200
+        response = await client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "warming_up"}
+
+        await lifecycle.warm_up(session_maker.kw["bind"], password_hasher=hasher, db_connections=2)
+        assert (await client.get("/health/ready")).json() == {"status": "ready"}
+
+        lifecycle.start_draining()
+        response = await client.get("/health/ready")
+        assert response.status_code == 503
+        assert response.json() == {"status": "draining"}
+    hasher.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_warm_up_waits_for_database(tmp_path):
+    state = Lifecycle()
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/app.db")
+    task = asyncio.create_task(state.warm_up(broken, retry_seconds=0.01))
+    await asyncio.sleep(0.2)
+
+    assert not task.done()
+    assert not state.ready
+    task.cancel()
+    await broken.dispose()
+
+
+@pytest.mark.asyncio
+async def test_shutdown_drain_is_bounded(session_maker):
+    started = lifecycle.active_sessions
+    async with DBManager(session_factory=session_maker):
+        assert lifecycle.active_sessions == started + 1
+        if started == 0:
+            assert not await lifecycle.wait_for_sessions(timeout=0.05)
+    assert lifecycle.active_sessions == started
+    if started == 0:
+        assert await lifecycle.wait_for_sessions(timeout=0.05)
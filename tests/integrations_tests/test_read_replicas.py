@@ -0,0 +1,126 @@
+from datetime import date
+
+import pytest
+import pytest_asyncio
+from fastapi import Depends, FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import select, update
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from src.core.db import Base
+from src.core.db_manager import DBManager
+from src.core.db_routing import PRIMARY_COOKIE, ReadYourWritesMiddleware, ReplicaSet, RoutingSession
+from src.models.users import UserModel
+
+
+async def create_database(path, nickname: str):
+    # Две независимые базы вместо настоящей репликации: по нику видно, откуда пришло чтение
+    engine = create_async_engine(f"sqlite+aiosqlite:///{path}")
+    async with engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    async with async_sessionmaker(bind=engine)() as session:
+        session.add(
+            UserModel(
+                id=1,
+                first_name="John",
+                last_name="Doe",
+                nickname=nickname,
+                birth_day=date(1990, 1, 1),
+                email="reader@example.com",
+                hashed_password="hash",
+            )
+        )
+        await session.commit()
+    return engine
+
+
+@pytest_asyncio.fixture
+async def databases(tmp_path):
+    primary = await create_database(tmp_path / "primary.db", "primary")
+    replica = await create_database(tmp_path / "replica.db", "replica")
+    session_maker = async_sessionmaker(bind=primary, sync_session_class=RoutingSession, expire_on_commit=False)
+    replicas = ReplicaSet({"replica1": replica}, retry_seconds=60)
+    yield session_maker, replicas
+    await primary.dispose()
+    await replica.dispose()
+
+
+async def read_nickname(db: DBManager) -> str:
+    return await db.session.scalar(select(UserModel.nickname).filter_by(id=1))
+
+
+@pytest.mark.asyncio
+async def test_reads_go_to_replica_and_writes_to_primary(databases):
+    session_maker, replicas = databases
+
+    async with DBManager(session_factory=session_maker, replicas=replicas) as db:
+        assert await read_nickname(db) == "replica"
+        await db.session.execute(update(UserModel).filter_by(id=1).values(nickname="renamed"))
+        # После записи сессия читает свои изменения с primary
+        assert await read_nickname(db) == "renamed"
+        await db.commit()
+        assert await read_nickname(db) == "renamed"
+
+    async with DBManager(session_factory=session_maker) as db:
+        assert await read_nickname(db) == "renamed"
+
+
+@pytest.mark.asyncio
+async def test_unhealthy_replica_falls_back_to_primary(databases, tmp_path):
+    session_maker, replicas = databases
+    replica = replicas.replicas[0]
+
+    replicas.mark_unhealthy(replica, "test")
+    assert replicas.pick() is None
+    async with DBManager(session_factory=session_maker, replicas=replicas) as db:
+        assert await read_nickname(db) == "primary"
+
+    await replicas.check_all()
+    assert replicas.pick() is replica
+
+    broken = create_async_engine(f"sqlite+aiosqlite:///{tmp_path}/missing/replica.db")
+    broken_set = ReplicaSet({"broken": broken})
+    await broken_set.check_all()
+    assert broken_set.pick() is None
+    await broken.dispose()
+
+
+@pytest.mark.asyncio
+async def test_read_your_writes_cookie(databases):
+    session_maker, replicas = databases
+
+    async def get_db():
+        async with DBManager(session_factory=session_maker, replicas=replicas) as db:
+            yield db
+
+    app = FastAPI()
+    app.add_middleware(ReadYourWritesMiddleware, sticky_seconds=30)
+
+    @app.get("/nickname")
+    async def nickname(db: DBManager = Depends(get_db)):
+        return await read_nickname(db)
+
+    @app.put("/nickname")
+    async def rename(db: DBManager = Depends(get_db)):
+        await db.session.execute(update(UserModel).filter_by(id=1).values(nickname="renamed"))
+        await db.commit()
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+        assert (await client.get("/nickname")).json() == "replica"
+        response = await client.put("/nickname")
+        assert PRIMARY_COOKIE in response.cookies
+        assert (await client.get("/nickname")).json() == "renamed"
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as other_client:
+        assert (await other_client.get("/nickname")).json() == "replica"
+
+
+@pytest.mark.asyncio
+async def test_shared_cache_is_filled_from_primary(databases):
+    session_maker, replicas = databases
+
+    async with DBManager(session_factory=session_maker, replicas=replicas) as db:
+        assert await read_nickname(db) == "replica"
+        # Реплика может отставать от нового поколения - в кеш идет строка с primary
+        assert (await db.users.get_one_or_none(id=1)).nickname == "primary"
+        assert await read_nickname(db) == "replica"
@@ -1,13 +1,16 @@
+import time
 from datetime import date, timedelta
-from unittest.mock import AsyncMock
+from unittest.mock import AsyncMock, Mock
 
 import pytest
 from fastapi import HTTPException
 
+from src.core.cache import InMemoryCacheBackend
 from src.exceptions import NicknameIsEmptyException, LoginErrorException
 from src.models.users import RoleEnum
 from src.schemas.users import UserRequestAddRegister, UserLogin, UserWithHashedPassword, User
 from src.services.auth import AuthService
+from src.utils.token_cache import TokenClaimsCache, TokenDenylist
 
 @pytest.mark.asyncio
 @pytest.mark.parametrize("data, expected_exception", [
@@ -107,7 +110,7 @@ async def test_login_and_get_access_token(data, expected_exception, password_cor
     mock_db.users.get_user_with_hashed_password = AsyncMock(return_value=mock_user)
     mock_db.commit = AsyncMock()
     service = AuthService(mock_db)
-    service.verify_password = lambda p, h: password_correct
+    service.verify_password = AsyncMock(return_value=password_correct)
     service.create_access_token = lambda uid: {'access_token': 'tokengjdiokfgzjhnb'}
 
     if expected_exception:
@@ -143,4 +146,64 @@ async def test_get_one_or_none_user(uid):
 
     user = await service.get_one_or_none_user(uid)
     assert user is not None
-    assert user.id == uid
\ No newline at end of file
+    assert user.id == uid
+
+@pytest.mark.asyncio
+async def test_get_token_claims_uses_cache():
+    service = AuthService()
+    service.claims_cache = TokenClaimsCache(maxsize=2, ttl=60)
+    service.denylist = TokenDenylist(InMemoryCacheBackend())
+    claims = {"user_id": 1, "exp": time.time() + 3600}
+    service.decode_token = Mock(return_value=claims)
+
+    assert await service.get_token_claims("token") == claims
+    assert await service.get_token_claims("token") == claims
+    service.decode_token.assert_called_once_with("token")
+
+
+@pytest.mark.asyncio
+async def test_revoked_token_is_rejected_until_exp():
+    denylist = TokenDenylist(InMemoryCacheBackend())
+    service = AuthService()
+    service.claims_cache = TokenClaimsCache(maxsize=2, ttl=60)
+    service.denylist = denylist
+    token = service.create_access_token({"user_id": 1})
+    await service.get_token_claims(token)
+
+    await service.revoke_token(token)
+    with pytest.raises(HTTPException):
+        await service.get_token_claims(token)
+
+    # Другой воркер: свой кеш claims, общий список отозванных
+    other = AuthService()
+    other.claims_cache = TokenClaimsCache(maxsize=2, ttl=60)
+    other.denylist = denylist
+    with pytest.raises(HTTPException):
+        await other.get_token_claims(token)
+
+
+def test_token_cache_respects_exp_and_size():
+    cache = TokenClaimsCache(maxsize=2, ttl=60)
+    cache.put("expired", {"user_id": 1, "exp": time.time() - 1})
+    assert cache.get("expired") is None
+
+    for token in ("a", "b", "c"):
+        cache.put(token, {"user_id": 1, "exp": time.time() + 3600})
+    assert len(cache) == 2
+    assert cache.get("a") is None
+    assert cache.get("c") is not None
+
+
+@pytest.mark.asyncio
+async def test_login_schedules_rehash_for_outdated_hash(monkeypatch):
+    rehash = Mock(enqueue=AsyncMock())
+    monkeypatch.setattr("src.services.auth.rehash_password", rehash)
+    mock_db = AsyncMock()
+    mock_db.users.get_user_with_hashed_password = AsyncMock(return_value=Mock(id=7, hashed_password="old"))
+    service = AuthService(mock_db)
+    service.hasher = Mock(verify=AsyncMock(return_value=True), needs_update=Mock(return_value=True))
+    service.create_access_token = lambda data: "token"
+
+    await service.login_and_get_access_token(UserLogin(email="a@example.com", password="password123"))
+
+    rehash.enqueue.assert_awaited_once_with(7, "password123", "old", task_id="7")
@@ -0,0 +1,63 @@
+import httpx
+import pytest
+from sqlalchemy.ext.asyncio import async_sessionmaker
+
+from benchmarks.baseline import build_baseline, find_regressions
+from benchmarks.load import ScenarioResult, build_app, build_scenarios, percentile, run_scenario
+from benchmarks.micro import MicroResult
+from benchmarks.seed import SeedVolumes, seed_database
+
+
+def make_result(**overrides) -> ScenarioResult:
+    values = {
+        "name": "books_list",
+        "concurrency": 4,
+        "requests": 100,
+        "errors": 0,
+        "elapsed_seconds": 1.0,
+        "p50_ms": 5.0,
+        "p95_ms": 10.0,
+        "p99_ms": 12.0,
+        "throughput_rps": 100.0,
+    }
+    return ScenarioResult(**{**values, **overrides})
+
+
+def test_percentile_nearest_rank():
+    values = [float(i) for i in range(1, 101)]
+    assert percentile(values, 50) == 50.0
+    assert percentile(values, 95) == 95.0
+    assert percentile(values, 99) == 99.0
+    assert percentile([7.0], 99) == 7.0
+    assert percentile([], 50) == 0.0
+
+
+def test_regressions_against_baseline():
+    micro = [MicroResult(name="jwt_decode", number=10, ns_per_op=1000.0)]
+    baseline = build_baseline([make_result()], micro, environment={})
+
+    assert find_regressions([make_result(p95_ms=14.0)], micro, baseline) == []
+    assert len(find_regressions([make_result(p95_ms=16.0)], micro, baseline)) == 1
+    assert len(find_regressions([make_result(throughput_rps=70.0)], micro, baseline)) == 1
+    assert len(find_regressions([make_result(errors=1)], micro, baseline)) == 1
+    slower = [MicroResult(name="jwt_decode", number=10, ns_per_op=1300.0)]
+    assert len(find_regressions([make_result()], slower, baseline)) == 1
+    # Новых сценариев в эталоне нет - они не валят прогон
+    assert find_regressions([make_result(name="new")], [], baseline) == []
+
+
+@pytest.mark.asyncio
+async def test_smoke_run_on_sqlite(session_maker):
+    engine = session_maker.kw["bind"]
+    volumes = SeedVolumes(users=5, authors=3, books=20, reviews_per_book=2, favourites_per_user=3)
+    data = await seed_database(engine, volumes)
+    assert len(data.book_ids) == 20
+
+    app = build_app(async_sessionmaker(bind=engine, expire_on_commit=False))
+    scenarios = {scenario.name: scenario for scenario in build_scenarios(data, token_count=3)}
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://bench") as client:
+        for name in ("auth_me", "books_list", "books_list_include"):
+            result = await run_scenario(client, scenarios[name], concurrency=3, requests=12, warmup=1)
+            assert result.errors == 0
+            assert result.p50_ms <= result.p95_ms <= result.p99_ms
+            assert result.throughput_rps > 0
@@ -0,0 +1,86 @@
+import json
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.services.book_import import BookImportService, iter_import_rows
+
+
+@pytest.mark.parametrize("fmt", ["csv", "jsonl"])
+def test_iter_import_rows(tmp_path, fmt):
+    rows = [
+        {"title": "Война и мир", "file_path": "/books/1.pdf", "author_id": "1", "authors": "Лев Толстой"},
+        {"title": "Двенадцать стульев", "file_path": "/books/2.pdf", "author_id": "1",
+         "authors": "Илья Ильф; Евгений Петров"},
+    ]
+    path = tmp_path / f"catalog.{fmt}"
+    if fmt == "csv":
+        path.write_text(
+            "title,file_path,author_id,authors\n"
+            + "\n".join(f'{r["title"]},{r["file_path"]},{r["author_id"]},{r["authors"]}' for r in rows),
+            encoding="utf-8",
+        )
+    else:
+        path.write_text("\n".join(json.dumps(r, ensure_ascii=False) for r in rows), encoding="utf-8")
+
+    assert [row["title"] for row in iter_import_rows(path)] == ["Война и мир", "Двенадцать стульев"]
+
+
+@pytest.mark.asyncio
+async def test_import_rows_chunks_and_skips_invalid():
+    mock_db = AsyncMock()
+    service = BookImportService(mock_db)
+    service.chunk_size = 2
+    service._import_chunk = AsyncMock()
+    rows = [
+        {"title": "A", "file_path": "/a", "author_id": 1, "authors": "X; Y"},
+        {"title": "", "file_path": "/b", "author_id": 1},
+        {"title": "C", "file_path": "/c", "author_id": 1, "authors": ["Z"]},
+    ]
+    seen = []
+
+    progress = await service.import_rows(rows, on_progress=lambda p: seen.append(p.rows_read))
+
+    assert progress.rows_read == 3
+    assert progress.rows_skipped == 1
+    assert len(progress.errors) == 1
+    assert seen == [2, 3]
+    assert mock_db.commit.await_count == 2
+    first_chunk = service._import_chunk.await_args_list[0].args[0]
+    assert first_chunk == [(1, "A", None, "/a", 1, ["X", "Y"])]
+
+
+@pytest.mark.asyncio
+async def test_too_long_author_name_is_skipped():
+    service = BookImportService(AsyncMock())
+    service._import_chunk = AsyncMock()
+    rows = [
+        {"title": "A", "file_path": "/a", "author_id": 1, "authors": "X"},
+        {"title": "B", "file_path": "/b", "author_id": 1, "authors": "Y; " + "Z" * 256},
+        {"title": "C", "file_path": "/c", "author_id": 1, "authors": "Z" * 255},
+    ]
+
+    progress = await service.import_rows(rows)
+
+    assert progress.rows_skipped == 1
+    assert progress.errors[0].startswith("строка 2:")
+    assert [record[1] for record in service._import_chunk.await_args.args[0]] == ["A", "C"]
+
+
+@pytest.mark.asyncio
+async def test_malformed_jsonl_line_is_skipped(tmp_path):
+    path = tmp_path / "catalog.jsonl"
+    path.write_text(
+        '{"title": "A", "file_path": "/a", "author_id": 1}\n{"title": "B",\n'
+        '{"title": "C", "file_path": "/c", "author_id": 1}\n',
+        encoding="utf-8",
+    )
+    service = BookImportService(AsyncMock())
+    service._import_chunk = AsyncMock()
+
+    progress = await service.import_file(path)
+
+    assert progress.rows_read == 3
+    assert progress.rows_skipped == 1
+    assert progress.errors[0].startswith("строка 2: неверный JSON")
+    assert [record[1] for record in service._import_chunk.await_args.args[0]] == ["A", "C"]
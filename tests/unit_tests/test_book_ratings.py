@@ -0,0 +1,53 @@
+from collections import Counter
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.repositories.reviews import ReviewsRepository
+from src.schemas.reviews import BookRating, Review
+
+
+def make_repository():
+    repository = ReviewsRepository(MagicMock())
+    repository.ratings.apply_deltas = AsyncMock()
+    return repository
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("before,after,expected", [
+    ((1, 3), (1, 5), Counter({(1, 3): -1, (1, 5): 1})),
+    ((1, 4), (1, 4), Counter()),
+])
+async def test_update_moves_rating_between_buckets(monkeypatch, before, after, expected):
+    repository = make_repository()
+    repository._lock_ratings = AsyncMock(return_value=[before])
+    edited = Review(id=1, user_id=1, book_id=after[0], text="ok", rating=after[1])
+    monkeypatch.setattr("src.repositories.base.BaseRepository.update", AsyncMock(return_value=edited))
+
+    await repository.update(MagicMock(), id=1)
+
+    deltas = repository.ratings.apply_deltas.await_args.args[0]
+    assert {key: count for key, count in deltas.items() if count} == expected
+
+
+@pytest.mark.asyncio
+async def test_delete_decrements_each_review(monkeypatch):
+    repository = make_repository()
+    repository._lock_ratings = AsyncMock(return_value=[(1, 5), (1, 5), (2, 1)])
+    monkeypatch.setattr("src.repositories.base.BaseRepository.delete", AsyncMock(return_value=True))
+
+    await repository.delete(user_id=7)
+
+    assert repository.ratings.apply_deltas.await_args.args[0] == Counter({(1, 5): -2, (2, 1): -1})
+
+
+def test_book_rating_histogram():
+    rating = BookRating(book_id=1, reviews_count=3, average_rating=4.0, rating_3=1, rating_4=1, rating_5=1)
+    assert rating.histogram == {1: 0, 2: 0, 3: 1, 4: 1, 5: 1}
+
+
+@pytest.mark.asyncio
+async def test_reconcile_retires_cached_rating_pages(db, repository_cache):
+    before = await repository_cache.make_key(("books", "reviews"), "http")
+    await db.ratings.reconcile()
+    assert await repository_cache.make_key(("books", "reviews"), "http") != before
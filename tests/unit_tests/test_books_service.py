@@ -1,6 +1,13 @@
+import json
+
 import pytest
 from unittest.mock import AsyncMock
+
+from src.exceptions import InvalidCursorException
+from src.schemas.books import Book
 from src.services.books import BooksService
+from src.utils.cursors import decode_cursor, encode_cursor
+from src.utils.streaming import stream_models
 
 @pytest.mark.parametrize(
     "user,title,author,expected_exception",
@@ -21,3 +28,81 @@ async def test_create_book_as_admin(user, title, author, expected_exception):
         assert book.author == author
         mock_db.add.assert_called_once()
         mock_db.commit.assert_awaited_once()
+
+
+def make_book(book_id: int) -> Book:
+    return Book(id=book_id, title=f"Book {book_id}", file_path=f"/books/{book_id}.pdf", author_id=1)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("found,limit,expected_next", [
+    (3, 3, 3),
+    (2, 3, None),
+    (0, 3, None),
+])
+async def test_get_books_keyset_page(found, limit, expected_next):
+    mock_db = AsyncMock()
+    mock_db.books.get_all = AsyncMock(return_value=[make_book(i) for i in range(1, found + 1)])
+    service = BooksService(mock_db)
+
+    page = await service.get_books(after_id=None, limit=limit)
+
+    assert len(page.items) == found
+    assert page.next_after_id == expected_next
+    mock_db.books.get_all.assert_awaited_once_with(after_id=None, limit=limit, load=())
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("fmt", ["ndjson", "json"])
+async def test_stream_models(fmt):
+    async def books():
+        for i in (1, 2):
+            yield make_book(i)
+
+    response = stream_models(books(), fmt)
+    body = b"".join([chunk async for chunk in response.body_iterator])
+
+    if fmt == "ndjson":
+        lines = body.splitlines()
+        assert [json.loads(line)["id"] for line in lines] == [1, 2]
+    else:
+        assert [item["id"] for item in json.loads(body)] == [1, 2]
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("query,expected_calls", [
+    ("толстой", 1),
+    ("   ", 0),
+])
+async def test_search_books(query, expected_calls):
+    mock_db = AsyncMock()
+    mock_db.books.search = AsyncMock(return_value=([make_book(1)], "next"))
+    service = BooksService(mock_db)
+
+    page = await service.search_books(query, limit=1)
+
+    assert mock_db.books.search.await_count == expected_calls
+    if expected_calls:
+        assert page.items[0].id == 1
+        assert page.next_cursor == "next"
+    else:
+        assert page.items == []
+
+
+@pytest.mark.parametrize("cursor", [
+    "not-a-cursor",
+    encode_cursor(1.0),
+    encode_cursor("a", "b", "c"),
+    encode_cursor("x", {}),
+    encode_cursor(0.5, "1"),
+    encode_cursor(True, 1),
+    encode_cursor(0.5, 1.5),
+])
+def test_decode_invalid_cursor(cursor):
+    with pytest.raises(InvalidCursorException):
+        decode_cursor(cursor, float, int)
+
+
+def test_cursor_roundtrip():
+    assert decode_cursor(encode_cursor(0.0607927, 42), float, int) == [0.0607927, 42]
+    assert decode_cursor(encode_cursor(1, 42), float, int) == [1, 42]
@@ -0,0 +1,42 @@
+from datetime import date
+
+from src.models.users import RoleEnum, UserModel
+from src.repositories.mappers.mappers import UserDataMapper
+from src.schemas.users import User
+
+
+def make_rows(count: int) -> list[UserModel]:
+    return [
+        UserModel(
+            id=i,
+            first_name="John",
+            last_name="Doe",
+            nickname=f"user{i}",
+            birth_day=date(1990, 1, 1),
+            email=f"user{i}@example.com",
+            hashed_password="hash",
+            role=RoleEnum.user,
+        )
+        for i in range(count)
+    ]
+
+
+def test_trusted_mapping_matches_validated():
+    rows = make_rows(3)
+
+    validated = UserDataMapper.map_many(rows)
+    trusted = UserDataMapper.map_many(rows, trusted=True)
+
+    assert [u.model_dump() for u in trusted] == [u.model_dump() for u in validated]
+    assert UserDataMapper.map_to_domain_entity(rows[0], trusted=True) == validated[0]
+
+
+def test_trusted_mapping_skips_validation(monkeypatch):
+    rows = make_rows(3)
+
+    def fail(*args, **kwargs):
+        raise AssertionError("доверенный путь не должен валидировать")
+
+    monkeypatch.setattr(User, "model_validate", fail)
+    assert [u.id for u in UserDataMapper.map_many(rows, trusted=True)] == [0, 1, 2]
+    assert UserDataMapper.map_to_domain_entity(rows[0], trusted=True).nickname == "user0"
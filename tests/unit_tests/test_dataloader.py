@@ -0,0 +1,78 @@
+import asyncio
+from datetime import date
+
+import pytest
+
+from src.core.dataloader import DataLoader
+from src.models.users import UserModel
+from src.schemas.users import UserPasswordUpdate
+
+
+def make_loader(**kwargs):
+    calls = []
+
+    async def batch_load(keys):
+        calls.append(keys)
+        if "boom" in keys:
+            raise ValueError("boom")
+        return {key: key * 10 for key in keys if key != 404}
+
+    return DataLoader(batch_load, **kwargs), calls
+
+
+@pytest.mark.asyncio
+async def test_loads_in_one_tick_are_batched_and_memoised():
+    loader, calls = make_loader()
+
+    assert await asyncio.gather(loader.load(1), loader.load(2), loader.load(1), loader.load(404)) == [
+        10, 20, 10, None
+    ]
+    assert calls == [[1, 2, 404]]
+
+    assert await loader.load_many([2, 3]) == [20, 30]
+    assert calls == [[1, 2, 404], [3]]
+
+    loader.clear(2)
+    await loader.load(2)
+    assert calls[-1] == [2]
+
+
+@pytest.mark.asyncio
+async def test_max_batch_size_and_errors_are_not_memoised():
+    loader, calls = make_loader(max_batch_size=2)
+    await loader.load_many([1, 2, 3])
+    assert calls == [[1, 2], [3]]
+
+    with pytest.raises(ValueError):
+        await loader.load("boom")
+    with pytest.raises(ValueError):
+        await loader.load("boom")
+    assert calls[-2:] == [["boom"], ["boom"]]
+
+
+@pytest.mark.asyncio
+async def test_repository_loader_uses_one_query_per_tick(db, assert_max_queries):
+    db.session.add_all(
+        UserModel(
+            id=i,
+            first_name="John",
+            last_name="Doe",
+            nickname=f"user{i}",
+            birth_day=date(1990, 1, 1),
+            email=f"user{i}@example.com",
+            hashed_password="hash",
+        )
+        for i in range(1, 4)
+    )
+    await db.commit()
+
+    with assert_max_queries(1):
+        users = await asyncio.gather(*(db.users.loader.load(user_id) for user_id in (3, 1, 3, 99)))
+    assert [user and user.nickname for user in users] == ["user3", "user1", "user3", None]
+    with assert_max_queries(0):
+        assert (await db.users.loader.load(1)).nickname == "user1"
+
+    # Запись через репозиторий сбрасывает запомненное
+    await db.users.update(UserPasswordUpdate(hashed_password="new"), id=1)
+    with assert_max_queries(1):
+        await db.users.loader.load(1)
@@ -0,0 +1,68 @@
+import asyncio
+
+import pytest
+from sqlalchemy import NullPool
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.core import db
+from src.core.db import (
+    InstrumentedAsyncQueuePool,
+    build_engine_kwargs,
+    get_engine_profile,
+    get_pool_status,
+    instrument_pool,
+    pool_checked_out_gauge,
+)
+
+
+@pytest.mark.parametrize("mode", ["TEST", "LOCAL", "DEV", "PROD"])
+def test_engine_profiles_build_kwargs(mode):
+    kwargs = build_engine_kwargs(get_engine_profile(mode))
+
+    assert kwargs["connect_args"]["server_settings"]["statement_timeout"].isdigit()
+    assert kwargs["connect_args"]["prepared_statement_cache_size"] >= 0
+    if mode == "TEST":
+        assert kwargs["poolclass"] is NullPool
+    else:
+        assert kwargs["poolclass"] is InstrumentedAsyncQueuePool
+        assert kwargs["pool_pre_ping"] is True
+    assert kwargs["echo"] is (mode == "LOCAL")
+
+
+def test_settings_override_profile(monkeypatch):
+    monkeypatch.setattr(db.settings, "DB_POOL_SIZE", 42)
+    monkeypatch.setattr(db.settings, "DB_STATEMENT_TIMEOUT_MS", 1234)
+
+    profile = get_engine_profile("PROD")
+
+    assert profile["pool_size"] == 42
+    assert profile["statement_timeout_ms"] == 1234
+    assert profile["max_overflow"] == 10
+
+
+def test_pool_metrics_are_exposed():
+    engine = create_async_engine(
+        "postgresql+asyncpg://u:p@localhost/db",
+        **build_engine_kwargs(get_engine_profile("PROD"), "test_engine"),
+    )
+    instrument_pool(engine, "test_engine")
+
+    status = get_pool_status(engine)
+    assert status["size"] == 20
+    assert status["checked_out"] == 0
+    assert pool_checked_out_gauge.labels(engine="test_engine").value == 0
+    assert engine.sync_engine.pool.engine_name == "test_engine"
+    asyncio.run(engine.dispose())
+
+
+def test_engines_are_created_lazily():
+    asyncio.run(db.dispose_db())
+    assert db._engines == {}
+
+    session_maker = db.get_session_maker()
+    assert db.get_session_maker() is session_maker
+    assert db.async_session_maker is session_maker
+    assert "sync_engine" not in db._engines
+
+    asyncio.run(db.dispose_db())
+    assert db._engines == {}
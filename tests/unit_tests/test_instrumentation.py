@@ -0,0 +1,76 @@
+import json
+import logging
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import text
+
+from src.api.metrics import router as metrics_router
+from src.core.instrumentation import (
+    InstrumentationMiddleware,
+    http_request_db_statements,
+    http_request_duration_seconds,
+    record_timing,
+)
+from src.core.logs import JsonFormatter
+from src.core.metrics import MetricsRegistry, render_prometheus
+
+
+def test_render_prometheus():
+    metrics = MetricsRegistry()
+    metrics.counter("jobs", "Задачи", labelnames=("queue",)).labels(queue='a"b').inc(2)
+    histogram = metrics.histogram("latency_seconds", "Латентность", buckets=(0.1, 1.0))
+    for value in (0.05, 0.5, 5):
+        histogram.observe(value)
+
+    output = render_prometheus(metrics)
+
+    assert '# TYPE jobs counter\njobs_total{queue="a\\"b"} 2.0\n' in output
+    assert 'latency_seconds_bucket{le="0.1"} 1\n' in output
+    assert 'latency_seconds_bucket{le="1.0"} 2\n' in output
+    assert 'latency_seconds_bucket{le="+Inf"} 3\n' in output
+    assert "latency_seconds_sum 5.55\nlatency_seconds_count 3\n" in output
+
+
+def test_json_formatter_includes_extra_fields():
+    record = logging.LogRecord("app", logging.INFO, __file__, 1, "Готово: %s", ("ok",), None)
+    record.user_id = 7
+
+    payload = json.loads(JsonFormatter().format(record))
+
+    assert payload["message"] == "Готово: ok"
+    assert payload["user_id"] == 7
+    assert payload["level"] == "INFO"
+
+
+@pytest.mark.asyncio
+async def test_middleware_records_route_db_and_slow_requests(session_maker, caplog):
+    app = FastAPI()
+    app.include_router(metrics_router)
+
+    @app.get("/items/{item_id}")
+    async def get_item(item_id: int):
+        record_timing("password_hash", 0.01)
+        async with session_maker() as session:
+            await session.execute(text("SELECT 1"))
+            await session.execute(text("SELECT 2"))
+        return {"id": item_id}
+
+    app.add_middleware(InstrumentationMiddleware, slow_request_seconds=0, slow_request_sample_rate=1.0)
+    before = http_request_db_statements.labels(route="/items/{item_id}").count
+
+    with caplog.at_level(logging.WARNING, logger="src.core.instrumentation"):
+        async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/items/1")).status_code == 200
+            assert (await client.get("/items/2")).status_code == 200
+            metrics = await client.get("/metrics")
+
+    assert http_request_db_statements.labels(route="/items/{item_id}").count == before + 2
+    assert http_request_duration_seconds.labels(method="GET", route="/items/{item_id}").count >= 2
+    assert 'http_requests_total{method="GET",route="/items/{item_id}",status="200"}' in metrics.text
+    assert metrics.headers["content-type"].startswith("text/plain; version=0.0.4")
+
+    slow = [record for record in caplog.records if record.route == "/items/{item_id}"][0]
+    assert {item["sql"] for item in slow.top_statements} == {"SELECT 1", "SELECT 2"}
+    assert slow.phases == {"password_hash": 0.01}
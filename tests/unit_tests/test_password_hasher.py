@@ -0,0 +1,68 @@
+import asyncio
+import threading
+
+import pytest
+
+from src.exceptions import PasswordHasherBusyException
+from src.utils.hashing import PasswordHasher, hash_duration_seconds, hash_queue_wait_seconds
+
+
+@pytest.mark.asyncio
+async def test_hash_and_verify():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    try:
+        hashed = await hasher.hash("password123")
+        assert await hasher.verify("password123", hashed)
+        assert not await hasher.verify("wrong-password", hashed)
+    finally:
+        hasher.shutdown()
+
+    assert hash_duration_seconds.labels(operation="hash").count >= 1
+    assert hash_queue_wait_seconds.labels(operation="verify").count >= 2
+
+
+@pytest.mark.asyncio
+async def test_hasher_rejects_when_saturated():
+    hasher = PasswordHasher(max_workers=1, max_queue=1)
+    try:
+        results = await asyncio.gather(
+            *(hasher.hash("password123") for _ in range(4)), return_exceptions=True
+        )
+    finally:
+        hasher.shutdown()
+
+    rejected = [r for r in results if isinstance(r, PasswordHasherBusyException)]
+    assert len(rejected) == 2
+    assert hasher.in_flight == 0
+
+
+def blocking_job(release: threading.Event, submitted_at: float):
+    release.wait(5)
+    return "done", 0.0, 0.0
+
+
+@pytest.mark.asyncio
+async def test_cancelled_request_holds_slot_until_job_finishes():
+    hasher = PasswordHasher(max_workers=1, max_queue=0)
+    release = threading.Event()
+    try:
+        task = asyncio.create_task(hasher._submit("hash", blocking_job, release))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+        # argon2 в пуле еще идет - новый запрос не должен пройти сверх capacity
+        assert hasher.in_flight == 1
+        with pytest.raises(PasswordHasherBusyException):
+            await hasher.hash("password123")
+
+        release.set()
+        for _ in range(100):
+            if hasher.in_flight == 0:
+                break
+            await asyncio.sleep(0.01)
+        assert hasher.in_flight == 0
+    finally:
+        release.set()
+        hasher.shutdown()
@@ -0,0 +1,80 @@
+from unittest.mock import AsyncMock, Mock
+
+import pytest
+
+from src.core.rate_limit import InMemoryRateLimitBackend, LoginRateLimiter
+from src.exceptions import LoginErrorException, TooManyLoginAttemptsException
+from src.schemas.users import UserLogin
+from src.services.auth import AuthService
+
+
+@pytest.mark.asyncio
+async def test_token_bucket_refills():
+    backend = InMemoryRateLimitBackend()
+
+    assert [await backend.take("k", 3, 1000.0) for _ in range(3)] == [0.0, 0.0, 0.0]
+    assert await backend.take("k", 3, 1.0) > 0
+    # Другой ключ - своя корзина
+    assert await backend.take("other", 3, 1.0) == 0.0
+
+
+@pytest.mark.asyncio
+async def test_email_bucket_rejects_before_ip_bucket_drains():
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), ip_limit=100, email_limit=2, window_seconds=60)
+
+    await limiter.check("10.0.0.1", "a@example.com")
+    await limiter.check("10.0.0.2", "A@Example.com ")
+    with pytest.raises(TooManyLoginAttemptsException) as e:
+        await limiter.check("10.0.0.3", "a@example.com")
+    assert 0 < e.value.retry_after <= 30
+    await limiter.check("10.0.0.1", "b@example.com")
+
+
+def test_failure_delay_is_progressive_and_capped():
+    limiter = LoginRateLimiter(
+        InMemoryRateLimitBackend(), failure_delay_seconds=1, max_failure_delay_seconds=5
+    )
+    delays = [limiter.failure_delay(failures, free_failures=3) for failures in range(1, 9)]
+    assert delays == [0, 0, 0, 1, 2, 4, 5, 5]
+
+
+@pytest.mark.asyncio
+async def test_failures_lock_email_until_success_resets():
+    limiter = LoginRateLimiter(InMemoryRateLimitBackend(), email_free_failures=1, failure_delay_seconds=60)
+
+    await limiter.register_failure("10.0.0.1", "a@example.com")
+    await limiter.check("10.0.0.1", "a@example.com")
+    await limiter.register_failure("10.0.0.1", "a@example.com")
+    with pytest.raises(TooManyLoginAttemptsException) as e:
+        await limiter.check("10.0.0.2", "a@example.com")
+    assert 59 < e.value.retry_after <= 60
+
+    await limiter.reset("a@example.com")
+    await limiter.check("10.0.0.2", "a@example.com")
+
+
+@pytest.mark.asyncio
+async def test_backend_errors_fail_open():
+    backend = Mock(locked_for=AsyncMock(side_effect=ConnectionError), incr=AsyncMock(side_effect=ConnectionError))
+    limiter = LoginRateLimiter(backend)
+
+    await limiter.check("10.0.0.1", "a@example.com")
+    await limiter.register_failure("10.0.0.1", "a@example.com")
+
+
+@pytest.mark.asyncio
+async def test_limited_login_skips_db_and_hash(login_rate_limiter):
+    login_rate_limiter.email_free_failures = 0
+    mock_db = AsyncMock()
+    mock_db.users.get_user_with_hashed_password = AsyncMock(return_value=Mock(id=1, hashed_password="h"))
+    service = AuthService(mock_db)
+    service.hasher = Mock(verify=AsyncMock(return_value=False))
+    data = UserLogin(email="a@example.com", password="wrong")
+
+    with pytest.raises(LoginErrorException):
+        await service.login_and_get_access_token(data, client_ip="10.0.0.1")
+    with pytest.raises(TooManyLoginAttemptsException):
+        await service.login_and_get_access_token(data, client_ip="10.0.0.1")
+
+    mock_db.users.get_user_with_hashed_password.assert_awaited_once()
+    service.hasher.verify.assert_awaited_once()
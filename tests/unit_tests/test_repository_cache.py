@@ -0,0 +1,130 @@
+import asyncio
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock
+
+import pytest
+
+from src.core.cache import InMemoryCacheBackend, RepositoryCache
+from src.exceptions import ObjectNotFoundException
+from src.models.users import RoleEnum, UserModel
+from src.repositories.mixins import CachedRepositoryMixin, flush_pending_invalidations
+from src.repositories.mappers.mappers import UserDataMapper
+from src.schemas.users import User
+
+
+def make_user(uid: int) -> User:
+    return User(
+        id=uid,
+        first_name='John',
+        last_name='Doe',
+        birth_day=date(2005, 12, 2),
+        nickname='alexmercer',
+        email='johndoe2005@gmail.com',
+        role=RoleEnum.user,
+    )
+
+
+class FakeBaseRepository:
+    def __init__(self, session):
+        self.session = session
+        self.loader = AsyncMock(side_effect=lambda **f: make_user(f["id"]) if f["id"] > 0 else None)
+
+    async def get_one_or_none(self, **filter):
+        return await self.loader(**filter)
+
+    async def update(self):
+        await self._on_write()
+
+
+class FakeUsersRepository(CachedRepositoryMixin, FakeBaseRepository):
+    model = UserModel
+    mapper = UserDataMapper
+
+
+@pytest.fixture
+def repo():
+    repository = FakeUsersRepository(SimpleNamespace(info={}))
+    repository.cache = RepositoryCache(InMemoryCacheBackend())
+    return repository
+
+
+@pytest.mark.asyncio
+async def test_read_through_l1_and_l2(repo):
+    assert await repo.get_one_or_none(id=1) == make_user(1)
+    assert await repo.get_one_or_none(id=1) == make_user(1)
+    assert repo.loader.await_count == 1
+
+    repo.cache.l1.clear()
+    assert await repo.get_one_or_none(id=1) == make_user(1)
+    assert repo.loader.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_negative_result_is_cached(repo):
+    with pytest.raises(ObjectNotFoundException):
+        await repo.get_one(id=0)
+    assert await repo.get_one_or_none(id=0) is None
+    assert repo.loader.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_single_loader_per_key(repo):
+    async def slow_loader(**filter):
+        await asyncio.sleep(0.01)
+        return make_user(filter["id"])
+
+    repo.loader.side_effect = slow_loader
+    results = await asyncio.gather(*(repo.get_one_or_none(id=1) for _ in range(10)))
+
+    assert all(user.id == 1 for user in results)
+    assert repo.loader.await_count == 1
+
+
+@pytest.mark.asyncio
+async def test_write_invalidates(repo):
+    await repo.get_one_or_none(id=1)
+    await repo.update()
+    await repo.get_one_or_none(id=1)
+    assert repo.loader.await_count == 2
+
+    await flush_pending_invalidations(repo.session)
+    assert repo.session.info == {}
+    await repo.get_one_or_none(id=1)
+    assert repo.loader.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_reads_after_uncommitted_write_are_not_cached(repo):
+    await repo.update()
+    await repo.get_one_or_none(id=1)
+    await repo.get_one_or_none(id=1)
+    assert repo.loader.await_count == 2
+
+    # Откат: незакоммиченное не должно остаться ни в L1, ни в L2
+    await flush_pending_invalidations(repo.session)
+    await repo.get_one_or_none(id=1)
+    await repo.get_one_or_none(id=1)
+    assert repo.loader.await_count == 3
+
+
+@pytest.mark.asyncio
+async def test_cancelled_leader_does_not_fail_waiters(repo):
+    started = asyncio.Event()
+
+    async def slow_loader(**filter):
+        started.set()
+        await asyncio.sleep(0.05)
+        return make_user(filter["id"])
+
+    repo.loader.side_effect = slow_loader
+    leader = asyncio.create_task(repo.get_one_or_none(id=1))
+    await started.wait()
+    waiter = asyncio.create_task(repo.get_one_or_none(id=1))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    assert await waiter == make_user(1)
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+    assert repo.loader.await_count == 2
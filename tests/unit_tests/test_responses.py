@@ -0,0 +1,89 @@
+import pytest
+from fastapi import APIRouter, FastAPI, Response
+from httpx import ASGITransport, AsyncClient
+from pydantic import BaseModel
+
+from src.core.responses import FastJSONResponse, FastJSONRoute
+from src.schemas.books import Book
+from src.schemas.pagination import KeysetPage
+
+
+class Public(BaseModel):
+    id: int
+
+
+router = APIRouter(route_class=FastJSONRoute)
+
+
+@router.get("/books")
+async def books():
+    return KeysetPage[Book](items=[Book(id=1, title="Книга", file_path="/books/1.pdf", author_id=1)])
+
+
+@router.get("/contains")
+async def contains():
+    return {1: True, 2: False}
+
+
+@router.post("/login", status_code=201)
+async def login(response: Response):
+    response.set_cookie("access_token", "token")
+    return {"access_token": "token"}
+
+
+@router.delete("/empty", status_code=204)
+async def empty():
+    return None
+
+
+@router.get("/public", response_model=Public)
+async def public(as_dict: bool = False):
+    if as_dict:
+        return {"id": 1, "secret": "hidden"}
+    return Public(id=2)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    def fail(*args, **kwargs):
+        raise AssertionError("jsonable_encoder не должен вызываться")
+
+    monkeypatch.setattr("fastapi.routing.jsonable_encoder", fail)
+    app = FastAPI(default_response_class=FastJSONResponse)
+    app.include_router(router)
+    return AsyncClient(transport=ASGITransport(app=app), base_url="http://test")
+
+
+@pytest.mark.asyncio
+async def test_models_and_dicts_encoded_directly(client):
+    async with client:
+        response = await client.get("/books")
+        assert response.headers["content-type"] == "application/json"
+        assert response.json()["items"][0]["title"] == "Книга"
+        assert (await client.get("/contains")).json() == {"1": True, "2": False}
+
+
+@pytest.mark.asyncio
+async def test_status_and_injected_headers_kept(client):
+    async with client:
+        response = await client.post("/login")
+        assert response.status_code == 201
+        assert response.cookies["access_token"] == "token"
+
+        response = await client.delete("/empty")
+        assert response.status_code == 204
+        assert response.content == b""
+
+
+@pytest.mark.asyncio
+async def test_response_model_filters_dicts(client):
+    async with client:
+        assert (await client.get("/public")).json() == {"id": 2}
+        assert (await client.get("/public", params={"as_dict": True})).json() == {"id": 1}
+
+
+def test_default_json_response_routes_are_not_wrapped():
+    app = FastAPI()
+    app.include_router(router)
+    route = next(route for route in app.routes if getattr(route, "path", None) == "/books")
+    assert not getattr(route.dependant.call, "renders_response", False)
@@ -0,0 +1,114 @@
+import hashlib
+
+import pytest
+
+from src.core.storage import LocalFileStorage, S3FileStorage
+from src.exceptions import FileTooLargeException
+from src.utils.downloads import etag_matches, parse_range
+
+CONTENT = b"0123456789" * 1000
+
+
+async def chunked(data: bytes, size: int = 777):
+    for i in range(0, len(data), size):
+        yield data[i:i + size]
+
+
+@pytest.mark.asyncio
+async def test_local_storage_save_and_dedup(tmp_path):
+    storage = LocalFileStorage(tmp_path, chunk_size=4096)
+
+    stored = await storage.save(chunked(CONTENT), content_type="application/pdf")
+    again = await storage.save(chunked(CONTENT), content_type="application/pdf")
+
+    sha256 = hashlib.sha256(CONTENT).hexdigest()
+    assert stored.key == f"{sha256[:2]}/{sha256[2:4]}/{sha256}.pdf"
+    assert stored.created and not again.created
+    assert again.key == stored.key
+    assert (tmp_path / stored.key).read_bytes() == CONTENT
+    assert list((tmp_path / ".tmp").iterdir()) == []
+    assert (await storage.stat(stored.key)).size == len(CONTENT)
+
+
+@pytest.mark.asyncio
+async def test_local_storage_rejects_too_large(tmp_path):
+    storage = LocalFileStorage(tmp_path, chunk_size=4096)
+
+    with pytest.raises(FileTooLargeException):
+        await storage.save(chunked(CONTENT), max_size=len(CONTENT) - 1)
+    assert list((tmp_path / ".tmp").iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_local_storage_iter_range(tmp_path):
+    storage = LocalFileStorage(tmp_path, chunk_size=64)
+    stored = await storage.save(chunked(CONTENT))
+
+    data = b"".join([chunk async for chunk in storage.iter_range(stored.key, 5, 1005)])
+
+    assert data == CONTENT[5:1005]
+
+
+@pytest.mark.asyncio
+async def test_local_storage_keys_stay_inside_root(tmp_path):
+    storage = LocalFileStorage(tmp_path / "root")
+
+    assert await storage.stat("../outside.pdf") is None
+    assert await storage.stat("/etc/passwd") is None
+
+
+@pytest.mark.parametrize("header,expected", [
+    (None, None),
+    ("bytes=0-99", (0, 100)),
+    ("bytes=100-", (100, 1000)),
+    ("bytes=-100", (900, 1000)),
+    ("bytes=900-5000", (900, 1000)),
+    ("bytes=0-1,5-6", None),
+    ("items=0-1", None),
+])
+def test_parse_range(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=10-5", "bytes=-0"])
+def test_parse_range_not_satisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range(header, 1000)
+
+
+def test_etag_matches():
+    assert etag_matches('"a", W/"b"', '"b"')
+    assert etag_matches("*", '"b"')
+    assert not etag_matches('"a"', '"b"')
+    assert not etag_matches(None, '"b"')
+
+
+class FakeS3Client:
+    def __init__(self):
+        self.objects: dict[str, bytes] = {}
+        self.puts = 0
+
+    async def head_object(self, Bucket, Key):
+        if Key not in self.objects:
+            error = Exception("not found")
+            error.response = {"Error": {"Code": "404"}}
+            raise error
+        return {"ContentLength": len(self.objects[Key])}
+
+    async def put_object(self, Bucket, Key, Body, ContentType):
+        self.puts += 1
+        self.objects[Key] = Body.read()
+
+
+@pytest.mark.asyncio
+async def test_s3_storage_dedup_with_fake_client():
+    client = FakeS3Client()
+    storage = S3FileStorage("books", client=client)
+
+    stored = await storage.save(chunked(CONTENT), content_type="application/pdf")
+    again = await storage.save(chunked(CONTENT), content_type="application/pdf")
+
+    assert client.objects[stored.key] == CONTENT
+    assert client.puts == 1 and not again.created
+    assert storage.local_path(stored.key) is None
+    assert (await storage.stat(stored.key)).size == len(CONTENT)
@@ -0,0 +1,121 @@
+import asyncio
+
+import pytest
+
+from src.core.tasks import InMemoryBroker, TaskQueue, Worker
+
+
+@pytest.fixture
+def queue():
+    broker = InMemoryBroker()
+    return TaskQueue(broker, local_broker=broker)
+
+
+@pytest.mark.asyncio
+async def test_enqueue_is_idempotent_by_task_id(queue):
+    calls = []
+
+    @queue.task("test.collect")
+    async def collect(value):
+        calls.append(value)
+
+    assert await collect.enqueue(1, task_id="same") == "same"
+    assert await collect.enqueue(2, task_id="same") is None
+    assert await queue.broker.depth("default") == 1
+
+    await Worker(queue, {"default": 1}, poll_interval=0.01).run(until_idle=True)
+
+    assert calls == [1]
+
+
+@pytest.mark.asyncio
+async def test_retries_with_backoff_then_succeeds(queue):
+    attempts = []
+
+    @queue.task("test.flaky", max_retries=3, backoff=0.01)
+    async def flaky():
+        attempts.append(asyncio.get_running_loop().time())
+        if len(attempts) < 3:
+            raise RuntimeError("temporary")
+
+    await flaky.enqueue()
+    await Worker(queue, {"default": 1}, poll_interval=0.005).run(until_idle=True)
+
+    assert len(attempts) == 3
+    # Задержки: [0.005, 0.01] перед второй попыткой и [0.01, 0.02] перед третьей
+    assert attempts[1] - attempts[0] >= 0.004
+    assert attempts[2] - attempts[1] >= 0.009
+
+
+def test_retry_delay_is_exponential_and_capped(queue, monkeypatch):
+    monkeypatch.setattr("src.core.tasks.random.uniform", lambda a, b: b)
+
+    @queue.task("test.delays", backoff=1.0, max_backoff=5.0)
+    async def delays():
+        pass
+
+    assert [delays.retry_delay(attempt) for attempt in range(1, 6)] == [1.0, 2.0, 4.0, 5.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_gives_up_after_max_retries_and_releases_id(queue):
+    attempts = 0
+
+    @queue.task("test.broken", max_retries=2, backoff=0.001)
+    def broken():
+        nonlocal attempts
+        attempts += 1
+        raise RuntimeError("permanent")
+
+    await broken.enqueue(task_id="job")
+    await Worker(queue, {"default": 1}, poll_interval=0.005).run(until_idle=True)
+
+    assert attempts == 3
+    # После окончательной ошибки ту же задачу можно поставить снова
+    assert await broken.enqueue(task_id="job") == "job"
+
+
+@pytest.mark.asyncio
+async def test_concurrency_limit_per_queue(queue):
+    running = 0
+    peak = 0
+
+    @queue.task("test.slow", queue="files")
+    async def slow():
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+
+    for _ in range(10):
+        await slow.enqueue()
+    await Worker(queue, {"files": 3}, poll_interval=0.005).run(until_idle=True)
+
+    assert peak == 3
+
+
+@pytest.mark.asyncio
+async def test_local_tasks_never_reach_external_broker():
+    external = InMemoryBroker()
+    queue = TaskQueue(external)
+
+    @queue.task("test.secret", local=True)
+    async def secret(password):
+        pass
+
+    await secret.enqueue("p@ssw0rd")
+
+    assert await external.depth(TaskQueue.LOCAL_QUEUE) == 0
+    assert await queue.local_broker.depth(TaskQueue.LOCAL_QUEUE) == 1
+
+
+@pytest.mark.asyncio
+async def test_expired_processing_is_requeued():
+    broker = InMemoryBroker()
+    await broker.push("default", "message", eta=0)
+
+    assert await broker.pop("default", now=1, visibility_timeout=10) == "message"
+    assert await broker.requeue_expired("default", now=5) == 0
+    assert await broker.requeue_expired("default", now=11) == 1
+    assert await broker.pop("default", now=12, visibility_timeout=10) == "message"
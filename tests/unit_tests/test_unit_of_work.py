@@ -0,0 +1,62 @@
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+
+from src.core.unit_of_work import UnitOfWork
+from src.models.books import BookModel
+from src.models.users import UserModel
+
+
+def make_repository(model):
+    repository = MagicMock()
+    repository.model = model
+    repository._on_write = AsyncMock()
+    return repository
+
+
+def make_session():
+    session = MagicMock()
+    session.execute = AsyncMock()
+    nested = MagicMock()
+    nested.__aenter__ = AsyncMock()
+    nested.__aexit__ = AsyncMock(return_value=False)
+    session.begin_nested = MagicMock(return_value=nested)
+    return session
+
+
+@pytest.mark.asyncio
+async def test_flush_batches_consecutive_operations():
+    session = make_session()
+    users, books = make_repository(UserModel), make_repository(BookModel)
+    uow = UnitOfWork(session)
+
+    uow.register_insert(users, {"nickname": "a"})
+    uow.register_insert(users, {"nickname": "b"})
+    uow.register_insert(books, {"title": "c"})
+    uow.register_update(users, {"nickname": "d"}, id=1)
+    await uow.flush()
+
+    assert session.execute.await_count == 3
+    first_rows = session.execute.await_args_list[0].args[1]
+    assert first_rows == [{"nickname": "a"}, {"nickname": "b"}]
+    assert session.execute.await_args_list[2].args[1] == [{"nickname": "d", "id": 1}]
+    users._on_write.assert_awaited_once()
+    books._on_write.assert_awaited_once()
+    assert uow.pending == 0
+
+
+@pytest.mark.asyncio
+async def test_savepoint_discards_failed_block():
+    session = make_session()
+    users = make_repository(UserModel)
+    uow = UnitOfWork(session)
+
+    uow.register_insert(users, {"nickname": "before"})
+    with pytest.raises(RuntimeError):
+        async with uow.savepoint():
+            uow.register_insert(users, {"nickname": "inside"})
+            raise RuntimeError
+
+    assert uow.pending == 0
+    assert session.execute.await_count == 1
+    assert session.execute.await_args.args[1] == [{"nickname": "before"}]